@@ -0,0 +1,49 @@
+""" Measures crossing reduction of the proper layering on a large cyclic
+graph: crossings of the initial order, of the reduced one, and time spent.
+Also reports the width of the layout from coordinate assignment against
+the grid that places slots one apart.
+
+Run from the repository root: python -m benchmarks.bench_crossings
+"""
+import argparse
+from benchmarks.common import random_include_edges, build_graph, timed
+from src.node_layering import Layering
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vertices", type=int, default=20_000)
+    parser.add_argument("--degree", type=float, default=3.0)
+    parser.add_argument("--back-edges", type=float, default=0.02, help="share of edges that close cycles")
+    parser.add_argument("--sweeps", type=int, default=20)
+    parser.add_argument("--budget", type=float, default=5.0, help="seconds of sweeping")
+    parser.add_argument("--median", action="store_true", help="sort by median instead of barycenter")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    edges = random_include_edges(args.vertices, args.degree, args.back_edges, args.seed)
+    graph = build_graph(args.vertices, edges)
+
+    top_order, dag = graph.acyclic_view()
+    layering = Layering(dag, top_order)
+    layering.compute_layers()
+    _, layering_time = timed(layering.proper_layering, graph)
+
+    slots = sum(len(layer.nodes) for layer in layering.layers)
+    print(f"Graph: {len(graph)} vertices, {len(edges)} edges, {len(layering.layers)} layers, {slots - len(graph)} dummy vertices")
+    print(f"proper layering: {layering_time:.2f} s")
+
+    initial, count_time = timed(layering.count_crossings)
+    _, sweep_time       = timed(layering.minimize_crossings, args.sweeps, args.budget, args.median)
+    reduced             = layering.count_crossings()
+
+    print(f"crossings, initial order: {initial:14d} (counted in {count_time:.2f} s)")
+    print(f"crossings, after sweeps : {reduced:14d} ({sweep_time:.2f} s, budget {args.budget:.2f} s)")
+    print(f"reduction: {100 * (1 - reduced / max(initial, 1)):.1f}%")
+
+    grid_width = max(len(layer.nodes) for layer in layering.layers) - 1
+    _, coord_time = timed(layering.assign_coordinates)
+    width = max(max(layer.x, default=0.0) for layer in layering.layers)
+    print(f"coordinates: width {width:.1f} slots, grid {grid_width} slots ({coord_time:.2f} s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+""" Compares runtime and the number of reversed edges of the available
+cycle breaking strategies on random cyclic graphs.
+
+Run from the repository root: python -m benchmarks.bench_cycle_breaking
+"""
+import argparse
+from benchmarks.common import random_include_edges, build_graph, timed
+from src.ds.cycle_breaking import CycleBreaking, create_cycle_breaker
+
+def is_topological(graph, order: list[int]) -> bool:
+    position = {vtx: i for i, vtx in enumerate(order)}
+    return len(position) == len(graph) and all(
+        position[u] < position[v]
+        for u in range(len(graph))
+        for v in graph.get_neighbors_out(u)
+        if u != v
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vertices", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--degree", type=float, default=4.0)
+    parser.add_argument("--back-edges", type=float, default=0.05, help="share of edges that close cycles")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'vertices':>9} {'edges':>8} {'breaker':>11} {'time [s]':>9} {'reversed':>9}  valid")
+
+    for vertices in args.vertices:
+        edges = random_include_edges(vertices, args.degree, args.back_edges, args.seed)
+
+        for kind in CycleBreaking:
+            graph = build_graph(vertices, edges)
+            order, elapsed = timed(graph.remove_cycle_and_sort, create_cycle_breaker(kind))
+
+            print(f"{vertices:>9} {len(edges):>8} {kind.value:>11} {elapsed:>9.3f} "
+                  f"{len(graph.reversed_edges):>9}  {is_topological(graph, order)}")
+
+if __name__ == "__main__":
+    main()
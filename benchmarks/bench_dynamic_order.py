@@ -0,0 +1,51 @@
+""" Compares updating the dynamic topological order after single edge
+changes with sorting the whole graph again.
+
+Run from the repository root: python -m benchmarks.bench_dynamic_order
+"""
+import argparse
+import random
+from benchmarks.common import random_include_edges, build_graph, timed
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vertices", type=int, default=100_000)
+    parser.add_argument("--degree", type=float, default=4.0)
+    parser.add_argument("--back-edges", type=float, default=0.0, help="share of edges that close cycles")
+    parser.add_argument("--changes", type=int, default=1000, help="number of edge insertions and deletions")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    edges = random_include_edges(args.vertices, args.degree, args.back_edges, args.seed)
+    graph = build_graph(args.vertices, edges)
+
+    print(f"Graph: {len(graph)} vertices, {len(edges)} edges")
+
+    _, sort_time = timed(graph.remove_cycle_and_sort)
+    print(f"remove_cycle_and_sort: {sort_time:.3f} s")
+    graph.undo_reversed_edges()
+
+    dynamic_order, init_time = timed(graph.dynamic_order)
+    print(f"dynamic order setup  : {init_time:.3f} s")
+
+    rnd      = random.Random(args.seed)
+    existing = set(edges)
+
+    def apply_changes():
+        for _ in range(args.changes):
+            if existing and rnd.random() < 0.5:
+                u, v = existing.pop()
+                dynamic_order.remove_edge(u, v)
+            else:
+                u, v = rnd.randrange(args.vertices), rnd.randrange(args.vertices)
+                if u != v and (u, v) not in existing:
+                    existing.add((u, v))
+                    dynamic_order.add_edge(u, v)
+
+    _, update_time = timed(apply_changes)
+
+    print(f"dynamic order update : {update_time / args.changes * 1e3:.3f} ms/change "
+          f"({len(dynamic_order.reversed_edges)} reversed edges)")
+
+if __name__ == "__main__":
+    main()
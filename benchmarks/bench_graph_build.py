@@ -0,0 +1,66 @@
+""" Compares building the graph with DirectedGraph.from_dependency_map with
+adding the same scanner output one include at a time.
+
+Run from the repository root: python -m benchmarks.bench_graph_build
+"""
+import argparse
+import random
+from benchmarks.common import timed
+from src.ds.graph import DirectedGraph
+
+def random_dependency_map(sources: int, headers: int, includes: int, seed: int) -> dict[str, list[str]]:
+    """ Every source and header includes random headers, with a few
+    repeated and self includes like in real scanner output.
+    """
+    rnd   = random.Random(seed)
+    names = [f"/project/src/file_{i}.cpp" for i in range(sources)]
+    names += [f"/project/include/module_{i % 97}/header_{i}.h" for i in range(headers)]
+
+    dep_map = {}
+    for name in names:
+        count = rnd.randint(0, 2 * includes)
+        dep_map[name] = [names[sources + rnd.randrange(headers)] for _ in range(count)]
+        if count and rnd.random() < 0.01:
+            dep_map[name].append(name)
+
+    return dep_map
+
+def build_per_edge(dep_map: dict[str, list[str]]) -> DirectedGraph:
+    """ Vertex lookups and an edge insertion per include,
+    the way the graph was built before.
+    """
+    graph = DirectedGraph()
+    for source_file, includes in dep_map.items():
+        source = graph.safe_add_vertex(source_file)
+        for included_file in dict.fromkeys(includes):
+            graph.safe_add_vertex(included_file)
+            if included_file != source_file:
+                graph.add_edge(included_file, source_file)
+    return graph
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sources", type=int, default=100_000)
+    parser.add_argument("--headers", type=int, default=100_000)
+    parser.add_argument("--includes", type=int, default=10, help="average includes per file")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    dep_map = random_dependency_map(args.sources, args.headers, args.includes, args.seed)
+    print(f"Dependency map: {len(dep_map)} files, {sum(map(len, dep_map.values()))} includes")
+
+    per_edge, per_edge_time = timed(build_per_edge, dep_map)
+    print(f"per edge           : {per_edge_time:.3f} s")
+
+    bulk, bulk_time = timed(DirectedGraph.from_dependency_map, dep_map)
+    print(f"from_dependency_map: {bulk_time:.3f} s, speedup {per_edge_time / bulk_time:.1f}x")
+
+    is_same = (
+        [bulk.get_vertex_name(v) for v in range(len(bulk))] == [per_edge.get_vertex_name(v) for v in range(len(per_edge))] and
+        all(bulk.get_neighbors_out(v) == per_edge.get_neighbors_out(v) and
+            bulk.get_neighbors_in(v) == per_edge.get_neighbors_in(v) for v in range(len(bulk)))
+    )
+    print(f"same graph: {is_same}")
+
+if __name__ == "__main__":
+    main()
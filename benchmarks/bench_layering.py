@@ -0,0 +1,89 @@
+""" Compares the flat array layering with the previous list and nested dict
+layering on a large cyclic graph with long edges.
+
+Run from the repository root: python -m benchmarks.bench_layering
+"""
+import argparse
+import tracemalloc
+from benchmarks.common import random_include_edges, build_graph, timed
+from src.ds.graph import DirectedGraph
+from src.node_layering import Layering
+
+def nested_layering(graph: DirectedGraph, layered_graph, topological_order: list[int]):
+    """ Longest path and proper layering as they were done before flat arrays.
+    Returns: node layers, layer lists with -1 dummies, dummy slots by edge.
+    """
+    node2layer = [1] * len(layered_graph)
+    for node in topological_order:
+        for node_out in layered_graph.get_neighbors_out(node):
+            node2layer[node_out] = max(node2layer[node_out], node2layer[node] + 1)
+
+    layers = [[] for _ in range(max(node2layer))]
+    for node_id, layer in enumerate(node2layer):
+        layers[layer-1].append(node_id)
+
+    dummies: dict[int, dict[int, list[int]]] = {}
+    for level, nodes in enumerate(layers, 1):
+        for vtx in nodes:
+            if vtx == -1:
+                continue
+            for child_vtx in graph.get_neighbors_out(vtx):
+                target_level = node2layer[child_vtx]
+                if abs(target_level - level) > 1:
+                    slots = dummies.setdefault(vtx, {}).setdefault(child_vtx, [])
+                    for layer in range(min(target_level, level)+1, max(target_level, level)):
+                        slots.append(len(layers[layer-1]))
+                        layers[layer-1].append(-1)
+
+    return node2layer, layers, dummies
+
+def flat_layering(graph: DirectedGraph, layered_graph, topological_order: list[int]) -> Layering:
+    layering = Layering(layered_graph, topological_order)
+    layering.compute_layers()
+    layering.proper_layering(graph)
+    return layering
+
+def peak_memory(fn, *args) -> int:
+    """ Returns: peak bytes allocated while fn runs, its result is dropped.
+    """
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vertices", type=int, default=20_000)
+    parser.add_argument("--degree", type=float, default=3.0)
+    parser.add_argument("--back-edges", type=float, default=0.02, help="share of edges that close cycles")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    edges = random_include_edges(args.vertices, args.degree, args.back_edges, args.seed)
+    graph = build_graph(args.vertices, edges)
+
+    top_order, dag = graph.acyclic_view()
+    print(f"Graph: {len(graph)} vertices, {len(edges)} edges, {len(dag.reversed_edges)} reversed")
+
+    (node2layer, layers, dummies), nested_time = timed(nested_layering, graph, dag, top_order)
+    layering, flat_time = timed(flat_layering, graph, dag, top_order)
+
+    assert list(layering.raw_node_layers) == node2layer
+    assert [layer.nodes.tolist() for layer in layering.layers] == layers
+    assert {u: {v: list(slots) for v, slots in chains.items()}
+            for u, chains in layering.dummy_traversing_edges.items()} == dummies
+
+    print(f"{len(layers)} layers, {sum(map(len, layers)) - len(graph)} dummy vertices")
+    print(f"nested lists and dicts: {nested_time:.2f} s")
+    print(f"flat arrays           : {flat_time:.2f} s")
+    print(f"speedup: {nested_time / max(flat_time, 1e-9):.1f}x")
+
+    nested_peak = peak_memory(nested_layering, graph, dag, top_order)
+    flat_peak   = peak_memory(flat_layering, graph, dag, top_order)
+
+    print(f"peak memory, nested lists and dicts: {nested_peak / 2**20:8.1f} MiB")
+    print(f"peak memory, flat arrays           : {flat_peak / 2**20:8.1f} MiB")
+
+if __name__ == "__main__":
+    main()
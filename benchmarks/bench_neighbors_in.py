@@ -0,0 +1,60 @@
+""" Compares in-neighbour queries of the maintained reverse index with the
+previous full scan over all adjacency lists, on a large cyclic graph.
+
+Run from the repository root: python -m benchmarks.bench_neighbors_in
+"""
+import argparse
+import random
+from benchmarks.common import random_include_edges, build_graph, timed
+from src.ds.graph import DirectedGraph
+
+def scan_neighbors_in(graph: DirectedGraph, vertex: int) -> list[int]:
+    """ In-neighbour query as it was done before the reverse index.
+    """
+    return [vrtx for vrtx in range(0, len(graph)) if vertex in graph[vrtx]]
+
+class CountingGraph(DirectedGraph):
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.in_queries = 0
+
+    def get_neighbors_in(self, vertex: int) -> list[int]:
+        self.in_queries += 1
+        return super().get_neighbors_in(vertex)
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vertices", type=int, default=50_000)
+    parser.add_argument("--degree", type=float, default=4.0)
+    parser.add_argument("--back-edges", type=float, default=0.05, help="share of edges that close cycles")
+    parser.add_argument("--queries", type=int, default=50, help="number of sampled full-scan queries")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    edges = random_include_edges(args.vertices, args.degree, args.back_edges, args.seed)
+    graph = build_graph(args.vertices, edges, CountingGraph)
+
+    print(f"Graph: {len(graph)} vertices, {len(edges)} edges")
+
+    sample = random.Random(args.seed).sample(range(args.vertices), args.queries)
+
+    _, scan_time  = timed(lambda: [scan_neighbors_in(graph, vtx) for vtx in sample])
+    _, index_time = timed(lambda: [graph.get_neighbors_in(vtx) for vtx in sample])
+
+    scan_per_query  = scan_time / len(sample)
+    index_per_query = index_time / len(sample)
+
+    print(f"get_neighbors_in, full scan    : {scan_per_query * 1e6:12.1f} us/query")
+    print(f"get_neighbors_in, reverse index: {index_per_query * 1e6:12.1f} us/query")
+    print(f"speedup: {scan_per_query / max(index_per_query, 1e-9):.0f}x")
+
+    graph.in_queries = 0
+    _, sort_time = timed(graph.remove_cycle_and_sort)
+
+    print(f"remove_cycle_and_sort with reverse index: {sort_time:.2f} s "
+          f"({graph.in_queries} in-neighbour queries, {len(graph.reversed_edges)} reversed edges)")
+    print(f"same queries with full scan would take about {graph.in_queries * scan_per_query:.1f} s")
+
+if __name__ == "__main__":
+    main()
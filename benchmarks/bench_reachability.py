@@ -0,0 +1,46 @@
+""" Compares batch dependent queries of the reachability index with a
+BFS over the graph per queried vertex.
+
+Run from the repository root: python -m benchmarks.bench_reachability
+"""
+import argparse
+import random
+from benchmarks.common import random_include_edges, build_graph, timed
+
+def bfs_dependents(graph, vertex: int) -> set[int]:
+    visited, stack = set(), [vertex]
+    while stack:
+        for vx_out in graph.get_neighbors_out(stack.pop()):
+            if vx_out not in visited:
+                visited.add(vx_out)
+                stack.append(vx_out)
+    return visited
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vertices", type=int, default=20_000)
+    parser.add_argument("--degree", type=float, default=3.0)
+    parser.add_argument("--back-edges", type=float, default=0.001, help="share of edges that close cycles")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--memory-limit", type=int, default=64 << 20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    edges = random_include_edges(args.vertices, args.degree, args.back_edges, args.seed)
+    graph = build_graph(args.vertices, edges)
+    query = random.Random(args.seed).sample(range(args.vertices), args.queries)
+
+    print(f"Graph: {len(graph)} vertices, {len(edges)} edges, {len(query)} queried vertices")
+
+    index, build_time = timed(graph.reachability_index, args.memory_limit)
+    print(f"index build      : {build_time:.3f} s (indexed: {index.is_indexed}, "
+          f"{len(index.condensation)} components)")
+
+    bfs_result, bfs_time = timed(lambda: set().union(*(bfs_dependents(graph, vtx) for vtx in query)))
+    print(f"BFS per vertex   : {bfs_time:.3f} s")
+
+    index_result, index_time = timed(index.dependents_of, query)
+    print(f"index batch query: {index_time:.3f} s, same result: {sorted(bfs_result) == index_result}")
+
+if __name__ == "__main__":
+    main()
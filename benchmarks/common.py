@@ -0,0 +1,36 @@
+import random
+import time
+from typing import Callable, Tuple
+from src.ds.graph import DirectedGraph
+
+def random_include_edges(vertices: int, avg_degree: float, back_edge_ratio: float, seed: int) -> list[Tuple[int, int]]:
+    """ Random include-like edges. Most of them go forward in vertex order,
+    back_edge_ratio of them go backwards and close cycles.
+    """
+    rnd   = random.Random(seed)
+    edges = set()
+
+    while len(edges) < int(vertices * avg_degree):
+        u, v = rnd.randrange(vertices), rnd.randrange(vertices)
+        if u == v:
+            continue
+        if (u > v) != (rnd.random() < back_edge_ratio):
+            u, v = v, u
+        edges.add((u, v))
+
+    return sorted(edges)
+
+def build_graph(vertices: int, edges: list[Tuple[int, int]], graph_type=DirectedGraph) -> DirectedGraph:
+    graph = graph_type()
+    for vtx in range(vertices):
+        graph.add_vertex(f"v{vtx}")
+    for u, v in edges:
+        graph.add_edge(u, v)
+    return graph
+
+def timed(fn: Callable, *args, **kwargs):
+    """ Returns: (result, elapsed seconds)
+    """
+    start  = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
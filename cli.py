@@ -0,0 +1,15 @@
+import sys
+from src.utils import util
+
+# Headless entry point, must not import anything from the GUI stack
+from src.headless import main, EXIT_ERROR
+
+glob_log = util.LazyLogger("cli")
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as ex:
+        glob_log.exception("Unhandeled error caught!")
+        print(f"Error: {ex}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
@@ -1,10 +1,18 @@
-import os
-from global_logger import Log
-from src.resolver import *
+import sys
+from src.utils import startup
+from src.utils import util
 
-glob_log = Log.get_logger(name="main", logs_dir=os.path.abspath("./log"))
+if startup.is_requested(sys.argv):
+    startup.report.enable()
+
+glob_log = util.LazyLogger("main")
 
 def main():
+    # Imported here so that the startup report sees the whole GUI stack
+    from src.resolver import Resolver
+
+    startup.report.mark("imports")
+
     resolver_app = Resolver()
     resolver_app.main_loop()
 
@@ -12,4 +20,4 @@ if __name__ == "__main__":
     try:
         main()
     except Exception as ex:
-        glob_log.exception("Unhandeled error caught!")
\ No newline at end of file
+        glob_log.exception("Unhandeled error caught!")
@@ -0,0 +1,89 @@
+import os
+import json
+import shlex
+from typing import NamedTuple, Optional
+
+class CompileCommand(NamedTuple):
+    file: str
+    args: tuple[str, ...]
+
+# Flags that don't affect preprocessing, the second set also consumes the next argument
+_DROPPED_FLAGS       = {"-c", "-M", "-MM", "-MD", "-MMD", "-MP", "-MG"}
+_DROPPED_VALUE_FLAGS = {"-o", "-MF", "-MT", "-MQ", "-MJ"}
+
+# Flags with path values that are relative to the entry directory
+_PATH_FLAGS        = ["-isystem", "-idirafter", "-iquote", "-include", "-imacros", "-I", "-F"]
+_JOINED_PATH_FLAGS = ["-isystem", "-idirafter", "-iquote", "-I", "-F"]
+
+def find_compile_commands(project_dir: str) -> Optional[str]:
+    """ Looks for compile_commands.json in the project directory
+    and its build directory.
+    """
+    for candidate in (
+        os.path.join(project_dir, "compile_commands.json"),
+        os.path.join(project_dir, "build", "compile_commands.json")
+    ):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def _absolute(directory: str, path: str) -> str:
+    return os.path.normpath(os.path.join(directory, path))
+
+def _clean_args(argv: list[str], directory: str, source: str) -> tuple[str, ...]:
+    """ Strips compiler name, outputs and the source file from the command
+    and makes path arguments absolute.
+    """
+    args = []
+    it = iter(argv[1:])
+
+    for arg in it:
+        if arg in _DROPPED_FLAGS:
+            continue
+        if arg in _DROPPED_VALUE_FLAGS:
+            next(it, None)
+            continue
+        if arg.startswith("-o") and len(arg) > 2:
+            continue
+        if not arg.startswith("-") and _absolute(directory, arg) == source:
+            continue
+
+        if arg in _PATH_FLAGS:
+            args += [arg, _absolute(directory, next(it, ""))]
+            continue
+
+        joined = next((flag for flag in _JOINED_PATH_FLAGS if arg.startswith(flag)), None)
+        if joined:
+            args.append(joined + _absolute(directory, arg[len(joined):]))
+        else:
+            args.append(arg)
+
+    return tuple(args)
+
+def load_compile_commands(db_path: str) -> list[CompileCommand]:
+    """ Reads a JSON compilation database.
+    Returns: Compile commands with absolute source paths and arguments
+    ready to be passed to libclang.
+    """
+    with open(db_path, encoding="utf-8") as f:
+        entries = json.load(f)
+
+    commands = []
+    seen     = set()
+
+    for entry in entries:
+        directory = entry.get("directory", os.path.dirname(os.path.abspath(db_path)))
+        source    = _absolute(directory, entry["file"])
+
+        argv = entry.get("arguments")
+        if argv is None:
+            argv = shlex.split(entry["command"], posix=os.name != "nt")
+
+        command = CompileCommand(source, _clean_args(argv, directory, source))
+
+        # Same TU can be listed for several configurations with equal flags
+        if command not in seen:
+            seen.add(command)
+            commands.append(command)
+
+    return commands
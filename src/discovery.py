@@ -0,0 +1,229 @@
+import os
+import re
+from typing import NamedTuple, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class IgnoreRule(NamedTuple):
+    base     : str
+    regex    : re.Pattern
+    negate   : bool
+    dir_only : bool
+
+def _translate(pattern: str) -> str:
+    """ Translates a gitignore glob into a regular expression.
+    """
+    i, res = 0, []
+
+    while i < len(pattern):
+        c = pattern[i]
+
+        if c == "*":
+            if pattern.startswith("**/", i):
+                res.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                res.append(".*")
+                i += 2
+                continue
+            res.append("[^/]*")
+        elif c == "?":
+            res.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                res.append(re.escape(c))
+            else:
+                content = pattern[i+1:end].replace("\\", "\\\\")
+                if content[0] == "!":
+                    content = "^" + content[1:]
+                res.append(f"[{content}]")
+                i = end
+        elif c == "\\" and i + 1 < len(pattern):
+            i += 1
+            res.append(re.escape(pattern[i]))
+        else:
+            res.append(re.escape(c))
+
+        i += 1
+
+    return "".join(res)
+
+def parse_ignore_rules(lines: list[str], base: str = "") -> list[IgnoreRule]:
+    """ Parses lines in gitignore format. Patterns are matched against paths
+    relative to base, which is a "/"-terminated prefix or empty.
+    """
+    rules = []
+
+    for line in lines:
+        line = line.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            continue
+
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+
+        if not line:
+            continue
+
+        if "/" in line:
+            # Patterns with a separator are relative to the ignore file
+            regex = _translate(line.lstrip("/"))
+        else:
+            regex = "(?:.*/)?" + _translate(line)
+
+        rules.append(IgnoreRule(base, re.compile(regex), negate, dir_only))
+
+    return rules
+
+def is_ignored(rules: Tuple[IgnoreRule, ...], path: str, is_dir: bool) -> bool:
+    """ Checks a "/"-separated path against rules, last matching rule wins.
+    """
+    for rule in reversed(rules):
+        if rule.dir_only and not is_dir:
+            continue
+        if not path.startswith(rule.base):
+            continue
+        if rule.regex.fullmatch(path, len(rule.base)):
+            return not rule.negate
+    return False
+
+class ProjectFileFinder:
+    """ Finds project files with a parallel os.scandir walk. Directories matched by
+    .gitignore files or user excludes are pruned before they're entered.
+    """
+
+    IGNORE_FILE      = ".gitignore"
+    DEFAULT_EXCLUDES = [".git/"]
+
+    def __init__(self,
+                extensions: list[str],
+                excludes: list[str] = None,
+                use_gitignore: bool = True,
+                workers: int = 8) -> None:
+        """ extensions - file extensions to look for, file type is the
+        index of its extension in this list.
+        excludes - gitignore style patterns relative to the start directory.
+        They can't be overridden by negations in .gitignore files.
+        """
+        self.extension_index = {ext: i for i, ext in enumerate(extensions)}
+        self.excludes        = parse_ignore_rules(self.DEFAULT_EXCLUDES + (excludes or []))
+        self.use_gitignore   = use_gitignore
+        self.workers         = max(1, workers)
+
+    def file_type(self, filename: str) -> int:
+        return self.extension_index.get(os.path.splitext(filename)[1], -1)
+
+    def __read_ignore_file(self, directory: str, rel_dir: str) -> list[IgnoreRule]:
+        try:
+            with open(os.path.join(directory, self.IGNORE_FILE), encoding="utf-8", errors="replace") as f:
+                return parse_ignore_rules(f.readlines(), rel_dir)
+        except OSError:
+            return []
+
+    def __scan_dir(self, directory: str, rel_dir: str, rules: Tuple[IgnoreRule, ...]):
+        """ Lists a single directory.
+        Returns: Found project files and subdirectories that weren't ignored.
+        """
+        if self.use_gitignore:
+            rules = rules + tuple(self.__read_ignore_file(directory, rel_dir))
+
+        files, subdirs = [], []
+
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return files, subdirs
+
+        for entry in entries:
+            rel_path = rel_dir + entry.name
+
+            try:
+                # Symlinked directories aren't followed, same as in os.walk
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+
+            if is_ignored(self.excludes, rel_path, is_dir) or is_ignored(rules, rel_path, is_dir):
+                continue
+
+            if is_dir:
+                subdirs.append((os.path.join(directory, entry.name), rel_path + "/", rules))
+            else:
+                file_type = self.file_type(entry.name)
+                if file_type != -1:
+                    files.append((os.path.join(directory, entry.name), file_type))
+
+        return files, subdirs
+
+    def __rules_above(self, start_dir: str, root_dir: str):
+        """ Collects ignore rules that apply to start_dir from root_dir and
+        the directories between them.
+        Returns: (path of start_dir relative to root_dir, rules) or None if
+        start_dir is ignored.
+        """
+        rel = os.path.relpath(start_dir, root_dir).replace(os.sep, "/")
+        if rel == ".":
+            return "", ()
+
+        directory, rel_dir, rules = root_dir, "", ()
+
+        for name in rel.split("/"):
+            if self.use_gitignore:
+                rules = rules + tuple(self.__read_ignore_file(directory, rel_dir))
+
+            rel_path = rel_dir + name
+            if is_ignored(self.excludes, rel_path, True) or is_ignored(rules, rel_path, True):
+                return None
+
+            directory, rel_dir = os.path.join(directory, name), rel_path + "/"
+
+        return rel_dir, rules
+
+    def __walk(self, start_dir: str, root_dir: str = None) -> Tuple[list[Tuple[str, int]], list[str]]:
+        """ Returns: Project files and directories that weren't ignored,
+        start_dir included.
+        """
+        project_files, directories = [], []
+
+        above = self.__rules_above(start_dir, root_dir) if root_dir else ("", ())
+        if above is None:
+            return project_files, directories
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {pool.submit(self.__scan_dir, start_dir, *above)}
+            directories.append(start_dir)
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    files, subdirs = future.result()
+                    project_files.extend(files)
+
+                    for subdir in subdirs:
+                        directories.append(subdir[0])
+                        pending.add(pool.submit(self.__scan_dir, *subdir))
+
+        return project_files, directories
+
+    def find(self, start_dir: str, root_dir: str = None) -> list[Tuple[str, int]]:
+        """ root_dir - directory whose .gitignore files and excludes apply
+        to start_dir and above it, start_dir by default.
+        Returns: Sorted list of (file path, file type) pairs.
+        """
+        project_files, _ = self.__walk(start_dir, root_dir)
+        project_files.sort()
+        return project_files
+
+    def find_dirs(self, start_dir: str, root_dir: str = None) -> list[str]:
+        """ root_dir - same as in find().
+        Returns: start_dir and its subdirectories that aren't ignored,
+        in no particular order.
+        """
+        _, directories = self.__walk(start_dir, root_dir)
+        return directories
@@ -0,0 +1,18 @@
+# Number of set bits of every byte value, for bytes.translate()
+POPCOUNT_TABLE = bytes(bin(byte).count("1") for byte in range(256))
+
+def bit_indices(bits: int) -> list[int]:
+    """ Returns: positions of set bits in ascending order.
+    """
+    digits = bin(bits)[:1:-1]
+    result = []
+    index  = digits.find("1")
+    while index != -1:
+        result.append(index)
+        index = digits.find("1", index + 1)
+    return result
+
+def popcount(data: bytes) -> int:
+    """ Returns: number of set bits in the byte string.
+    """
+    return sum(data.translate(POPCOUNT_TABLE))
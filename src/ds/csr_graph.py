@@ -0,0 +1,167 @@
+from array import array
+from collections import Counter
+from typing import Iterable, Mapping, Tuple, Union
+from src.ds.graph import Graph, DirectedGraph
+from src.ds.path_table import PathTable
+
+def _zeros(length: int) -> array:
+    return array("i", bytes(4 * length))
+
+def _compress(num_vertices: int, sources: array, targets: array) -> Tuple[array, array, array, array]:
+    """ Counting sort of an edge list, given as parallel arrays of edge
+    sources and targets, into out- and in-edge CSR arrays.
+    Returns: out offsets, out targets, in offsets, in targets.
+    """
+    out_offsets = _zeros(num_vertices + 1)
+    in_offsets  = _zeros(num_vertices + 1)
+
+    for u, v in zip(sources, targets):
+        out_offsets[u + 1] += 1
+        in_offsets[v + 1]  += 1
+
+    for vtx in range(num_vertices):
+        out_offsets[vtx + 1] += out_offsets[vtx]
+        in_offsets[vtx + 1]  += in_offsets[vtx]
+
+    out_targets = _zeros(len(targets))
+    in_targets  = _zeros(len(targets))
+    out_pos     = out_offsets[:-1]
+    in_pos      = in_offsets[:-1]
+
+    for u, v in zip(sources, targets):
+        out_targets[out_pos[u]] = v
+        out_pos[u] += 1
+        in_targets[in_pos[v]] = u
+        in_pos[v] += 1
+
+    return out_offsets, out_targets, in_offsets, in_targets
+
+class CSRDirectedGraph(Graph):
+    """ Frozen directed graph with out- and in-edges stored as compressed sparse
+    rows in flat int arrays. Vertices and edges can't be added, but it exposes
+    the read interface of DirectedGraph, so Layering and World work with it.
+    """
+
+    @property
+    def reversed_edges(self) -> list[Tuple[int, int]]:
+        return self.__reversed_edges
+
+    def __init__(self,
+                names: list[str],
+                out_offsets: array, out_targets: array,
+                in_offsets: array, in_targets: array,
+                reversed_edges: list[Tuple[int, int]] = None) -> None:
+        super().__init__()
+
+        self._names = PathTable(names)
+
+        self._out_offsets, self._out_targets = out_offsets, out_targets
+        self._in_offsets , self._in_targets  = in_offsets, in_targets
+
+        self.__reversed_edges: list[Tuple[int, int]] = reversed_edges or []
+
+    @classmethod
+    def from_edges(cls,
+                names: list[str],
+                sources: array, targets: array,
+                reversed_edges: list[Tuple[int, int]] = None) -> "CSRDirectedGraph":
+        """ Builds the graph from edges (sources[i], targets[i]).
+        """
+        return cls(names, *_compress(len(names), sources, targets), reversed_edges)
+
+    @classmethod
+    def from_graph(cls, graph: DirectedGraph) -> "CSRDirectedGraph":
+        """ Freezes the current state of a mutable graph, including
+        edges reversed by remove_cycle_and_sort().
+        """
+        names   = [graph.get_vertex_name(vtx) for vtx in range(len(graph))]
+        sources = array("i")
+        targets = array("i")
+
+        for u in range(len(graph)):
+            neighbors = graph.get_neighbors_out(u)
+            sources.extend([u] * len(neighbors))
+            targets.extend(neighbors)
+
+        return cls.from_edges(names, sources, targets, graph.reversed_edges.copy())
+
+    @classmethod
+    def from_dependency_map(cls, dep_map: Mapping[str, Iterable[str]]) -> "CSRDirectedGraph":
+        """ Builds the graph straight from scanner output. Edge (u,v) means u was
+        included by v. Repeated and self includes are dropped.
+        """
+        name2node: dict[str, int] = {}
+        sources = array("i")
+        targets = array("i")
+
+        for source_file, includes in dep_map.items():
+            source = name2node.setdefault(source_file, len(name2node))
+            # Every source is listed once, so deduplicating its own
+            # includes is enough to keep edges unique.
+            for included_file in dict.fromkeys(includes):
+                included = name2node.setdefault(included_file, len(name2node))
+                if included != source:
+                    sources.append(included)
+                    targets.append(source)
+
+        return cls.from_edges(list(name2node), sources, targets)
+
+    def __str__(self) -> str:
+        return ("{\n" +
+            "\n".join(
+                [f'"{name}"' + ": [" + ",".join(
+                    [str(edge) for edge in self.get_neighbors_out(node_id)]
+                    ) + "]" for node_id,name in enumerate(self._names)]
+                )
+            +
+        "\n}")
+
+    def __getitem__(self, vertex: int) -> array:
+        return self.get_neighbors_out(vertex)
+
+    def add_vertex(self, name: str):
+        raise TypeError("CSRDirectedGraph is frozen")
+
+    def add_edge(self, id_u: Union[int, str], id_v: Union[int, str]):
+        raise TypeError("CSRDirectedGraph is frozen")
+
+    def get_neighbors_out(self, vertex: int) -> array:
+        return self._out_targets[self._out_offsets[vertex]:self._out_offsets[vertex + 1]]
+
+    def get_neighbors_in(self, vertex: int) -> array:
+        return self._in_targets[self._in_offsets[vertex]:self._in_offsets[vertex + 1]]
+
+    def out_degree(self, vertex: int) -> int:
+        return self._out_offsets[vertex + 1] - self._out_offsets[vertex]
+
+    def in_degree(self, vertex: int) -> int:
+        return self._in_offsets[vertex + 1] - self._in_offsets[vertex]
+
+    def edge_count(self) -> int:
+        return len(self._out_targets)
+
+    def undo_reversed_edges(self) -> None:
+        """ Rebuilds the arrays with reversed edges turned back
+        to their initial direction.
+        """
+        if not self.__reversed_edges:
+            return
+
+        # Currently stored (v,u) is the original edge (u,v). With a 2-cycle
+        # (v,u) is stored more than once, only one copy per reversal is turned back.
+        flipped = Counter((v, u) for u, v in self.__reversed_edges)
+        sources = array("i")
+        targets = array("i")
+
+        for u in range(len(self)):
+            for v in self.get_neighbors_out(u):
+                is_flipped = flipped[(u, v)] > 0
+                if is_flipped:
+                    flipped[(u, v)] -= 1
+                sources.append(v if is_flipped else u)
+                targets.append(u if is_flipped else v)
+
+        (self._out_offsets, self._out_targets,
+         self._in_offsets, self._in_targets) = _compress(len(self), sources, targets)
+
+        self.__reversed_edges.clear()
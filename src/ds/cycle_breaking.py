@@ -0,0 +1,444 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from typing import Tuple
+from src.ds.scc import Condensation, InducedSubgraph
+
+class CycleBreaking(Enum):
+    GREEDY_FAS  = "greedy-fas"
+    MINIMUM_FAS = "minimum-fas"
+    QUEUE       = "queue"
+
+class CycleBreaker(ABC):
+    """ Strategy that makes a graph acyclic. It only reads the graph, edges
+    are reversed by the caller, see DirectedGraph.remove_cycle_and_sort().
+    """
+
+    @abstractmethod
+    def break_cycles(self, graph) -> Tuple[list[int], list[Tuple[int, int]]]:
+        """ Returns: topological order of the graph with the returned
+        edges (u,v) reversed into (v,u).
+        """
+        raise NotImplementedError()
+
+class QueueHeuristicBreaker(CycleBreaker):
+    """ Kahn's sort that, once it runs out of sources, picks a vertex that was
+    reached by some edge and reverses all of its unvisited in-edges.
+    It doesn't bound the number of reversed edges. Graph without
+    any source vertex is reported with an empty order.
+    """
+
+    def break_cycles(self, graph) -> Tuple[list[int], list[Tuple[int, int]]]:
+        if len(graph) == 0:
+            return [], []
+
+        V         = range(len(graph))
+        out_nodes = [list(graph.get_neighbors_out(vtx)) for vtx in V]
+        in_nodes  = [list(graph.get_neighbors_in(vtx)) for vtx in V]
+
+        source_vts = deque()
+        temp_vts   = deque()
+        is_done    = [False] * len(graph)
+        indeg      = [len(in_nodes[vtx])  for vtx in V]
+        outdeg     = [len(out_nodes[vtx]) for vtx in V]
+
+        source_vts.extend(vtx for vtx in V if indeg[vtx] == 0)
+
+        if not source_vts:
+            # no source vertices were found, hence
+            # the graph is a complete cycle (ring)
+            return [], []
+
+        topological_order = []
+        reversed_edges    = []
+
+        while source_vts or temp_vts:
+
+            while source_vts:
+
+                source_vertex = source_vts.popleft()
+
+                if not is_done[source_vertex]:
+                    topological_order.append(source_vertex)
+
+                is_done[source_vertex] = True
+
+                for vx_out in out_nodes[source_vertex]:
+                    indeg[vx_out] -= 1
+                    if indeg[vx_out] == 0:
+                        source_vts.append(vx_out)
+                    else:
+                        temp_vts.append(vx_out)
+
+            temp_vtx = -1
+            while temp_vts:
+                temp_vtx = temp_vts.popleft()
+                if not is_done[temp_vtx] and outdeg[temp_vtx] > 0:
+                    break
+
+            if temp_vtx >= 0 and not is_done[temp_vtx] and outdeg[temp_vtx] > 0:
+
+                for vx_out in sorted(set(in_nodes[temp_vtx])):
+                    if not is_done[vx_out] and vx_out != temp_vtx:
+                        # (vx_out, temp_vtx) becomes (temp_vtx, vx_out)
+                        out_nodes[vx_out].remove(temp_vtx)
+                        in_nodes[temp_vtx].remove(vx_out)
+                        out_nodes[temp_vtx].append(vx_out)
+                        in_nodes[vx_out].append(temp_vtx)
+
+                        reversed_edges.append((vx_out, temp_vtx))
+                        indeg[vx_out] += 1
+
+                source_vts.append(temp_vtx)
+
+        return topological_order, reversed_edges
+
+class EadesLinSmythBreaker(CycleBreaker):
+    """ Greedy feedback arc set of Eades, Lin and Smyth in O(V+E). Sinks are
+    peeled to the back of the order and sources to the front, otherwise the
+    vertex with the largest out-degree minus in-degree goes to the front.
+    Edges pointing backwards in the order are reversed, at most
+    E/2 - V/6 of them. Self loops are left as they are.
+    """
+
+    def break_cycles(self, graph) -> Tuple[list[int], list[Tuple[int, int]]]:
+        n = len(graph)
+        V = range(n)
+
+        out_nodes = [graph.get_neighbors_out(vtx) for vtx in V]
+        in_nodes  = [graph.get_neighbors_in(vtx) for vtx in V]
+
+        outdeg = [len(out_nodes[vtx]) - out_nodes[vtx].count(vtx) for vtx in V]
+        indeg  = [len(in_nodes[vtx])  - in_nodes[vtx].count(vtx)  for vtx in V]
+
+        is_removed = [False] * n
+        is_queued  = [False] * n
+
+        # Vertices that aren't sources nor sinks are kept in doubly linked
+        # lists, bucketed by out-degree - in-degree (offset by n)
+        bucket_head = [-1] * (2 * n + 1)
+        bucket_of   = [-1] * n
+        next_vtx    = [-1] * n
+        prev_vtx    = [-1] * n
+        max_bucket  = -1
+
+        sinks   = []
+        sources = deque()
+
+        def unlink(vtx: int) -> None:
+            bucket = bucket_of[vtx]
+            if prev_vtx[vtx] != -1:
+                next_vtx[prev_vtx[vtx]] = next_vtx[vtx]
+            else:
+                bucket_head[bucket] = next_vtx[vtx]
+            if next_vtx[vtx] != -1:
+                prev_vtx[next_vtx[vtx]] = prev_vtx[vtx]
+            bucket_of[vtx] = -1
+
+        def classify(vtx: int) -> None:
+            nonlocal max_bucket
+
+            if is_queued[vtx]:
+                # Sinks stay sinks and sources stay sources
+                return
+            if bucket_of[vtx] != -1:
+                unlink(vtx)
+
+            if outdeg[vtx] == 0:
+                is_queued[vtx] = True
+                sinks.append(vtx)
+            elif indeg[vtx] == 0:
+                is_queued[vtx] = True
+                sources.append(vtx)
+            else:
+                bucket = outdeg[vtx] - indeg[vtx] + n
+                bucket_of[vtx] = bucket
+                prev_vtx[vtx]  = -1
+                next_vtx[vtx]  = bucket_head[bucket]
+                if next_vtx[vtx] != -1:
+                    prev_vtx[next_vtx[vtx]] = vtx
+                bucket_head[bucket] = vtx
+                max_bucket = max(max_bucket, bucket)
+
+        def remove(vtx: int) -> None:
+            is_removed[vtx] = True
+
+            for u in in_nodes[vtx]:
+                if not is_removed[u] and u != vtx:
+                    outdeg[u] -= 1
+                    classify(u)
+
+            for v in out_nodes[vtx]:
+                if not is_removed[v] and v != vtx:
+                    indeg[v] -= 1
+                    classify(v)
+
+        for vtx in V:
+            classify(vtx)
+
+        front, back = [], []
+
+        while len(front) + len(back) < n:
+
+            while sinks or sources:
+                while sinks:
+                    vtx = sinks.pop()
+                    if not is_removed[vtx]:
+                        back.append(vtx)
+                        remove(vtx)
+
+                while sources and not sinks:
+                    vtx = sources.popleft()
+                    if not is_removed[vtx]:
+                        front.append(vtx)
+                        remove(vtx)
+
+            while max_bucket >= 0 and bucket_head[max_bucket] == -1:
+                max_bucket -= 1
+
+            if max_bucket < 0:
+                break
+
+            vtx = bucket_head[max_bucket]
+            unlink(vtx)
+            front.append(vtx)
+            remove(vtx)
+
+        topological_order = front + back[::-1]
+        return topological_order, backward_edges(graph, topological_order)
+
+class ComponentBreaker(CycleBreaker):
+    """ Runs another breaker only inside strongly connected components with
+    more than one vertex. The rest of the order comes straight from the
+    condensation, since edges between components can't be in a cycle.
+    """
+
+    def __init__(self, component_breaker: CycleBreaker) -> None:
+        self.component_breaker = component_breaker
+
+    def break_cycles(self, graph) -> Tuple[list[int], list[Tuple[int, int]]]:
+        condensation = Condensation(graph)
+
+        topological_order = []
+        reversed_edges    = []
+
+        for comp, members in enumerate(condensation.components):
+            if condensation.is_trivial(comp):
+                topological_order.append(members[0])
+                continue
+
+            local_order, local_reversed = self.component_breaker.break_cycles(condensation.subgraph(comp))
+
+            topological_order.extend(members[vtx] for vtx in local_order)
+            reversed_edges.extend((members[u], members[v]) for u, v in local_reversed)
+
+        return topological_order, reversed_edges
+
+def backward_edges(graph, order: list[int]) -> list[Tuple[int, int]]:
+    """ Returns: edges that point backwards in the order, reversing
+    them makes the order topological.
+    """
+    position = [0] * len(graph)
+    for i, vtx in enumerate(order):
+        position[vtx] = i
+
+    return [
+        (u, v)
+        for u in order
+        for v in graph.get_neighbors_out(u)
+        if position[v] < position[u]
+    ]
+
+def _exact_order(graph, deadline: float) -> list[int]:
+    """ Minimum feedback arc set through dynamic programming over vertex
+    subsets in O(2^n * n). best[S] is the fewest backward edges among
+    orders that start with the vertices of S, placing v right after S
+    costs the number of edges from v into S. Parallel edges count once
+    each, same as in the other breakers.
+    Returns: optimal order or None if deadline was reached.
+    """
+    n = len(graph)
+
+    multiplicity: list[dict[int, int]] = [{} for _ in range(n)]
+    num_edges = 0
+    for u in range(n):
+        for v in graph.get_neighbors_out(u):
+            if v != u:
+                multiplicity[u][v] = multiplicity[u].get(v, 0) + 1
+                num_edges += 1
+
+    # Bit k of every multiplicity, out_masks[k][u] has bit v set when it's
+    # set for u -> v. Edges into S are counted with one popcount per bit.
+    out_masks: list[list[int]] = []
+    for u in range(n):
+        for v, count in multiplicity[u].items():
+            for k in range(count.bit_length()):
+                if count >> k & 1:
+                    while len(out_masks) <= k:
+                        out_masks.append([0] * n)
+                    out_masks[k][u] |= 1 << v
+
+    out_mask   = out_masks[0] if out_masks else [0] * n
+    high_masks = list(enumerate(out_masks))[1:]
+
+    full = (1 << n) - 1
+    best = [num_edges + 1] * (full + 1)
+    last = [-1] * (full + 1)
+    best[0] = 0
+
+    for subset in range(full):
+        if subset & 0x3ff == 0 and time.perf_counter() > deadline:
+            return None
+
+        cost = best[subset]
+        for v in range(n):
+            bit = 1 << v
+            if subset & bit:
+                continue
+            new_cost = cost + bin(out_mask[v] & subset).count("1")
+            for k, masks in high_masks:
+                new_cost += bin(masks[v] & subset).count("1") << k
+            if new_cost < best[subset | bit]:
+                best[subset | bit] = new_cost
+                last[subset | bit] = v
+
+    order  = []
+    subset = full
+    while subset:
+        order.append(last[subset])
+        subset ^= 1 << last[subset]
+
+    return order[::-1]
+
+def _improve_order(graph, order: list[int], deadline: float) -> list[int]:
+    """ Local search that moves single vertices to the position with the
+    fewest backward edges, as long as that helps and time allows.
+    """
+    n        = len(graph)
+    order    = list(order)
+    position = [0] * n
+    for i, vtx in enumerate(order):
+        position[vtx] = i
+
+    is_improved = True
+    while is_improved and time.perf_counter() < deadline:
+        is_improved = False
+
+        for vtx in range(n):
+            if time.perf_counter() > deadline:
+                break
+
+            old_pos = position[vtx]
+
+            # Positions are taken in the order without vtx, inserting at k
+            # puts vtx in front of the vertex currently at k. Edges into vtx
+            # from vertices at k or later are backwards, same as edges out
+            # of vtx into vertices before k.
+            events = []
+            for u in graph.get_neighbors_in(vtx):
+                if u != vtx:
+                    events.append((position[u] - (position[u] > old_pos), -1))
+            for v in graph.get_neighbors_out(vtx):
+                if v != vtx:
+                    events.append((position[v] - (position[v] > old_pos), 1))
+            events.sort()
+
+            cost    = sum(1 for _, delta in events if delta == -1)
+            best    = cost
+            best_k  = 0
+            current = cost
+            for i, (pos, delta) in enumerate(events):
+                current += delta
+                # Cost of inserting right after pos, once all events there are applied
+                if (i + 1 == len(events) or events[i + 1][0] != pos) and current < best:
+                    best, best_k = current, pos + 1
+
+            old_cost = sum(1 for pos, delta in events if (delta == -1) == (pos >= old_pos))
+            if best >= old_cost:
+                continue
+
+            order.pop(old_pos)
+            order.insert(best_k, vtx)
+            for i in range(min(old_pos, best_k), max(old_pos, best_k) + 1):
+                position[order[i]] = i
+
+            is_improved = True
+
+    return order
+
+def _solve_component(subgraph: InducedSubgraph, exact_limit: int, time_budget: float) -> list[int]:
+    """ Returns: order of the component vertices with few backward edges,
+    the fewest possible for components of up to exact_limit vertices.
+    """
+    deadline = time.perf_counter() + time_budget
+
+    if len(subgraph) <= exact_limit:
+        order = _exact_order(subgraph, deadline)
+        if order is not None:
+            return order
+
+    order, _ = EadesLinSmythBreaker().break_cycles(subgraph)
+    return _improve_order(subgraph, order, deadline)
+
+class MinimumFASBreaker(CycleBreaker):
+    """ Solves every strongly connected component on its own. Components of
+    up to exact_limit vertices get a minimum feedback arc set, larger ones
+    start from the greedy order and are improved by local search. Each
+    component gets time_budget seconds, components are spread over a
+    process pool once there's enough work.
+    """
+
+    # Fewer cyclic vertices than this are solved in this process
+    PARALLEL_MIN_VERTICES = 200
+
+    def __init__(self, exact_limit: int = 14, time_budget: float = 2.0, workers: int = None) -> None:
+        self.exact_limit = exact_limit
+        self.time_budget = time_budget
+        self.workers     = workers or os.cpu_count() or 1
+
+    def break_cycles(self, graph) -> Tuple[list[int], list[Tuple[int, int]]]:
+        condensation = Condensation(graph)
+
+        cyclic    = condensation.cyclic_components()
+        subgraphs = [condensation.subgraph(comp) for comp in cyclic]
+        orders    = self.__solve_all(subgraphs)
+
+        local_orders = dict(zip(cyclic, orders))
+
+        topological_order = []
+        reversed_edges    = []
+
+        for comp, members in enumerate(condensation.components):
+            if comp not in local_orders:
+                topological_order.append(members[0])
+                continue
+
+            local_order = local_orders[comp]
+            topological_order.extend(members[vtx] for vtx in local_order)
+            reversed_edges.extend(
+                (members[u], members[v])
+                for u, v in backward_edges(condensation.subgraph(comp), local_order)
+            )
+
+        return topological_order, reversed_edges
+
+    def __solve_all(self, subgraphs: list[InducedSubgraph]) -> list[list[int]]:
+        args = ([self.exact_limit] * len(subgraphs), [self.time_budget] * len(subgraphs))
+
+        cyclic_vertices = sum(len(subgraph) for subgraph in subgraphs)
+        if self.workers == 1 or len(subgraphs) < 2 or cyclic_vertices < self.PARALLEL_MIN_VERTICES:
+            return list(map(_solve_component, subgraphs, *args))
+
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(subgraphs))) as pool:
+            return list(pool.map(_solve_component, subgraphs, *args))
+
+def create_cycle_breaker(kind: CycleBreaking) -> CycleBreaker:
+    if kind == CycleBreaking.MINIMUM_FAS:
+        return MinimumFASBreaker()
+    if kind == CycleBreaking.QUEUE:
+        # Runs on the whole graph, a component has no source vertex to start from
+        return QueueHeuristicBreaker()
+    return ComponentBreaker(EadesLinSmythBreaker())
@@ -0,0 +1,157 @@
+from typing import Tuple
+
+class DynamicTopologicalOrder:
+    """ Keeps a topological order of a graph while its edges change, using the
+    algorithm of Pearce and Kelly. Inserting an edge against the order only
+    reorders vertices between its endpoints. An inserted edge that closes a
+    cycle is reversed instead, removing an edge tries to turn previously
+    reversed edges around it back.
+    Graph is kept in its original state, reversed edges are only recorded.
+    """
+
+    def __init__(self, graph, order: list[int] = None, reversed_edges: list[Tuple[int, int]] = None) -> None:
+        """ graph - graph in its initial state.
+        order, reversed_edges - result of remove_cycle_and_sort() on the graph. They're
+        computed with graph's cycle_breaker if not given or if the order is incomplete.
+        """
+        self.graph = graph
+
+        if order is None or len(order) != len(graph):
+            order, reversed_edges = graph.cycle_breaker.break_cycles(graph)
+
+        self.__order    = list(order)
+        self.__position = [0] * len(order)
+        for i, vtx in enumerate(self.__order):
+            self.__position[vtx] = i
+
+        # Original edges (u,v) that are treated as (v,u)
+        self.__reversed: set[Tuple[int, int]]  = set()
+        # vertex -> vertices it has a reversed edge into / from
+        self.__flipped_out: dict[int, set[int]] = {}
+        self.__flipped_in : dict[int, set[int]] = {}
+
+        for u, v in reversed_edges or []:
+            self.__flip(u, v)
+
+    @property
+    def reversed_edges(self) -> list[Tuple[int, int]]:
+        return sorted(self.__reversed)
+
+    def topological_order(self) -> list[int]:
+        return list(self.__order)
+
+    def position(self, vertex: int) -> int:
+        return self.__position[vertex]
+
+    def __flip(self, u: int, v: int) -> None:
+        self.__reversed.add((u, v))
+        self.__flipped_out.setdefault(v, set()).add(u)
+        self.__flipped_in.setdefault(u, set()).add(v)
+
+    def __unflip(self, u: int, v: int) -> None:
+        self.__reversed.discard((u, v))
+        self.__flipped_out[v].discard(u)
+        self.__flipped_in[u].discard(v)
+
+    def __neighbors_out(self, vertex: int) -> list[int]:
+        """ Out-neighbours with reversed edges taken into account.
+        """
+        neighbors = [v for v in self.graph.get_neighbors_out(vertex) if (vertex, v) not in self.__reversed]
+        neighbors.extend(self.__flipped_out.get(vertex, ()))
+        return neighbors
+
+    def __neighbors_in(self, vertex: int) -> list[int]:
+        neighbors = [u for u in self.graph.get_neighbors_in(vertex) if (u, vertex) not in self.__reversed]
+        neighbors.extend(self.__flipped_in.get(vertex, ()))
+        return neighbors
+
+    def __sync_vertices(self) -> None:
+        """ Vertices added to the graph since the last
+        change go to the end of the order.
+        """
+        for vtx in range(len(self.__position), len(self.graph)):
+            self.__position.append(len(self.__order))
+            self.__order.append(vtx)
+
+    def __insert(self, u: int, v: int) -> bool:
+        """ Restores the order after edge (u,v) was added.
+        Returns: False if the edge closes a cycle, order isn't changed then.
+        """
+        position = self.__position
+        lower, upper = position[v], position[u]
+
+        if upper < lower or u == v:
+            return True
+
+        # Vertices reachable from v that are not behind u
+        forward, stack = {v}, [v]
+        while stack:
+            for vx_out in self.__neighbors_out(stack.pop()):
+                if vx_out == u:
+                    return False
+                if vx_out not in forward and position[vx_out] < upper:
+                    forward.add(vx_out)
+                    stack.append(vx_out)
+
+        # Vertices that reach u and are not in front of v
+        backward, stack = {u}, [u]
+        while stack:
+            for vx_in in self.__neighbors_in(stack.pop()):
+                if vx_in not in backward and position[vx_in] > lower:
+                    backward.add(vx_in)
+                    stack.append(vx_in)
+
+        # Everything that reaches u goes in front of everything v reaches,
+        # the affected vertices reuse their own positions
+        moved     = sorted(backward, key=position.__getitem__) + sorted(forward, key=position.__getitem__)
+        positions = sorted(position[vtx] for vtx in moved)
+
+        for vtx, pos in zip(moved, positions):
+            position[vtx]    = pos
+            self.__order[pos] = vtx
+
+        return True
+
+    def add_edge(self, u: int, v: int) -> None:
+        """ Adds edge (u,v) to the graph and updates the order. If the edge
+        closes a cycle it's recorded as reversed.
+        """
+        self.graph.add_edge(u, v)
+        self.__sync_vertices()
+
+        if not self.__insert(u, v):
+            self.__flip(u, v)
+
+    def remove_edge(self, u: int, v: int) -> None:
+        """ Removes edge (u,v) from the graph. Reversed edges whose cycle
+        could have gone through it are inserted back when possible.
+        """
+        self.graph.remove_edge(u, v)
+
+        if (u, v) in self.__reversed:
+            self.__unflip(u, v)
+            u, v = v, u
+
+        position = self.__position
+        # Path v' ~> u' that made (u',v') reversed could only use (u,v)
+        # if both endpoints lie between v' and u' in the order
+        candidates = sorted(
+            (x, y) for x, y in self.__reversed
+            if position[y] <= position[u] and position[v] <= position[x]
+        )
+
+        for x, y in candidates:
+            self.__unflip(x, y)
+            if not self.__insert(x, y):
+                self.__flip(x, y)
+
+    def update_dependencies(self, source_file: str, includes: list[str]) -> bool:
+        """ Same as DirectedGraph.update_dependencies(), with the order updated.
+        Returns: True if any edge was added or removed.
+        """
+        is_changed = self.graph.update_dependencies(source_file, includes, self)
+
+        # New files without edges still need a place in the order
+        self.__sync_vertices()
+
+        return is_changed
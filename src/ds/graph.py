@@ -1,12 +1,18 @@
-from typing import Tuple, Union
+from typing import Iterable, Mapping, Tuple, Union
 from abc import ABC, abstractmethod
-from queue import Queue
+from src.ds.bits import bit_indices, popcount
+from src.ds.path_table import PathTable
+from src.ds.cycle_breaking import CycleBreaker, CycleBreaking, create_cycle_breaker
+from src.ds.scc import Condensation, strongly_connected_components
+from src.ds.dynamic_topo import DynamicTopologicalOrder
+from src.ds.reachability import ReachabilityIndex
+from src.ds.overlay import FlippedEdgesView
 
 class Graph(ABC):
 
     def __init__(self) -> None:
-        self._name2node = {}
-        self._node2name = []
+        # Names are interned by directory, see PathTable
+        self._names     = PathTable()
         self._adj_nodes = []
 
     @abstractmethod
@@ -21,16 +27,30 @@ class Graph(ABC):
         """ Returns an index of the specified vertex name.
         If the vertex doesn't exist, -1 is returned.
         """
-        return self._name2node.get(vertex_name, -1)
+        return self._names.get_id(vertex_name)
         
     def get_vertex_name(self, vertex:int) -> str:
-        return self._node2name[vertex]
+        return self._names[vertex]
+
+    def get_vertex_dir(self, vertex:int) -> str:
+        """ Returns: directory of the vertex with the trailing "/".
+        """
+        return self._names.dirname(vertex)
+
+    def get_vertex_basename(self, vertex:int) -> str:
+        return self._names.basename(vertex)
+
+    def get_vertices_under(self, directory: str) -> list[int]:
+        """ Returns: sorted ids of vertices inside the directory,
+        subdirectories included.
+        """
+        return self._names.under(directory)
     
     def __repr__(self) -> str:
         return self.__str__()
 
     def __len__(self) -> int:
-        return len(self._node2name)
+        return len(self._names)
 
     def __getitem__(self, vertex: int) -> list[int]:
         return self._adj_nodes[vertex]
@@ -49,106 +69,177 @@ class Graph(ABC):
         """ Adds new vertex to the graph
         and returns its index.
         """
-        if name in self._name2node:
+        if self._names.get_id(name) != -1:
             raise RuntimeError(f"Vertex {name} already exists")
 
-        self._name2node[name] = len(self)
-        self._node2name.append(name)
-        
-        return self._name2node.get(name)
+        return self._names.intern(name)
 
 class GraphMatrix(Graph):
+    """ Adjacency matrix packed into bits of a bytearray, row u has bit v set
+    for edge (u,v). Transposed matrix is kept as well, so columns are read as
+    rows. Whole rows are turned into neighbour lists and degrees at once
+    with int and bytes operations. Capacity doubles when it runs out.
+    """
 
     def __init__(self, capacity) -> None:
         super().__init__()
 
-        for _ in range(capacity):
-            self._adj_nodes.append([0]*capacity)
+        self.__capacity = max(1, capacity)
+        self.__stride   = (self.__capacity + 7) // 8
+        self.__rows     = bytearray(self.__capacity * self.__stride)
+        self.__columns  = bytearray(self.__capacity * self.__stride)
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> "GraphMatrix":
+        """ Copies any graph, e.g. a dense strongly connected component.
+        """
+        matrix  = cls(len(graph))
+        # Subgraph views have no names, their vertices are named by index
+        name_of = getattr(graph, "get_vertex_name", str)
 
-        self.__capacity = capacity
+        for vtx in range(len(graph)):
+            matrix.add_vertex(name_of(vtx))
+        for u in range(len(graph)):
+            for v in graph.get_neighbors_out(u):
+                matrix._final_add_edge(u, v)
+        return matrix
 
     def get_capacity(self) -> int:
         return self.__capacity
 
     def get_matrix_str(self) -> str:
-        return str(self._adj_nodes)
+        return str([
+            [self.has_edge(u, v) * 1 for v in range(self.__capacity)]
+            for u in range(self.__capacity)
+        ])
 
     def __str__(self) -> str:
         return ("{\n" +
            "\n".join(
                [f'"{name}" | {node_id}' + ": [" + ",".join(
                    [str(vrtx) for vrtx in self.get_neighbors_out(node_id)]
-                   ) + "]" for name,node_id in self._name2node.items()]
+                   ) + "]" for node_id,name in enumerate(self._names)]
                )
            + 
         "\n}")
-    
+
+    def __getitem__(self, vertex: int) -> list[int]:
+        return self.get_neighbors_out(vertex)
+
+    def __row(self, matrix: bytearray, vertex: int) -> bytearray:
+        return matrix[vertex * self.__stride:(vertex + 1) * self.__stride]
+
+    def has_edge(self, u:int, v:int) -> bool:
+        return bool(self.__rows[u * self.__stride + (v >> 3)] >> (v & 7) & 1)
+
     def get_neighbors_out(self, vertex:int) -> list[int]:
-        return [vrtx for vrtx, is_neighbour in enumerate(self[vertex]) if is_neighbour!=0]
+        return bit_indices(int.from_bytes(self.__row(self.__rows, vertex), "little"))
 
     def get_neighbors_in(self, vertex:int) -> list[int]:
-        return [
-            vrtx 
-            for vrtx in range(0, len(self)) 
-            if self[vrtx][vertex] != 0
-        ]
+        return bit_indices(int.from_bytes(self.__row(self.__columns, vertex), "little"))
+
+    def out_degree(self, vertex:int) -> int:
+        return popcount(self.__row(self.__rows, vertex))
+
+    def in_degree(self, vertex:int) -> int:
+        return popcount(self.__row(self.__columns, vertex))
+
+    def out_degrees(self) -> list[int]:
+        return [self.out_degree(vtx) for vtx in range(len(self))]
+
+    def in_degrees(self) -> list[int]:
+        return [self.in_degree(vtx) for vtx in range(len(self))]
+
+    def __grow(self) -> None:
+        """ Doubles the capacity, rows are copied into the wider matrices.
+        """
+        capacity = self.__capacity * 2
+        stride   = (capacity + 7) // 8
+        rows     = bytearray(capacity * stride)
+        columns  = bytearray(capacity * stride)
+
+        for vtx in range(self.__capacity):
+            rows[vtx * stride:vtx * stride + self.__stride]    = self.__row(self.__rows, vtx)
+            columns[vtx * stride:vtx * stride + self.__stride] = self.__row(self.__columns, vtx)
+
+        self.__capacity, self.__stride = capacity, stride
+        self.__rows, self.__columns    = rows, columns
 
     def add_vertex(self, name: str) -> int:
 
         if len(self) >= self.get_capacity():
-            raise MemoryError("Not enough capacity to store another vertex")
+            self.__grow()
 
-        super()._base_add_vertex(name)
+        return super()._base_add_vertex(name)
 
-        return self._name2node.get(name)
+    def add_edge(self, id_u: Union[int, str], id_v: Union[int, str]) -> None:
+        u = self._names.get_id(id_u, None) if type(id_u) is str else id_u
+        v = self._names.get_id(id_v, None) if type(id_v) is str else id_v
+        self._final_add_edge(u, v)
+
+    def __set(self, u:int, v:int, is_set: bool) -> None:
+        for matrix, row, col in ((self.__rows, u, v), (self.__columns, v, u)):
+            if is_set:
+                matrix[row * self.__stride + (col >> 3)] |= 1 << (col & 7)
+            else:
+                matrix[row * self.__stride + (col >> 3)] &= ~(1 << (col & 7)) & 0xff
 
     def _final_add_edge(self, u:int, v:int):
-        self._adj_nodes[u][v] = 1
+        self.__set(u, v, True)
+
+    def _final_remove_edge(self, u:int, v:int):
+        self.__set(u, v, False)
 
     def reverse_edge(self, u:int, v:int) -> None:
-        self[u][v], self[v][u] = self[v][u], self[u][v]
+        has_uv, has_vu = self.has_edge(u, v), self.has_edge(v, u)
+        self.__set(u, v, has_vu)
+        self.__set(v, u, has_uv)
 
 class GraphAdjList(Graph):
 
     def __init__(self) -> None:
         super().__init__()
         self._adj_nodes:list[list[int]] = []
+        # Reverse index, vertex -> vertices with an edge into it
+        self._in_nodes:list[list[int]]  = []
 
     def __str__(self) -> str:
         return ("{\n" +
             "\n".join(
                 [f'"{name}"' + ": [" + ",".join(
                     [str(edge) for edge in self._adj_nodes[node_id]]
-                    ) + "]" for name,node_id in self._name2node.items()]
+                    ) + "]" for node_id,name in enumerate(self._names)]
                 )
             + 
         "\n}")
 
     def add_vertex(self, name: str) -> int:
-        super()._base_add_vertex(name)
+        vertex = super()._base_add_vertex(name)
         self._adj_nodes.append([])
-        return self._name2node.get(name)
+        self._in_nodes.append([])
+        return vertex
 
     def _final_add_edge(self, u:int, v:int):
         self._adj_nodes[u].append(v)
+        self._in_nodes[v].append(u)
+
+    def _final_remove_edge(self, u:int, v:int):
+        self._adj_nodes[u].remove(v)
+        self._in_nodes[v].remove(u)
 
     def reverse_edge(self, u:int, v:int) -> None:
         if not u in self._adj_nodes[v]:
-            self._adj_nodes[v].append(u)
-            self._adj_nodes[u].remove(v)
+            self._final_add_edge(v, u)
+            self._final_remove_edge(u, v)
         else:
-            self._adj_nodes[u].append(v)
-            self._adj_nodes[v].remove(u)
+            self._final_add_edge(u, v)
+            self._final_remove_edge(v, u)
 
     def get_neighbors_out(self, vertex:int) -> list[int]:
         return self._adj_nodes[vertex]
 
     def get_neighbors_in(self, vertex:int) -> list[int]:
-        return [
-            vrtx 
-            for vrtx in range(0, len(self)) 
-            if vertex in self[vrtx]
-        ]
+        return self._in_nodes[vertex]
 
 class DirectedGraph(GraphAdjList):
 
@@ -156,10 +247,57 @@ class DirectedGraph(GraphAdjList):
     def reversed_edges(self):
         return self.__reversed_edges
 
-    def __init__(self) -> None:
+    def __init__(self, cycle_breaker: CycleBreaker = None) -> None:
         super().__init__()
         self.__reversed_edges: list[Tuple[int, int]] = []        
+        self.cycle_breaker = cycle_breaker or create_cycle_breaker(CycleBreaking.GREEDY_FAS)
     
+    @classmethod
+    def from_dependency_map(cls,
+                dependencies: Union[Mapping[str, Iterable[str]], Iterable[Tuple[str, Iterable[str]]]],
+                cycle_breaker: CycleBreaker = None) -> "DirectedGraph":
+        """ Builds the graph from scanner output, a mapping or a stream of
+        (source file, includes) pairs, in a single pass. Edge (u,v) means u
+        was included by v. Self includes and repeated includes are dropped,
+        also when the same source file is listed more than once.
+        """
+        graph     = cls(cycle_breaker)
+        intern    = graph._names.intern
+        in_nodes  = graph._in_nodes
+
+        is_listed = set()
+        sources   = []
+        targets   = []
+
+        items = dependencies.items() if isinstance(dependencies, Mapping) else dependencies
+
+        for source_file, includes in items:
+            source = intern(source_file)
+            ids    = list(map(intern, dict.fromkeys(includes)))
+
+            if len(in_nodes) < len(graph):
+                in_nodes.extend([] for _ in range(len(graph) - len(in_nodes)))
+
+            # prevent files with improper includes or "self includes"
+            if source in ids:
+                ids.remove(source)
+
+            if source in is_listed:
+                known = set(in_nodes[source])
+                ids   = [vtx for vtx in ids if vtx not in known]
+            is_listed.add(source)
+
+            in_nodes[source].extend(ids)
+            sources.extend(ids)
+            targets.extend([source] * len(ids))
+
+        # Out-lists are filled once all vertices are known
+        graph._adj_nodes = out_nodes = [[] for _ in range(len(graph))]
+        for u, v in zip(sources, targets):
+            out_nodes[u].append(v)
+
+        return graph
+
     def undo_reversed_edges(self) -> None:
         """ Fix graph state by returning reversed edges
         back to their exact initial state. The only edges
@@ -167,87 +305,108 @@ class DirectedGraph(GraphAdjList):
         remove_cycle_and_sort() method.
         """
         while len(self.__reversed_edges):
-            self.reverse_edge(*self.__reversed_edges.pop())
+            u, v = self.__reversed_edges.pop()
+            self.__flip_edge(v, u)
+
+    def __flip_edge(self, u:int, v:int) -> None:
+        """ Turns a single edge (u,v) into (v,u). Unlike reverse_edge() it
+        doesn't touch an already present (v,u) edge.
+        """
+        self._final_remove_edge(u, v)
+        self._final_add_edge(v, u)
 
     def add_edge(self, id_u: Union[int, str], id_v: Union[int, str]) -> None:        
-        u = self._name2node.get(id_u) if type(id_u) is str else id_u
-        v = self._name2node.get(id_v) if type(id_v) is str else id_v
+        u = self._names.get_id(id_u, None) if type(id_u) is str else id_u
+        v = self._names.get_id(id_v, None) if type(id_v) is str else id_v
         self._final_add_edge(u, v)
 
-    def remove_cycle_and_sort(self) -> list[int]:
+    def remove_edge(self, id_u: Union[int, str], id_v: Union[int, str]) -> None:
+        u = self._names.get_id(id_u, None) if type(id_u) is str else id_u
+        v = self._names.get_id(id_v, None) if type(id_v) is str else id_v
+        self._final_remove_edge(u, v)
+
+    def update_dependencies(self, source_file: str, includes: list[str], editor = None) -> bool:
+        """ Replaces includes of the source file with the given ones.
+        Edge (u,v) means u was included by v. Self includes are ignored.
+        editor - applies the edge changes through its add_edge() and remove_edge(),
+        e.g. a DynamicTopologicalOrder of the graph. The graph itself by default.
+        Returns: True if any edge was added or removed.
+        """
+        editor  = self if editor is None else editor
+        source  = self.safe_add_vertex(source_file)
+        current = set(self.get_neighbors_in(source))
+        wanted  = {self.safe_add_vertex(incl) for incl in includes if incl != source_file}
+
+        for included in sorted(current - wanted):
+            editor.remove_edge(included, source)
+
+        for included in sorted(wanted - current):
+            editor.add_edge(included, source)
+
+        return current != wanted
+
+    def strongly_connected_components(self) -> list[int]:
+        """ Returns: component id of every vertex, ids
+        follow the topological order of components.
+        """
+        return strongly_connected_components(self)[0]
+
+    def condensation(self) -> Condensation:
+        """ Returns: DAG of strongly connected components. Vertices of
+        every non-trivial component are in a circular include.
+        """
+        return Condensation(self)
+
+    def reachability_index(self, memory_limit: int = 64 << 20) -> ReachabilityIndex:
+        """ Returns: index of files that transitively depend on a file.
+        Graph has to be in its initial state.
+        """
+        return ReachabilityIndex(self, memory_limit)
+
+    def remove_cycle_and_sort(self, breaker: CycleBreaker = None) -> list[int]:
         """ Removes a cycle (if present) from a graph, then creates a topological order 
         for the acyclic graph. Calling this method can alter graph in presence of cycles
         by reversing a couple of edges.
         All state changes will be saved into "reversed_edges" list. Graph can return to its
-        initial state by calling undo_reversed_edges() method.
+        initial state by calling undo_reversed_edges() method. acyclic_view() gives
+        the same result without touching the graph.
+        breaker - cycle breaking strategy, graph's cycle_breaker by default.
         Returns: topological order of the (non-)altered graph.
         """
+        breaker = breaker or self.cycle_breaker
 
-        if len(self) == 0:
-            return []
+        topological_order, reversed_edges = breaker.break_cycles(self)
+        self.apply_reversed_edges(reversed_edges)
 
-        source_vts = Queue()
-        temp_vts   = Queue()
-        is_done    = [False] * len(self)
-        indeg      = [0]     * len(self)
-        outdeg     = [0]     * len(self)
-        V          = range(len(self))
+        return topological_order
 
-        for vtx_id in V:
-            for vx_out in self.get_neighbors_out(vtx_id):
-                indeg[vx_out] += 1
-                outdeg[vtx_id]  += 1
-        
-        for vtx_id in V:
-            if indeg[vtx_id] == 0:
-                source_vts.put(vtx_id)
-        
-        if source_vts.qsize()==0:
-            # no source vertices were found, hence
-            # the graph is a complete cycle (ring)
-            return []
-        
-        topological_order = []
+    def acyclic_view(self, breaker: CycleBreaker = None) -> Tuple[list[int], FlippedEdgesView]:
+        """ Finds edges whose reversal removes all cycles, like remove_cycle_and_sort(),
+        but leaves the graph in its initial state. The acyclic graph is a view
+        of this one with those edges flipped.
+        breaker - cycle breaking strategy, graph's cycle_breaker by default.
+        Returns: topological order and the acyclic view.
+        """
+        breaker = breaker or self.cycle_breaker
 
-        try:
+        topological_order, reversed_edges = breaker.break_cycles(self)
 
-            while source_vts.qsize() or temp_vts.qsize():
-                
-                while source_vts.qsize():
-
-                    source_vertex = source_vts.get()
-
-                    if not is_done[source_vertex]:
-                        topological_order.append(source_vertex)
-                    
-                    is_done[source_vertex] = True
-
-                    for vx_out in self.get_neighbors_out(source_vertex):
-                        indeg[vx_out] -= 1
-                        if indeg[vx_out] == 0:
-                            source_vts.put(vx_out)                        
-                        else:
-                            temp_vts.put(vx_out)
-                
-                if temp_vts.qsize():
-                    temp_vtx=-1
-                    while temp_vts.qsize():
-                        temp_vtx = temp_vts.get()
-                        if not is_done[temp_vtx] and outdeg[temp_vtx]>0:
-                            break
-                    
-                    if temp_vtx >= 0 and not is_done[temp_vtx] and outdeg[temp_vtx]>0:
-
-                        for vx_out in self.get_neighbors_in(temp_vtx):
-                            if not is_done[vx_out] and vx_out != temp_vtx:
-                                self.reverse_edge(vx_out,temp_vtx)                                
-                                self.__reversed_edges.append((vx_out, temp_vtx))
-                                indeg[vx_out] += 1
-                        
-                        source_vts.put(temp_vtx)
+        return topological_order, FlippedEdgesView(self, reversed_edges)
 
+    def apply_reversed_edges(self, reversed_edges: list[Tuple[int, int]]) -> None:
+        """ Turns every edge (u,v) into (v,u) and saves it into "reversed_edges"
+        list, so undo_reversed_edges() can restore it.
+        """
+        try:
+            for u, v in reversed_edges:
+                self.__flip_edge(u, v)
+                self.__reversed_edges.append((u, v))
         except Exception as ex:
             self.undo_reversed_edges()
             raise ex
 
-        return topological_order
\ No newline at end of file
+    def dynamic_order(self, order: list[int] = None, reversed_edges: list[Tuple[int, int]] = None) -> DynamicTopologicalOrder:
+        """ Returns: topological order that follows edge changes made through it.
+        Graph has to be in its initial state, see DynamicTopologicalOrder.
+        """
+        return DynamicTopologicalOrder(self, order, reversed_edges)
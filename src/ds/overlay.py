@@ -0,0 +1,77 @@
+from typing import Iterable, Tuple
+
+class FlippedEdgesView:
+    """ Read-only view of a graph with some of its edges reversed, e.g. the
+    acyclic graph found by a cycle breaker. The base graph is never changed,
+    so it can be read by other threads and shared by any number of views.
+    Only vertices touching a reversed edge get new neighbour lists, the rest
+    are the base graph's own lists and mustn't be modified.
+    """
+
+    def __init__(self, base, reversed_edges: Iterable[Tuple[int, int]] = ()) -> None:
+        """ base - graph in its initial state.
+        reversed_edges - original edges (u,v) that are read as (v,u).
+        """
+        self.base = base
+
+        self.__reversed_edges: list[Tuple[int, int]] = list(reversed_edges)
+        self.__flipped = set(self.__reversed_edges)
+
+        # vertex -> vertices it gains an edge into / from
+        self.__added_out: dict[int, list[int]] = {}
+        self.__added_in : dict[int, list[int]] = {}
+
+        for u, v in self.__reversed_edges:
+            self.__added_out.setdefault(v, []).append(u)
+            self.__added_in.setdefault(u, []).append(v)
+
+        # Vertices whose neighbour lists differ from the base graph
+        self.__touched_out = {u for u, _ in self.__reversed_edges}.union(self.__added_out)
+        self.__touched_in  = {v for _, v in self.__reversed_edges}.union(self.__added_in)
+
+    @property
+    def reversed_edges(self) -> list[Tuple[int, int]]:
+        return self.__reversed_edges
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    def __getitem__(self, vertex: int) -> list[int]:
+        return self.get_neighbors_out(vertex)
+
+    def __str__(self) -> str:
+        return ("{\n" +
+            "\n".join(
+                [f'"{self.get_vertex_name(node_id)}"' + ": [" + ",".join(
+                    [str(edge) for edge in self.get_neighbors_out(node_id)]
+                    ) + "]" for node_id in range(len(self))]
+                )
+            +
+        "\n}")
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    def get_vertex_id(self, vertex_name: str) -> int:
+        return self.base.get_vertex_id(vertex_name)
+
+    def get_vertex_name(self, vertex: int) -> str:
+        return self.base.get_vertex_name(vertex)
+
+    def get_neighbors_out(self, vertex: int) -> list[int]:
+        neighbors = self.base.get_neighbors_out(vertex)
+        if vertex not in self.__touched_out:
+            return neighbors
+
+        neighbors = [v for v in neighbors if (vertex, v) not in self.__flipped]
+        neighbors.extend(self.__added_out.get(vertex, ()))
+        return neighbors
+
+    def get_neighbors_in(self, vertex: int) -> list[int]:
+        neighbors = self.base.get_neighbors_in(vertex)
+        if vertex not in self.__touched_in:
+            return neighbors
+
+        neighbors = [u for u in neighbors if (u, vertex) not in self.__flipped]
+        neighbors.extend(self.__added_in.get(vertex, ()))
+        return neighbors
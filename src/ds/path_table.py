@@ -0,0 +1,121 @@
+from array import array
+from typing import Iterable, Iterator, Tuple
+
+class PathTable:
+    """ Vertex names stored as (directory id, basename) pairs. Every directory
+    path is kept once, so files of deep source trees don't repeat their common
+    prefixes. Directories know their children, which makes "everything under
+    a directory" queries cheap.
+    """
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        # Directory paths end with "/", names without one are in directory ""
+        self.__dir_ids : dict[str, int]  = {}
+        self.__dirs    : list[str]       = []
+        self.__children: list[list[int]] = []
+        # directory -> basename -> vertex
+        self.__files   : list[dict[str, int]] = []
+
+        self.__vertex_dir  = array("i")
+        self.__vertex_base: list[str] = []
+
+        for name in names:
+            self.intern(name)
+
+    @staticmethod
+    def split(name: str) -> Tuple[str, str]:
+        """ Returns: directory with the trailing "/" and basename.
+        """
+        i = name.rfind("/") + 1
+        return name[:i], name[i:]
+
+    def __len__(self) -> int:
+        return len(self.__vertex_base)
+
+    def __getitem__(self, vertex: int) -> str:
+        return self.__dirs[self.__vertex_dir[vertex]] + self.__vertex_base[vertex]
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self.__getitem__, range(len(self)))
+
+    def __intern_dir(self, dir_path: str) -> int:
+        # Missing directories from dir_path up to the first known
+        # ancestor, root directories hang under ""
+        missing   = []
+        parent_id = -1
+        while True:
+            parent_id = self.__dir_ids.get(dir_path, -1)
+            if parent_id != -1:
+                break
+            missing.append(dir_path)
+            if not dir_path:
+                break
+            dir_path = dir_path[:dir_path.rfind("/", 0, len(dir_path) - 1) + 1]
+
+        # Parents are interned first
+        dir_id = parent_id
+        for dir_path in reversed(missing):
+            dir_id = self.__dir_ids[dir_path] = len(self.__dirs)
+            self.__dirs.append(dir_path)
+            self.__children.append([])
+            self.__files.append({})
+
+            if parent_id != -1:
+                self.__children[parent_id].append(dir_id)
+            parent_id = dir_id
+
+        return dir_id
+
+    def get_id(self, name: str, default: int = -1) -> int:
+        dir_path, basename = self.split(name)
+
+        dir_id = self.__dir_ids.get(dir_path)
+        if dir_id is None:
+            return default
+
+        return self.__files[dir_id].get(basename, default)
+
+    def intern(self, name: str) -> int:
+        """ Returns: id of the name, added if it's new.
+        """
+        dir_path, basename = self.split(name)
+
+        dir_id = self.__dir_ids.get(dir_path)
+        if dir_id is None:
+            dir_id = self.__intern_dir(dir_path)
+
+        files  = self.__files[dir_id]
+        vertex = files.get(basename)
+        if vertex is None:
+            vertex = files[basename] = len(self.__vertex_base)
+            self.__vertex_dir.append(dir_id)
+            self.__vertex_base.append(basename)
+
+        return vertex
+
+    def dirname(self, vertex: int) -> str:
+        """ Returns: directory of the vertex, with the trailing "/".
+        """
+        return self.__dirs[self.__vertex_dir[vertex]]
+
+    def basename(self, vertex: int) -> str:
+        return self.__vertex_base[vertex]
+
+    def under(self, directory: str) -> list[int]:
+        """ Returns: sorted ids of vertices in the directory or any of its subdirectories.
+        """
+        if directory and not directory.endswith("/"):
+            directory += "/"
+
+        dir_id = self.__dir_ids.get(directory)
+        if dir_id is None:
+            return []
+
+        vertices, stack = [], [dir_id]
+        while stack:
+            dir_id = stack.pop()
+            vertices.extend(self.__files[dir_id].values())
+            stack.extend(self.__children[dir_id])
+
+        vertices.sort()
+        return vertices
@@ -0,0 +1,122 @@
+from functools import lru_cache
+from typing import Iterable
+from src.ds.scc import Condensation
+from src.ds.bits import bit_indices
+
+class ReachabilityIndex:
+    """ Answers which vertices are reachable from a vertex, for edge (u,v)
+    meaning u was included by v those are the files that depend on it.
+    Transitive closure is kept as one int bitset per strongly connected
+    component, built from sinks of the condensation towards sources. If it
+    would take more than memory_limit bytes, reachable sets are found by
+    BFS over the condensation when asked and the last cache_size of them
+    are kept, a batch query is then a single BFS.
+    """
+
+    def __init__(self, graph, memory_limit: int = 64 << 20, cache_size: int = 4096) -> None:
+        """ graph - graph in its initial state, with cycles.
+        """
+        self.graph        = graph
+        self.memory_limit = memory_limit
+        self.condensation = Condensation(graph)
+
+        # component -> bitset of components reachable from it, itself included
+        self.__closure: list[int] = self.__build_closure()
+
+        self.__reachable_bfs = lru_cache(maxsize=cache_size)(self.__reachable_bfs)
+
+    @property
+    def is_indexed(self) -> bool:
+        return self.__closure is not None
+
+    def __build_closure(self) -> list[int]:
+        """ Returns: closure of every component or None
+        if it doesn't fit into the memory limit.
+        """
+        closure = [0] * len(self.condensation)
+        size    = 0
+
+        # Ids are in topological order, so walking them backwards
+        # handles every component after all of its successors
+        for comp in reversed(range(len(self.condensation))):
+            bits = 1 << comp
+            for comp_out in self.condensation.out_components[comp]:
+                bits |= closure[comp_out]
+
+            closure[comp] = bits
+            size += (bits.bit_length() + 7) // 8
+
+            if size > self.memory_limit:
+                return None
+
+        return closure
+
+    def __visit(self, components: Iterable[int]) -> bytearray:
+        """ BFS over the condensation from all given components at once.
+        Returns: digits of the bitset of components reachable through at
+        least one edge, least significant first.
+        """
+        visited  = bytearray(b"0" * len(self.condensation))
+        frontier = list(components)
+
+        for comp in frontier:
+            if not self.condensation.is_trivial(comp):
+                visited[comp] = ord("1")
+
+        while frontier:
+            for comp_out in self.condensation.out_components[frontier.pop()]:
+                if visited[comp_out] != ord("1"):
+                    visited[comp_out] = ord("1")
+                    frontier.append(comp_out)
+
+        return visited
+
+    def __visit_bits(self, components: Iterable[int]) -> int:
+        """ Returns: bitset of components reachable through at least one edge,
+        0 for an empty condensation.
+        """
+        visited = self.__visit(components)
+        return int(visited[::-1], 2) if visited else 0
+
+    def __reachable_bfs(self, comp: int) -> int:
+        return self.__visit_bits([comp])
+
+    def __reachable(self, comp: int) -> int:
+        """ Returns: bitset of components reachable through at least one edge.
+        """
+        if self.__closure is None:
+            return self.__reachable_bfs(comp)
+
+        bits = self.__closure[comp]
+        if self.condensation.is_trivial(comp):
+            bits &= ~(1 << comp)
+        return bits
+
+    def __expand(self, bits: int) -> list[int]:
+        components = self.condensation.components
+        return sorted(vtx for comp in bit_indices(bits) for vtx in components[comp])
+
+    def reaches(self, u: int, v: int) -> bool:
+        """ Returns: True if there's a path from u to v.
+        """
+        return bool(self.__reachable(self.condensation.component_of[u]) >> self.condensation.component_of[v] & 1)
+
+    def dependents(self, vertex: int) -> list[int]:
+        """ Returns: vertices reachable from vertex.
+        """
+        return self.__expand(self.__reachable(self.condensation.component_of[vertex]))
+
+    def dependents_of(self, vertices: Iterable[int]) -> list[int]:
+        """ Batch query, components shared by the vertices are expanded only once.
+        Returns: vertices reachable from any of the given vertices.
+        """
+        components = {self.condensation.component_of[vtx] for vtx in vertices}
+
+        if self.__closure is None:
+            # One BFS for the whole batch
+            return self.__expand(self.__visit_bits(components))
+
+        bits = 0
+        for comp in components:
+            bits |= self.__reachable(comp)
+        return self.__expand(bits)
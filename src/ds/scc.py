@@ -0,0 +1,123 @@
+from typing import Tuple
+
+def strongly_connected_components(graph) -> Tuple[list[int], int]:
+    """ Iterative Tarjan's algorithm, so long include chains can't hit
+    the recursion limit. Components are numbered in topological order,
+    every edge between two components goes to a higher id.
+    Returns: component id of every vertex, number of components.
+    """
+    n = len(graph)
+
+    index     = [-1] * n
+    lowlink   = [0] * n
+    next_edge = [0] * n
+    on_stack  = [False] * n
+    component = [-1] * n
+
+    stack   = []
+    counter = 0
+    found   = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, graph.get_neighbors_out(root))]
+
+        while work:
+            vtx, neighbors = work[-1]
+
+            if next_edge[vtx] < len(neighbors):
+                vx_out = neighbors[next_edge[vtx]]
+                next_edge[vtx] += 1
+
+                if index[vx_out] == -1:
+                    index[vx_out] = lowlink[vx_out] = counter
+                    counter += 1
+                    stack.append(vx_out)
+                    on_stack[vx_out] = True
+                    work.append((vx_out, graph.get_neighbors_out(vx_out)))
+                elif on_stack[vx_out] and index[vx_out] < lowlink[vtx]:
+                    lowlink[vtx] = index[vx_out]
+                continue
+
+            work.pop()
+            if work and lowlink[vtx] < lowlink[work[-1][0]]:
+                lowlink[work[-1][0]] = lowlink[vtx]
+
+            if lowlink[vtx] == index[vtx]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member]  = False
+                    component[member] = found
+                    if member == vtx:
+                        break
+                found += 1
+
+    # Tarjan finds sink components first
+    return [found - 1 - c for c in component], found
+
+class InducedSubgraph:
+    """ Read-only view of the edges among a subset of vertices,
+    renumbered by their position in the vertices list.
+    """
+
+    def __init__(self, graph, vertices: list[int]) -> None:
+        local = {vtx: i for i, vtx in enumerate(vertices)}
+
+        self.vertices   = vertices
+        self._out_nodes = [[local[v] for v in graph.get_neighbors_out(vtx) if v in local] for vtx in vertices]
+        self._in_nodes  = [[local[u] for u in graph.get_neighbors_in(vtx)  if u in local] for vtx in vertices]
+
+    def __len__(self) -> int:
+        return len(self.vertices)
+
+    def __getitem__(self, vertex: int) -> list[int]:
+        return self._out_nodes[vertex]
+
+    def get_neighbors_out(self, vertex: int) -> list[int]:
+        return self._out_nodes[vertex]
+
+    def get_neighbors_in(self, vertex: int) -> list[int]:
+        return self._in_nodes[vertex]
+
+class Condensation:
+    """ DAG of strongly connected components. Component ids are in
+    topological order. Only components with more than one vertex
+    contain cycles, self loops aside.
+    """
+
+    def __init__(self, graph) -> None:
+        self.graph = graph
+        self.component_of, count = strongly_connected_components(graph)
+
+        self.components: list[list[int]] = [[] for _ in range(count)]
+        for vtx, comp in enumerate(self.component_of):
+            self.components[comp].append(vtx)
+
+        # component -> components it has an edge into
+        self.out_components: list[list[int]] = [[] for _ in range(count)]
+        for comp, members in enumerate(self.components):
+            targets = {
+                self.component_of[v]
+                for u in members
+                for v in graph.get_neighbors_out(u)
+            }
+            targets.discard(comp)
+            self.out_components[comp] = sorted(targets)
+
+    def __len__(self) -> int:
+        return len(self.components)
+
+    def is_trivial(self, component: int) -> bool:
+        return len(self.components[component]) == 1
+
+    def cyclic_components(self) -> list[int]:
+        return [comp for comp in range(len(self)) if not self.is_trivial(comp)]
+
+    def subgraph(self, component: int) -> InducedSubgraph:
+        return InducedSubgraph(self.graph, self.components[component])
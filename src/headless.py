@@ -0,0 +1,272 @@
+import os
+import time
+import sys
+import json
+import argparse
+from typing import TextIO
+
+from src.scanner import DependencyScanner, ScanBackend
+from src.compile_db import find_compile_commands
+from src.ds.graph import DirectedGraph
+from src.ds.overlay import FlippedEdgesView
+from src.ds.cycle_breaking import CycleBreaking, create_cycle_breaker
+from src.node_layering import Layering
+from src.layer_assignment import LayeringMethod, create_layer_assigner, layering_report
+from src.snapshot import Snapshot, SnapshotError
+
+EXIT_OK    = 0
+EXIT_CYCLE = 1
+EXIT_ERROR = 2
+
+# Files that are compiled on their own, dependents of
+# a header with these extensions need a rebuild
+SOURCE_EXTENSIONS = (".cpp", ".c")
+
+class AnalysisResult:
+    """ Outcome of the headless pipeline. Graph is in its
+    original state, reversed edges are kept aside.
+    """
+
+    def __init__(self,
+                project_dir: str,
+                digraph: DirectedGraph,
+                layering: Layering,
+                reversed_edges: list,
+                cyclic_components: list[list[int]],
+                scan_started: int = None) -> None:
+        self.project_dir       = project_dir
+        self.digraph           = digraph
+        self.layering          = layering
+        self.reversed_edges    = reversed_edges
+        self.cyclic_components = cyclic_components
+        # time.time_ns() before the scan, None when nothing was scanned
+        self.scan_started      = scan_started
+        # header -> source files that need a rebuild when it changes
+        self.affected: dict[str, list[str]] = {}
+
+    @property
+    def has_cycle(self) -> bool:
+        return len(self.cyclic_components) != 0 or len(self.reversed_edges) != 0
+
+    @property
+    def is_full_cycle(self) -> bool:
+        return len(self.digraph) != 0 and len(self.layering.topological_order) == 0
+
+    def edges(self):
+        for u in range(len(self.digraph)):
+            for v in self.digraph.get_neighbors_out(u):
+                yield u, v
+
+    def summary(self) -> dict:
+        return {
+            "project_dir"    : self.project_dir,
+            "vertices"       : len(self.digraph),
+            "has_cycle"      : self.has_cycle,
+            "full_cycle"     : self.is_full_cycle,
+            "reversed_edges" : [list(edge) for edge in self.reversed_edges],
+            "cycles"         : self.cyclic_components,
+            "layer_count"    : len(self.layering.layers),
+            "affected"       : self.affected,
+        }
+
+    def find_affected(self, files: list[str]) -> None:
+        """ Fills affected with source files that transitively include
+        each of the files. A directory stands for all files under it.
+        Unknown files have no dependents.
+        """
+        index = self.digraph.reachability_index()
+
+        for file in files:
+            path = DependencyScanner.normalize_path(os.path.abspath(file))
+
+            if os.path.isdir(file):
+                dependents = index.dependents_of(self.digraph.get_vertices_under(path))
+            else:
+                vertex     = self.digraph.get_vertex_id(path)
+                dependents = index.dependents(vertex) if vertex != -1 else []
+
+            self.affected[file] = [
+                name for name in map(self.digraph.get_vertex_name, dependents)
+                if os.path.splitext(name)[1] in SOURCE_EXTENSIONS
+            ]
+
+    def write_json(self, out: TextIO) -> None:
+        document = self.summary()
+        document.update({
+            "vertex_names"      : [self.digraph.get_vertex_name(v) for v in range(len(self.digraph))],
+            "edges"             : [[u, v] for u, v in self.edges()],
+            "topological_order" : self.layering.topological_order,
+            "layers"            : [layer.nodes.tolist() for layer in self.layering.layers],
+        })
+        json.dump(document, out)
+        out.write("\n")
+
+    def write_ndjson(self, out: TextIO) -> None:
+        node_layers = self.layering.raw_node_layers
+        order       = {v: i for i, v in enumerate(self.layering.topological_order)}
+        reversed_   = set(self.reversed_edges)
+
+        for v in range(len(self.digraph)):
+            out.write(json.dumps({
+                "type"  : "vertex",
+                "id"    : v,
+                "name"  : self.digraph.get_vertex_name(v),
+                "layer" : node_layers[v] if node_layers else None,
+                "order" : order.get(v),
+            }) + "\n")
+
+        for u, v in self.edges():
+            out.write(json.dumps({
+                "type"     : "edge",
+                "from"     : u,
+                "to"       : v,
+                "reversed" : (u, v) in reversed_,
+            }) + "\n")
+
+        record = self.summary()
+        record["type"] = "summary"
+        out.write(json.dumps(record) + "\n")
+
+def analyze(scanner: DependencyScanner,
+            project_dir: str,
+            compile_commands: str = None,
+            cycle_breaking: CycleBreaking = CycleBreaking.GREEDY_FAS,
+            layering_method: LayeringMethod = LayeringMethod.LONGEST_PATH,
+            layering_budget: float = 2.0) -> AnalysisResult:
+    """ Runs the same scan, cycle removal and layering
+    pipeline as the graphical tool.
+    """
+    project_dir  = DependencyScanner.normalize_path(os.path.abspath(project_dir))
+    scan_started = time.time_ns()
+
+    if compile_commands:
+        dependency_stream = scanner.iter_compile_commands(compile_commands, project_dir)
+    else:
+        dependency_stream = scanner.iter_scan(project_dir)
+
+    digraph = DirectedGraph.from_dependency_map(dependency_stream, create_cycle_breaker(cycle_breaking))
+
+    # Results describe the original graph, only its acyclic view is layered
+    top_order, dag = digraph.acyclic_view()
+
+    layering = Layering(dag, top_order, create_layer_assigner(layering_method, layering_budget))
+    if top_order:
+        layering.compute_layers()
+
+    return AnalysisResult(project_dir, digraph, layering, dag.reversed_edges, _cyclic_components(digraph), scan_started)
+
+def load_analysis(snapshot_path: str, project_dir: str) -> AnalysisResult:
+    """ Reads the result of an earlier analysis from a snapshot, stored
+    paths are moved into the project directory.
+    """
+    project_dir = DependencyScanner.normalize_path(os.path.abspath(project_dir))
+
+    with Snapshot(snapshot_path) as snapshot:
+        digraph        = snapshot.to_directed_graph(project_dir)
+        reversed_edges = snapshot.reversed_edges
+        scan_started   = snapshot.scan_started
+        layering       = Layering.from_node_layers(FlippedEdgesView(digraph, reversed_edges),
+                                                   snapshot.topological_order.tolist(), snapshot.node_layers.tolist())
+
+    return AnalysisResult(project_dir, digraph, layering, reversed_edges, _cyclic_components(digraph), scan_started)
+
+def write_layering_report(result: AnalysisResult, time_budget: float, out: TextIO) -> None:
+    """ Writes a table of layer counts, widths and dummy vertices of every
+    layering method, computed on the acyclic view of the analysed graph.
+    """
+    dag  = FlippedEdgesView(result.digraph, result.reversed_edges)
+    rows = layering_report(dag, result.layering.topological_order, time_budget)
+
+    out.write(f"{'method':<16} {'layers':>7} {'width':>7} {'dummies':>10} {'saved':>10} {'seconds':>8}\n")
+    for row in rows:
+        out.write(f"{row['method']:<16} {row['layers']:>7} {row['width']:>7} {row['dummies']:>10} {row['saved']:>10} {row['seconds']:>8.2f}\n")
+
+def _cyclic_components(digraph: DirectedGraph) -> list[list[int]]:
+    condensation = digraph.condensation()
+    return [condensation.components[comp] for comp in condensation.cyclic_components()]
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Scans C/C++ project dependencies and reports circular includes.",
+        epilog=f"Exit codes: {EXIT_OK} - no cycles, {EXIT_CYCLE} - cycle detected, {EXIT_ERROR} - error."
+    )
+    parser.add_argument("project_dir", help="directory with C/C++ project files")
+    parser.add_argument("-o", "--output", help="output file, standard output by default")
+    parser.add_argument("-f", "--format", choices=["json", "ndjson"], default="json")
+    parser.add_argument("-b", "--backend", choices=[b.value for b in ScanBackend], default=ScanBackend.LIBCLANG.value)
+    parser.add_argument("-I", "--include-path", action="append", default=[], help="include search path, can be repeated")
+    parser.add_argument("-x", "--exclude", action="append", default=[], help="gitignore style exclude pattern, can be repeated")
+    parser.add_argument("--no-gitignore", action="store_true", help="don't honor .gitignore files")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="number of parser processes")
+    parser.add_argument("--cache-dir", help="directory of the persistent scan cache")
+    parser.add_argument("--compile-commands", help="path to compile_commands.json, looked up in the project by default")
+    parser.add_argument("--no-compile-commands", action="store_true", help="scan all project files even if a compilation database exists")
+    parser.add_argument("--cycle-breaker", choices=[c.value for c in CycleBreaking], default=CycleBreaking.GREEDY_FAS.value,
+                        help="algorithm that picks edges to reverse")
+    parser.add_argument("--layering", choices=[m.value for m in LayeringMethod], default=LayeringMethod.LONGEST_PATH.value,
+                        help="algorithm that assigns files to layers")
+    parser.add_argument("--layering-budget", type=float, default=2.0, metavar="SECONDS",
+                        help="time limit of coffman-graham and network-simplex layering")
+    parser.add_argument("--layering-report", action="store_true",
+                        help="compare dummy vertex counts of all layering algorithms on standard error")
+    parser.add_argument("-a", "--affected", action="append", default=[], metavar="PATH",
+                        help="list source files that need a rebuild when PATH, a file or directory, changes, can be repeated")
+    parser.add_argument("--save-snapshot", metavar="PATH", help="also save the result as a binary snapshot")
+    parser.add_argument("--snapshot", metavar="PATH", help="report a saved snapshot instead of scanning the project")
+    parser.add_argument("--allow-cycles", action="store_true", help=f"exit with {EXIT_OK} even if a cycle is detected")
+    return parser
+
+def main(argv: list[str] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+
+    if not os.path.isdir(args.project_dir):
+        print(f"Project directory {args.project_dir} doesn't exist", file=sys.stderr)
+        return EXIT_ERROR
+
+    scanner = DependencyScanner(
+        workers       = args.workers,
+        cache_dir     = args.cache_dir,
+        backend       = ScanBackend(args.backend),
+        include_paths = args.include_path,
+        excludes      = args.exclude,
+        use_gitignore = not args.no_gitignore
+    )
+
+    compile_commands = None
+    if not args.no_compile_commands:
+        compile_commands = args.compile_commands or find_compile_commands(args.project_dir)
+
+    if args.snapshot:
+        try:
+            result = load_analysis(args.snapshot, args.project_dir)
+        except (OSError, SnapshotError) as ex:
+            print(f"Can't load snapshot: {ex}", file=sys.stderr)
+            return EXIT_ERROR
+    else:
+        result = analyze(scanner, args.project_dir, compile_commands, CycleBreaking(args.cycle_breaker),
+                         LayeringMethod(args.layering), args.layering_budget)
+
+    if args.save_snapshot:
+        Snapshot.write(args.save_snapshot, result.project_dir, result.digraph,
+                       result.layering.topological_order, result.layering.raw_node_layers, result.reversed_edges,
+                       result.scan_started)
+
+    if args.affected:
+        result.find_affected(args.affected)
+
+    if args.layering_report:
+        write_layering_report(result, args.layering_budget, sys.stderr)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        if args.format == "ndjson":
+            result.write_ndjson(out)
+        else:
+            result.write_json(out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if result.has_cycle and not args.allow_cycles:
+        return EXIT_CYCLE
+    return EXIT_OK
@@ -0,0 +1,100 @@
+import re
+from typing import Tuple
+
+# Tokens that matter for finding preprocessor directives. Everything else
+# is skipped by the regex engine, comments and literals are consumed whole
+# so that directive-like text inside of them is never reported.
+_TOKENS = re.compile(r"""
+      (?P<comment>/\*.*?\*/|//[^\n]*)
+    | (?P<raw>R"(?P<delim>[^()\\\s"]{0,16})\(.*?\)(?P=delim)")
+    | (?P<literal>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+    | ^[ \t]*\#[ \t]*(?P<directive>\w+)(?P<rest>(?:[^\n/]|/(?![*/]))*)
+""", re.DOTALL | re.MULTILINE | re.VERBOSE)
+
+_INCLUDE_DIRECTIVES = {"include", "include_next", "import"}
+_OPEN_CONDITIONALS  = {"if", "ifdef", "ifndef"}
+_NOT_DEFINED        = re.compile(r"!\s*defined\s*\(?\s*(\w+)\s*\)?\s*$")
+
+def _guard_macro(directive: str, rest: str) -> str:
+    """ Returns macro name if the directive could open an include guard.
+    """
+    if directive == "ifndef":
+        return rest.strip()
+    if directive == "if":
+        match = _NOT_DEFINED.match(rest.strip())
+        if match:
+            return match.group(1)
+    return ""
+
+def scan_includes(source: str) -> Tuple[list[Tuple[str, bool]], bool]:
+    """ Lexically extracts #include directives from C/C++ source.
+    Returns: List of (included name, is angled) pairs and a flag telling whether
+    the file has conditional or macro-computed includes which can't be
+    resolved without running the preprocessor.
+    """
+
+    # Splice continued lines the same way translation phase 2 does
+    source = source.replace("\\\r\n", "").replace("\\\n", "")
+
+    includes    = []
+    needs_cpp   = False
+    depth       = 0
+    guard_depth = 0
+    # Macro of a conditional that opens an include guard if "#define"
+    # of the same macro comes next. Pragmas (#pragma once) and whole
+    # conditional blocks, e.g. a license #if 0, can precede the guard.
+    guard_macro = ""
+    guard_open  = True
+
+    for token in _TOKENS.finditer(source):
+
+        directive = token.group("directive")
+        if directive is None:
+            continue
+
+        rest = token.group("rest")
+
+        if directive == "pragma":
+            continue
+
+        if directive == "define" and guard_macro:
+            # "#ifndef X" followed by "#define X" is an include guard,
+            # includes under it aren't conditional in practice.
+            if rest.split("(")[0].split()[:1] == [guard_macro]:
+                guard_depth = depth
+                guard_open  = False
+        guard_macro = ""
+
+        if directive in _INCLUDE_DIRECTIVES:
+            rest = rest.strip()
+            closing = {'"': '"', "<": ">"}.get(rest[:1])
+            end = rest.find(closing, 1) if closing else -1
+
+            if depth == 0:
+                guard_open = False
+
+            if end == -1:
+                # Include name is computed by a macro
+                needs_cpp = True
+                continue
+
+            if depth > guard_depth:
+                needs_cpp = True
+
+            includes.append((rest[1:end], closing == ">"))
+
+        elif directive in _OPEN_CONDITIONALS:
+            if depth == 0 and guard_open:
+                guard_macro = _guard_macro(directive, rest)
+            depth += 1
+
+        elif directive == "endif":
+            # Includes after the guard's own #endif are outside of it
+            if depth == guard_depth:
+                guard_depth = 0
+            depth = max(0, depth - 1)
+
+        elif depth == 0:
+            guard_open = False
+
+    return includes, needs_cpp
@@ -0,0 +1,585 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from array import array
+from enum import Enum
+from heapq import heapify, heappop, heappush
+
+class LayeringMethod(Enum):
+    LONGEST_PATH    = "longest-path"
+    COFFMAN_GRAHAM  = "coffman-graham"
+    NETWORK_SIMPLEX = "network-simplex"
+
+class LayerAssigner(ABC):
+    """ Strategy that puts vertices of an acyclic graph into layers numbered from 1.
+    Every edge (u,v) goes from a lower to a higher layer.
+    """
+
+    @abstractmethod
+    def assign(self, graph, topological_order: list[int]) -> array:
+        """ Returns: layer of every vertex.
+        """
+        raise NotImplementedError()
+
+class LongestPathAssigner(LayerAssigner):
+    """ Puts every vertex one layer above the highest of its in-neighbours,
+    so the number of layers is minimal. Top layers get wide and edges
+    from sources get long.
+    """
+
+    def assign(self, graph, topological_order: list[int]) -> array:
+        node2layer = array("i", [1]) * len(graph)
+        layer_of   = node2layer.__getitem__
+
+        # In-neighbours are all placed before the vertex in the order
+        for node in topological_order:
+            node2layer[node] = max(map(layer_of, graph.get_neighbors_in(node)), default=0) + 1
+
+        return node2layer
+
+class CoffmanGrahamAssigner(LayerAssigner):
+    """ Coffman-Graham layering, no layer holds more than width vertices.
+    Vertices are labelled so that ones with earlier labelled in-neighbours
+    come first, then layers are filled from the sinks up, highest label first.
+    width - square root of the vertex count by default.
+    Longest path layering is returned when time_budget seconds run out.
+    """
+
+    def __init__(self, width: int = None, time_budget: float = 2.0) -> None:
+        self.width       = width
+        self.time_budget = time_budget
+
+    def assign(self, graph, topological_order: list[int]) -> array:
+        n = len(graph)
+        if not topological_order:
+            return array("i", [1]) * n
+
+        deadline = time.perf_counter() + self.time_budget
+        width    = self.width or max(1, math.isqrt(n))
+
+        label = self.__label(graph, deadline)
+        if label is None:
+            return LongestPathAssigner().assign(graph, topological_order)
+
+        # Levels are counted from the sinks up
+        level      = array("i", bytes(4 * n))
+        succ_level = array("i", bytes(4 * n))
+        remaining  = array("i", (len(graph.get_neighbors_out(vtx)) for vtx in range(n)))
+        ready      = [(-label[vtx], vtx) for vtx in range(n) if remaining[vtx] == 0]
+        heapify(ready)
+
+        current, count = 1, 0
+        while ready:
+            _, vtx = heappop(ready)
+            if count == width or succ_level[vtx] >= current:
+                current, count = current + 1, 0
+
+            level[vtx] = current
+            count += 1
+
+            for vx_in in graph.get_neighbors_in(vtx):
+                succ_level[vx_in] = max(succ_level[vx_in], current)
+                remaining[vx_in] -= 1
+                if remaining[vx_in] == 0:
+                    heappush(ready, (-label[vx_in], vx_in))
+
+        return array("i", (current - lvl + 1 for lvl in level))
+
+    @staticmethod
+    def __label(graph, deadline: float) -> array:
+        """ Labels vertices in order of lexicographically smallest
+        decreasing sequence of their in-neighbour labels.
+        Returns: label of every vertex or None if deadline was reached.
+        """
+        n = len(graph)
+
+        label   = array("i", [-1]) * n
+        missing = array("i", (len(graph.get_neighbors_in(vtx)) for vtx in range(n)))
+        ready   = [((), vtx) for vtx in range(n) if missing[vtx] == 0]
+        heapify(ready)
+
+        next_label = 0
+        while ready:
+            if next_label & 0x3ff == 0 and time.perf_counter() > deadline:
+                return None
+
+            _, vtx = heappop(ready)
+            label[vtx] = next_label
+            next_label += 1
+
+            for vx_out in graph.get_neighbors_out(vtx):
+                missing[vx_out] -= 1
+                if missing[vx_out] == 0:
+                    key = tuple(sorted(map(label.__getitem__, graph.get_neighbors_in(vx_out)), reverse=True))
+                    heappush(ready, (key, vx_out))
+
+        return label
+
+class NetworkSimplexAssigner(LayerAssigner):
+    """ Network simplex layering of Gansner et al., minimizes the total span of
+    edges and with it the number of dummy vertices. Starts from the longest
+    path layering, which is kept if no feasible tree is found in time_budget
+    seconds. Otherwise the best layering found within the budget or
+    max_iterations pivots is returned. Vertices with as many in- as
+    out-edges are then moved to the least populated layer they fit in.
+    """
+
+    def __init__(self, time_budget: float = 2.0, max_iterations: int = None, balance: bool = True) -> None:
+        self.time_budget    = time_budget
+        self.max_iterations = max_iterations
+        self.balance        = balance
+
+    def assign(self, graph, topological_order: list[int]) -> array:
+        initial = LongestPathAssigner().assign(graph, topological_order)
+        if not topological_order:
+            return initial
+
+        deadline = time.perf_counter() + self.time_budget
+
+        simplex = _NetworkSimplex(graph, initial)
+        if not simplex.feasible_tree(deadline):
+            return initial
+
+        simplex.optimize(deadline, self.max_iterations)
+        rank = simplex.normalized_rank()
+
+        if self.balance:
+            _balance(graph, rank)
+        return rank
+
+class _NetworkSimplex:
+    """ Spanning forest of tight edges (span of exactly one layer) over a feasible
+    ranking, one tree per weakly connected component. Cut value of a tree edge
+    is the number of edges going from its tail component to its head component,
+    less the ones going back. For unit weights it is the sum of out-degree less
+    in-degree over the component below the edge, with the sign of the edge
+    direction, so all of them are recomputed in linear time after each pivot.
+    """
+
+    # Number of negative cut values compared when choosing the leaving edge
+    SEARCH_SIZE = 30
+
+    def __init__(self, graph, rank: array) -> None:
+        n = len(graph)
+
+        self.rank  = array("i", rank)
+        self.tails = array("i")
+        self.heads = array("i")
+
+        self.out_edges: list[list[int]] = [[] for _ in range(n)]
+        self.in_edges : list[list[int]] = [[] for _ in range(n)]
+
+        for u in range(n):
+            for v in graph.get_neighbors_out(u):
+                self.out_edges[u].append(len(self.tails))
+                self.in_edges[v].append(len(self.tails))
+                self.tails.append(u)
+                self.heads.append(v)
+
+        self.degree_balance = array("i", (len(self.out_edges[vtx]) - len(self.in_edges[vtx]) for vtx in range(n)))
+
+        self.is_tree_edge = bytearray(len(self.tails))
+        self.tree_edges: list[list[int]] = [[] for _ in range(n)]
+
+        # Rooted forest, filled by __build_forest()
+        self.parent_edge = array("i", [-1]) * n
+        self.root        = array("i", range(n))
+        self.tree_size   = array("i", bytes(4 * n))
+        self.by_number   = array("i", bytes(4 * n))
+        self.low         = array("i", bytes(4 * n))
+        self.lim         = array("i", bytes(4 * n))
+        self.cut_value   = array("i", bytes(4 * len(self.tails)))
+
+    def slack(self, edge: int) -> int:
+        return self.rank[self.heads[edge]] - self.rank[self.tails[edge]] - 1
+
+    def __add_tree_edge(self, edge: int) -> None:
+        self.is_tree_edge[edge] = 1
+        self.tree_edges[self.tails[edge]].append(edge)
+        self.tree_edges[self.heads[edge]].append(edge)
+
+    def __remove_tree_edge(self, edge: int) -> None:
+        self.is_tree_edge[edge] = 0
+        self.tree_edges[self.tails[edge]].remove(edge)
+        self.tree_edges[self.heads[edge]].remove(edge)
+
+    def feasible_tree(self, deadline: float) -> bool:
+        """ Splits the graph into trees of tight edges, then repeatedly takes the
+        smallest tree and shifts it by the smallest slack of an edge leaving it,
+        so that edge joins it with another tree. Vertices of the smaller tree
+        move, each vertex is scanned O(log V) times.
+        Returns: False if deadline was reached.
+        """
+        n = len(self.rank)
+
+        tree_of = array("i", [-1]) * n
+        members: dict[int, list[int]] = {}
+
+        for start in range(n):
+            if tree_of[start] == -1:
+                tree_of[start] = start
+                members[start] = self.__grow(start, tree_of)
+
+        smallest = [(len(vertices), tree) for tree, vertices in members.items()]
+        heapify(smallest)
+
+        while smallest:
+            if time.perf_counter() > deadline:
+                return False
+
+            size, tree = heappop(smallest)
+            if members.get(tree) is None or len(members[tree]) != size:
+                continue
+
+            best_edge, best_slack = -1, 0
+            for vtx in members[tree]:
+                for edges, ends in ((self.out_edges[vtx], self.heads), (self.in_edges[vtx], self.tails)):
+                    for edge in edges:
+                        if tree_of[ends[edge]] != tree and (best_edge == -1 or self.slack(edge) < best_slack):
+                            best_edge, best_slack = edge, self.slack(edge)
+
+            # Tree spans its whole component
+            if best_edge == -1:
+                continue
+
+            leaves = tree_of[self.tails[best_edge]] == tree
+            delta  = best_slack if leaves else -best_slack
+            for vtx in members[tree]:
+                self.rank[vtx] += delta
+
+            self.__add_tree_edge(best_edge)
+
+            other = tree_of[self.heads[best_edge] if leaves else self.tails[best_edge]]
+            for vtx in members[tree]:
+                tree_of[vtx] = other
+            members[other].extend(members.pop(tree))
+            heappush(smallest, (len(members[other]), other))
+
+        self.__build_forest()
+        return True
+
+    def __grow(self, start: int, tree_of: array) -> list[int]:
+        """ Returns: vertices reached from start over tight edges, which are
+        added to the tree.
+        """
+        members = [start]
+        for vtx in members:
+            for edges, ends in ((self.out_edges[vtx], self.heads), (self.in_edges[vtx], self.tails)):
+                for edge in edges:
+                    other = ends[edge]
+                    if tree_of[other] == -1 and self.slack(edge) == 0:
+                        tree_of[other] = start
+                        members.append(other)
+                        self.__add_tree_edge(edge)
+        return members
+
+    def __build_forest(self) -> None:
+        """ Roots every tree, numbers vertices in postorder (lim) with the lowest
+        number in their subtree (low), and computes cut values.
+        """
+        n = len(self.rank)
+
+        visited = bytearray(n)
+        balance = array("i", self.degree_balance)
+        counter = 0
+
+        for root in range(n):
+            if visited[root]:
+                continue
+
+            first   = counter
+            counter = self.__number_subtree(root, -1, counter)
+            self.tree_size[root] = counter - first
+
+            for vtx in self.__subtree(root):
+                visited[vtx]   = 1
+                self.root[vtx] = root
+
+                edge = self.parent_edge[vtx]
+                if edge != -1:
+                    parent = self.tails[edge] + self.heads[edge] - vtx
+                    balance[parent] += balance[vtx]
+                    self.cut_value[edge] = balance[vtx] if self.tails[edge] == vtx else -balance[vtx]
+
+    def __number_subtree(self, top: int, parent_edge: int, counter: int) -> int:
+        """ Sets parent edges, low and lim of vertices in the subtree of top,
+        numbering them from counter on. Numbers are the reversed preorder,
+        so every subtree gets a range of numbers with its top last.
+        Returns: next free number.
+        """
+        tails, heads      = self.tails, self.heads
+        parent, by_number = self.parent_edge, self.by_number
+        low, lim          = self.low, self.lim
+
+        parent[top] = parent_edge
+        preorder    = []
+        stack       = [top]
+
+        while stack:
+            vtx = stack.pop()
+            preorder.append(vtx)
+            vtx_parent = parent[vtx]
+            for edge in self.tree_edges[vtx]:
+                if edge != vtx_parent:
+                    child = tails[edge] + heads[edge] - vtx
+                    parent[child] = edge
+                    stack.append(child)
+
+        last = counter + len(preorder) - 1
+        for i, vtx in enumerate(preorder):
+            low[vtx] = lim[vtx] = last - i
+            by_number[last - i] = vtx
+
+        # Children come before their parents in numbering order
+        for number in range(counter, last):
+            vtx  = by_number[number]
+            edge = parent[vtx]
+            up   = tails[edge] + heads[edge] - vtx
+            if low[vtx] < low[up]:
+                low[up] = low[vtx]
+
+        return last + 1
+
+    def __subtree(self, top: int) -> array:
+        """ Returns: vertices in the subtree of top, children before their parents.
+        """
+        return self.by_number[self.low[top]:self.lim[top] + 1]
+
+    def __parent(self, vtx: int) -> int:
+        edge = self.parent_edge[vtx]
+        return self.tails[edge] + self.heads[edge] - vtx
+
+    def __in_subtree(self, vtx: int, top: int) -> bool:
+        return self.low[top] <= self.lim[vtx] <= self.lim[top]
+
+    def __enter_edge(self, below: int, tail_below: bool) -> int:
+        """ Non-tree edge with the smallest slack going from the head component
+        to the tail component of the parent edge of vertex below. Only edges
+        of the subtree of below are looked at.
+        """
+        best_edge, best_slack = -1, 0
+        low, lim = self.low[below], self.lim[below]
+
+        # Into the subtree if it holds the tail, out of it otherwise
+        edge_lists, ends = (self.in_edges, self.tails) if tail_below else (self.out_edges, self.heads)
+
+        for vtx in self.__subtree(below):
+            for edge in edge_lists[vtx]:
+                if self.is_tree_edge[edge] or low <= self.lim[ends[edge]] <= lim:
+                    continue
+
+                slack = self.slack(edge)
+                if best_edge == -1 or slack < best_slack:
+                    best_edge, best_slack = edge, slack
+                    if slack == 0:
+                        return best_edge
+
+        return best_edge
+
+    def __update_cut_values(self, vtx: int, other: int, cut_value: int, direction: bool, path: set[int]) -> int:
+        """ Adds the cut value of the leaving edge to tree edges on the path from
+        vtx up to the common ancestor with other, the sign follows edge direction.
+        Vertices of the path, without the ancestor, are added to path.
+        Returns: the common ancestor.
+        """
+        while not self.__in_subtree(other, vtx):
+            path.add(vtx)
+            edge = self.parent_edge[vtx]
+            if (vtx == self.tails[edge]) == direction:
+                self.cut_value[edge] += cut_value
+            else:
+                self.cut_value[edge] -= cut_value
+            vtx = self.__parent(vtx)
+        return vtx
+
+    def __renumber(self, top: int, changed: set[int]) -> None:
+        """ Numbers the subtree of top in postorder again after an exchange inside
+        it. Subtrees of vertices that aren't in changed keep their shape, their
+        block of numbers is only moved.
+        """
+        tails, heads      = self.tails, self.heads
+        parent, by_number = self.parent_edge, self.by_number
+        low, lim          = self.low, self.lim
+
+        base    = low[top]
+        old     = by_number[base:lim[top] + 1]
+        counter = base
+        work    = [(top, iter(self.tree_edges[top]))]
+
+        while work:
+            vtx, edges = work[-1]
+            for edge in edges:
+                if edge == parent[vtx]:
+                    continue
+
+                child = tails[edge] + heads[edge] - vtx
+                parent[child] = edge
+
+                if child in changed:
+                    low[child] = counter
+                    work.append((child, iter(self.tree_edges[child])))
+                    break
+
+                size  = lim[child] - low[child] + 1
+                block = old[low[child] - base:low[child] - base + size]
+                by_number[counter:counter + size] = block
+
+                offset = counter - low[child]
+                if offset:
+                    for moved in block:
+                        low[moved] += offset
+                        lim[moved] += offset
+                counter += size
+            else:
+                work.pop()
+                lim[vtx] = counter
+                by_number[counter] = vtx
+                counter += 1
+
+    def __exchange(self, leave_edge: int, enter_edge: int, below: int, tail_below: bool) -> None:
+        # Tighten the entering edge by moving the component below,
+        # or the rest of the tree the other way if it's smaller
+        delta = self.slack(enter_edge)
+        if tail_below:
+            delta = -delta
+
+        size = self.lim[below] - self.low[below] + 1
+        if 2 * size <= self.tree_size[self.root[below]]:
+            for vtx in self.__subtree(below):
+                self.rank[vtx] += delta
+        else:
+            root = self.root[below]
+            for part in (self.by_number[self.low[root]:self.low[below]], self.by_number[self.lim[below] + 1:self.lim[root] + 1]):
+                for vtx in part:
+                    self.rank[vtx] -= delta
+
+        # Cycle closed by the entering edge goes through the common ancestor of
+        # its ends. Only cut values on the cycle change, and only subtrees of
+        # the cycle's vertices change shape.
+        cut_value = self.cut_value[leave_edge]
+        tail, head = self.tails[enter_edge], self.heads[enter_edge]
+        cycle: set[int] = set()
+
+        ancestor = self.__update_cut_values(tail, head, cut_value, True, cycle)
+        if self.__update_cut_values(head, tail, cut_value, False, cycle) != ancestor:
+            raise RuntimeError("Entering edge doesn't close a cycle with the leaving edge")
+
+        self.cut_value[enter_edge] = -cut_value
+        self.cut_value[leave_edge] = 0
+
+        self.__remove_tree_edge(leave_edge)
+        self.__add_tree_edge(enter_edge)
+        self.__renumber(ancestor, cycle)
+
+    def optimize(self, deadline: float, max_iterations: int = None) -> None:
+        """ Exchanges tree edges with a negative cut value until there
+        are none left, the deadline or max_iterations pivots.
+        """
+        n          = len(self.rank)
+        search     = 0
+        iterations = 0
+
+        while max_iterations is None or iterations < max_iterations:
+            if iterations & 0xf == 0 and time.perf_counter() > deadline:
+                return
+
+            # Most negative of the first few tree edges with a negative cut value
+            below, found = -1, 0
+            for step in range(n):
+                vtx  = (search + step) % n
+                edge = self.parent_edge[vtx]
+                if edge != -1 and self.cut_value[edge] < 0:
+                    if below == -1 or self.cut_value[edge] < self.cut_value[self.parent_edge[below]]:
+                        below = vtx
+                    found += 1
+                    if found == self.SEARCH_SIZE:
+                        break
+            search = (search + step + 1) % n
+
+            if below == -1:
+                return
+
+            leave_edge = self.parent_edge[below]
+            tail_below = self.tails[leave_edge] == below
+            enter_edge = self.__enter_edge(below, tail_below)
+            if enter_edge == -1:
+                return
+
+            self.__exchange(leave_edge, enter_edge, below, tail_below)
+            iterations += 1
+
+    def normalized_rank(self) -> array:
+        """ Returns: ranks shifted so each component starts at layer 1.
+        """
+        lowest = {}
+        for vtx, root in enumerate(self.root):
+            lowest[root] = min(lowest.get(root, self.rank[vtx]), self.rank[vtx])
+
+        return array("i", (rank - lowest[root] + 1 for rank, root in zip(self.rank, self.root)))
+
+def _balance(graph, node2layer: array) -> None:
+    """ Moves vertices with equal in- and out-degree into the least populated
+    layer between their neighbours, this keeps the total edge span.
+    """
+    layer_sizes: dict[int, int] = {}
+    for layer in node2layer:
+        layer_sizes[layer] = layer_sizes.get(layer, 0) + 1
+
+    for vtx in range(len(graph)):
+        vx_in, vx_out = graph.get_neighbors_in(vtx), graph.get_neighbors_out(vtx)
+        if len(vx_in) != len(vx_out):
+            continue
+
+        low  = max((node2layer[u] for u in vx_in), default=0) + 1
+        high = min((node2layer[v] for v in vx_out), default=max(layer_sizes) + 1) - 1
+        current = node2layer[vtx]
+
+        best = min(range(low, high + 1), key=lambda layer: (layer_sizes.get(layer, 0), layer != current))
+        # Moving only helps if the other layer stays smaller than this one
+        if best != current and layer_sizes.get(best, 0) + 1 < layer_sizes[current]:
+            layer_sizes[current] -= 1
+            layer_sizes[best] = layer_sizes.get(best, 0) + 1
+            node2layer[vtx] = best
+
+def create_layer_assigner(kind: LayeringMethod, time_budget: float = 2.0) -> LayerAssigner:
+    if kind == LayeringMethod.COFFMAN_GRAHAM:
+        return CoffmanGrahamAssigner(time_budget=time_budget)
+    if kind == LayeringMethod.NETWORK_SIMPLEX:
+        return NetworkSimplexAssigner(time_budget=time_budget)
+    return LongestPathAssigner()
+
+def count_dummy_vertices(graph, node2layer: array) -> int:
+    """ Returns: number of dummy vertices proper layering adds to the graph.
+    """
+    return sum(
+        max(abs(node2layer[v] - node2layer[u]) - 1, 0)
+        for u in range(len(graph))
+        for v in graph.get_neighbors_out(u)
+    )
+
+def layering_report(graph, topological_order: list[int], time_budget: float = 2.0) -> list[dict]:
+    """ Runs every layering method on the same acyclic graph.
+    Returns: layer count, widest layer, dummy vertices, dummy vertices
+    saved against longest path layering and seconds spent, per method.
+    """
+    rows = []
+    for kind in LayeringMethod:
+        start      = time.perf_counter()
+        node2layer = create_layer_assigner(kind, time_budget).assign(graph, topological_order)
+        elapsed    = time.perf_counter() - start
+
+        layer_sizes: dict[int, int] = {}
+        for layer in node2layer:
+            layer_sizes[layer] = layer_sizes.get(layer, 0) + 1
+
+        rows.append({
+            "method"  : kind.value,
+            "layers"  : len(layer_sizes),
+            "width"   : max(layer_sizes.values(), default=0),
+            "dummies" : count_dummy_vertices(graph, node2layer),
+            "seconds" : elapsed,
+        })
+
+    for row in rows:
+        row["saved"] = rows[0]["dummies"] - row["dummies"]
+    return rows
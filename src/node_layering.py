@@ -1,81 +1,728 @@
+import sys
+import time
+from array import array
+from collections.abc import Mapping
+from typing import Iterable, Iterator, Tuple
 from src.ds.graph import *
+from src.layer_assignment import LayerAssigner, LongestPathAssigner
 
 class Layer:
+    """ Slots of a single layer, a view into the flat slot array of the layering.
+    Dummy vertices take slots with -1.
+    """
 
-    def __init__(self, layer_level) -> None:
+    def __init__(self, layer_level, nodes: memoryview = None, x: memoryview = None) -> None:
         self.level = layer_level
-        self.nodes: list[int] = []        
+        self.nodes = nodes if nodes is not None else memoryview(array("i"))
+        # Horizontal coordinate of every slot, in slots
+        self.x     = x if x is not None else memoryview(array("d", range(len(self.nodes))))
+
+class _EdgeChains(Mapping):
+    """ Dummy slots of long edges going out of a single vertex, target -> slots.
+    """
+
+    def __init__(self, chains: "DummyChains", first: int, last: int) -> None:
+        self.__chains = chains
+        self.__first  = first
+        self.__last   = last
+
+    def __find(self, target: int) -> int:
+        targets = self.__chains.targets
+        for edge in range(self.__first, self.__last):
+            if targets[edge] == target:
+                return edge
+        return -1
+
+    def __getitem__(self, target: int) -> memoryview:
+        edge = self.__find(target)
+        if edge == -1:
+            raise KeyError(target)
+        return self.__chains.slots_of(edge)
+
+    def __contains__(self, target: object) -> bool:
+        return self.__find(target) != -1
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.__chains.targets[self.__first:self.__last])
+
+    def __len__(self) -> int:
+        return self.__last - self.__first
+
+    def __repr__(self) -> str:
+        return repr({target: list(slots) for target, slots in self.items()})
+
+class DummyChains(Mapping):
+    """ Dummy vertices of every edge spanning more than one layer, stored in flat
+    arrays. Edge i goes from sources[i] to targets[i], its dummy vertices take
+    slots[offsets[i]:offsets[i+1]], one per crossed layer from the lowest level up.
+    Reads as vertex -> target -> slots, like nested dicts of lists.
+    """
+
+    def __init__(self,
+                num_vertices: int,
+                sources: array, targets: array,
+                offsets: array, slots: array) -> None:
+        self.sources, self.targets = sources, targets
+        self.offsets, self.slots   = offsets, slots
+
+        # Edges of one source are contiguous, vertex -> range of its edges
+        self.__first = array("i", bytes(4 * num_vertices))
+        self.__count = array("i", bytes(4 * num_vertices))
+
+        for edge in range(len(sources) - 1, -1, -1):
+            self.__first[sources[edge]]  = edge
+            self.__count[sources[edge]] += 1
+
+    def slots_of(self, edge: int) -> memoryview:
+        return memoryview(self.slots)[self.offsets[edge]:self.offsets[edge + 1]]
+
+    def __getitem__(self, vertex: int) -> _EdgeChains:
+        if not vertex in self:
+            raise KeyError(vertex)
+        first = self.__first[vertex]
+        return _EdgeChains(self, first, first + self.__count[vertex])
+
+    def __contains__(self, vertex: object) -> bool:
+        return isinstance(vertex, int) and 0 <= vertex < len(self.__count) and self.__count[vertex] != 0
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(dict.fromkeys(self.sources))
+
+    def __len__(self) -> int:
+        return sum(1 for count in self.__count if count)
+
+    def __repr__(self) -> str:
+        return repr({vertex: self[vertex] for vertex in self})
+
+class _SlotCursors:
+    """ Next free slot of every layer. Cursors are little endian fields of
+    ints covering BLOCK layers each, so slots of a chain are read with one
+    shift and taken with one addition per block instead of one per layer.
+    """
+
+    BLOCK = 64
+
+    def __init__(self, layer_sizes: array) -> None:
+        self.__num_layers = len(layer_sizes)
+        self.__item_size  = layer_sizes.itemsize
+
+        sizes = array(layer_sizes.typecode, layer_sizes)
+        if sys.byteorder != "little":
+            sizes.byteswap()
+        block_size    = self.BLOCK * self.__item_size
+        data          = sizes.tobytes()
+        self.__blocks = [int.from_bytes(data[i:i+block_size], "little") for i in range(0, len(data), block_size)]
+
+        # Run of n layers within a block -> mask of its fields, a one in each of them
+        self.__masks = [(1 << 8 * self.__item_size * n) - 1 for n in range(self.BLOCK + 1)]
+        self.__ones  = [mask // self.__masks[1] for mask in self.__masks]
+
+    def take(self, low: int, high: int, slots: array) -> None:
+        """ Appends the next free slot of layers low to high-1 to
+        slots and moves their cursors past it.
+        """
+        blocks, masks, ones = self.__blocks, self.__masks, self.__ones
+        bits  = 8 * self.__item_size
+        start = len(slots)
+
+        while low < high:
+            block, first = divmod(low, self.BLOCK)
+            count        = min(high - low, self.BLOCK - first)
+            slots.frombytes(((blocks[block] >> bits * first) & masks[count]).to_bytes(count * self.__item_size, "little"))
+            blocks[block] += ones[count] << bits * first
+            low += count
+
+        if sys.byteorder != "little":
+            view = slots[start:]
+            view.byteswap()
+            slots[start:] = view
+
+    def to_array(self) -> array:
+        """ Returns: next free slot of every layer.
+        """
+        block_size = self.BLOCK * self.__item_size
+        data       = b"".join(block.to_bytes(block_size, "little") for block in self.__blocks)
+        cursors    = array("i", data[:self.__num_layers * self.__item_size])
+        if sys.byteorder != "little":
+            cursors.byteswap()
+        return cursors
+
+class _SlotGraph:
+    """ Order of slots in every layer of a proper layered graph, kept as
+    positions in flat arrays. Neighbours in the layer above and below are
+    compressed sparse rows indexed by slot.
+    """
+
+    def __init__(self, layer_offsets: array, slots: array, segments: Tuple[array, array]) -> None:
+        upper, lower = segments
+        num_slots    = len(slots)
+
+        self.layer_offsets = layer_offsets
+        self.position      = array("i", bytes(4 * num_slots))
+        self.order: list[array] = []
+
+        for layer in range(len(layer_offsets) - 1):
+            start, end = layer_offsets[layer], layer_offsets[layer+1]
+            self.order.append(array("i", range(start, end)))
+            self.position[start:end] = array("i", range(end - start))
+
+        self.up_offsets, self.up_slots     = _compress_slots(num_slots, lower, upper)
+        self.down_offsets, self.down_slots = _compress_slots(num_slots, upper, lower)
+
+    @property
+    def num_pairs(self) -> int:
+        return max(len(self.order) - 1, 0)
+
+    def order_copy(self) -> list[array]:
+        return [array("i", layer_order) for layer_order in self.order]
+
+    def sweep(self, downwards: bool, median: bool, deadline: float, crossings: array) -> bool:
+        """ Sorts every layer but the first one of the sweep by neighbour
+        positions in the previous layer of the sweep. Crossings of the layer
+        pairs around a sorted layer are set to -1, they have to be counted again.
+        Returns: False if deadline was reached.
+        """
+        if downwards:
+            layers, offsets, neighbors = range(1, len(self.order)), self.up_offsets, self.up_slots
+        else:
+            layers, offsets, neighbors = range(len(self.order) - 2, -1, -1), self.down_offsets, self.down_slots
+
+        position = self.position
+        position_of = position.__getitem__
+
+        for layer in layers:
+            if time.perf_counter() > deadline:
+                return False
+
+            keys = {}
+            for slot in self.order[layer]:
+                start, end = offsets[slot], offsets[slot+1]
+                if start == end:
+                    # Slot without neighbours stays where it is
+                    keys[slot] = position[slot]
+                elif median:
+                    neighbor_pos = sorted(map(position_of, neighbors[start:end]))
+                    keys[slot] = neighbor_pos[(end - start - 1) // 2]
+                else:
+                    keys[slot] = sum(map(position_of, neighbors[start:end])) / (end - start)
+
+            # Stable, ties keep their current order
+            layer_order = array("i", sorted(self.order[layer], key=keys.__getitem__))
+            for pos, slot in enumerate(layer_order):
+                position[slot] = pos
+            self.order[layer] = layer_order
+
+            for pair in (layer - 1, layer):
+                if 0 <= pair < len(crossings):
+                    crossings[pair] = -1
+
+        return True
+
+    def count_pair(self, layer: int) -> int:
+        """ Counts crossings between layer and the next one. Segments are taken
+        by upper then lower position, a segment crosses every earlier one
+        with a greater lower position, counted with a Fenwick tree.
+        """
+        position    = self.position
+        position_of = position.__getitem__
+        offsets, neighbors = self.down_offsets, self.down_slots
+
+        crossings = 0
+        count = 0
+        width = len(self.order[layer+1])
+        tree  = array("i", bytes(4 * (width + 1)))
+
+        for slot in self.order[layer]:
+            start, end = offsets[slot], offsets[slot+1]
+            if start == end:
+                continue
+
+            lower_pos = sorted(map(position_of, neighbors[start:end])) if end - start > 1 else (position[neighbors[start]],)
+            for pos in lower_pos:
+                # Earlier segments with lower position <= this one
+                index  = pos + 1
+                before = 0
+                while index > 0:
+                    before += tree[index]
+                    index  &= index - 1
+                crossings += count - before
+                count     += 1
+
+                index = pos + 1
+                while index <= width:
+                    tree[index] += 1
+                    index += index & -index
+
+        return crossings
+
+    def count_pairs(self, crossings: array, deadline: float = None) -> bool:
+        """ Counts crossings of every layer pair that has -1 in crossings.
+        Returns: False if deadline was reached before all of them were counted.
+        """
+        for layer, count in enumerate(crossings):
+            if count != -1:
+                continue
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            crossings[layer] = self.count_pair(layer)
+        return True
+
+    def count_crossings(self) -> int:
+        """ Counts crossings between every pair of neighbouring layers.
+        """
+        return sum(self.count_pair(layer) for layer in range(self.num_pairs))
+
+def _compress_slots(num_slots: int, sources: array, targets: array) -> Tuple[array, array]:
+    """ Returns: offsets and targets of sources' neighbours.
+    """
+    offsets = array("i", bytes(4 * (num_slots + 1)))
+    for slot in sources:
+        offsets[slot + 1] += 1
+    for slot in range(num_slots):
+        offsets[slot + 1] += offsets[slot]
+
+    neighbors = array("i", bytes(4 * len(sources)))
+    next_pos  = offsets[:-1]
+    for source, target in zip(sources, targets):
+        neighbors[next_pos[source]] = target
+        next_pos[source] += 1
+
+    return offsets, neighbors
+
+def _type1_conflicts(slot_graph: _SlotGraph, slots: array) -> set[int]:
+    """ Marks segments that cross an inner segment, one between two dummy
+    vertices, so long edges stay straight. Segment (u,v) with u having the
+    smaller slot id is stored as u * number of slots + v.
+    """
+    num_slots = len(slots)
+    position  = slot_graph.position
+    up_offsets, up_slots = slot_graph.up_offsets, slot_graph.up_slots
+    marked: set[int] = set()
+
+    for layer in range(len(slot_graph.order) - 1):
+        upper, lower = slot_graph.order[layer], slot_graph.order[layer+1]
+        k0, scanned = 0, 0
+
+        for l1, vtx in enumerate(lower):
+            inner_upper = -1
+            if slots[vtx] == -1:
+                for u in up_slots[up_offsets[vtx]:up_offsets[vtx+1]]:
+                    if slots[u] == -1:
+                        inner_upper = u
+
+            if inner_upper == -1 and l1 != len(lower) - 1:
+                continue
+
+            k1 = position[inner_upper] if inner_upper != -1 else len(upper) - 1
+            for w in lower[scanned:l1+1]:
+                for u in up_slots[up_offsets[w]:up_offsets[w+1]]:
+                    inner = slots[u] == -1 and slots[w] == -1
+                    if not inner and (position[u] < k0 or position[u] > k1):
+                        marked.add(min(u, w) * num_slots + max(u, w))
+            scanned, k0 = l1 + 1, k1
+
+    return marked
+
+def _align_and_compact(layers: list[array], position: array,
+                       offsets: array, neighbors: array,
+                       marked: set[int], num_slots: int) -> array:
+    """ One of the four Brandes-Koepf layouts. Layers are given in the order they're
+    processed and slots of each from left to right, position is the one of this
+    direction. Every slot is aligned with a median neighbour in the previous
+    layer, unless the segment is marked or crosses an earlier alignment. Blocks
+    of aligned slots are then placed as far left as the slots to their left allow.
+    Returns: coordinate of every slot, None if blocks can't be ordered.
+    """
+    root  = array("i", range(num_slots))
+    align = array("i", range(num_slots))
+    right = array("i", [-1]) * num_slots
+
+    for layer in layers:
+        for left, vtx in zip(layer, layer[1:]):
+            right[left] = vtx
+
+    for layer in layers[1:]:
+        r = -1
+        for vtx in layer:
+            start, end = offsets[vtx], offsets[vtx+1]
+            if start == end:
+                continue
+
+            if end - start == 1:
+                medians = (neighbors[start],)
+            else:
+                ordered = sorted(neighbors[start:end], key=position.__getitem__)
+                middle  = (end - start - 1) // 2
+                medians = ordered[middle:middle + 2] if (end - start) % 2 == 0 else (ordered[middle],)
+
+            for u in medians:
+                segment = u * num_slots + vtx if u < vtx else vtx * num_slots + u
+                if segment not in marked and r < position[u]:
+                    align[u]   = vtx
+                    root[vtx]  = root[u]
+                    align[vtx] = root[vtx]
+                    r = position[u]
+                    break
+
+    # Block of a slot's left neighbour has to be placed before its own
+    indegree = array("i", bytes(4 * num_slots))
+    for vtx in right:
+        if vtx != -1:
+            indegree[root[vtx]] += 1
+
+    x     = array("d", bytes(8 * num_slots))
+    ready = [vtx for vtx in range(num_slots) if root[vtx] == vtx and indegree[vtx] == 0]
+    for block in ready:
+        vtx = block
+        while True:
+            next_vtx = right[vtx]
+            if next_vtx != -1:
+                next_block = root[next_vtx]
+                if x[next_block] < x[block] + 1:
+                    x[next_block] = x[block] + 1
+                indegree[next_block] -= 1
+                if indegree[next_block] == 0:
+                    ready.append(next_block)
+            vtx = align[vtx]
+            if vtx == block:
+                break
+
+    if len(ready) != sum(1 for vtx in range(num_slots) if root[vtx] == vtx):
+        return None
+
+    return array("d", map(x.__getitem__, root))
+
+def _brandes_koepf(slot_graph: _SlotGraph, slots: array) -> array:
+    """ Brandes-Koepf coordinate assignment. Four layouts are aligned to upper or
+    lower neighbours, leftmost or rightmost, and each vertex takes the average
+    of its two median coordinates. Runs in time linear in the number of slots
+    and segments, sorting of neighbours aside.
+    Returns: coordinate of every slot, at least one apart within a layer.
+    """
+    num_slots = len(slots)
+    order     = slot_graph.order
+    if num_slots == 0:
+        return array("d")
+
+    marked   = _type1_conflicts(slot_graph, slots)
+    mirrored = array("i", bytes(4 * num_slots))
+    for layer_order in order:
+        for pos, slot in enumerate(layer_order):
+            mirrored[slot] = len(layer_order) - 1 - pos
+
+    layouts = []
+    for downwards in (True, False):
+        layers = order if downwards else order[::-1]
+        offsets, neighbors = ((slot_graph.up_offsets, slot_graph.up_slots) if downwards else
+                              (slot_graph.down_offsets, slot_graph.down_slots))
+
+        for leftmost in (True, False):
+            if leftmost:
+                x = _align_and_compact(layers, slot_graph.position, offsets, neighbors, marked, num_slots)
+            else:
+                x = _align_and_compact([layer[::-1] for layer in layers], mirrored, offsets, neighbors, marked, num_slots)
+            if x is None:
+                return array("d", slot_graph.position)
+            if not leftmost:
+                x = array("d", map(float.__neg__, x))
+            layouts.append((leftmost, x))
+
+    # Align every layout with the narrowest one, at its left or right side
+    bounds    = [(min(x), max(x)) for _, x in layouts]
+    narrowest = min(bounds, key=lambda bound: bound[1] - bound[0])
+    for i, (leftmost, x) in enumerate(layouts):
+        shift = narrowest[0] - bounds[i][0] if leftmost else narrowest[1] - bounds[i][1]
+        layouts[i] = array("d", map(shift.__add__, x))
+
+    coords = array("d", ((a + b + c + d - min(a, b, c, d) - max(a, b, c, d)) / 2
+                         for a, b, c, d in zip(*layouts)))
+
+    # Averaging can bring neighbours closer than one slot apart
+    for layer_order in order:
+        for left, slot in zip(layer_order, layer_order[1:]):
+            if coords[slot] < coords[left] + 1:
+                coords[slot] = coords[left] + 1
+
+    lowest = min(coords)
+    return array("d", map((-lowest).__add__, coords))
 
 class Layering:
+    """ Layering over flat int arrays. Layer slots of all layers are
+    kept in one array, grouped by layer, real vertices of a layer come first and
+    dummy vertices (-1) after them. Layer and DummyChains are views of the arrays.
+    """
 
     @property
-    def raw_node_layers(self) -> list[int]:
+    def raw_node_layers(self) -> array:
         return self.__node2layer
 
     @property
     def layers(self) -> list[Layer]:
         return self.__layers
 
-    def __init__(self, graph: DirectedGraph, topological_order: list[int]) -> None:
-          
+    def __init__(self, graph: DirectedGraph, topological_order: list[int], assigner: LayerAssigner = None) -> None:
+        """ assigner - strategy that computes layers, longest path layering by default.
+        """
         self.graph                   = graph
         self.topological_order       = topological_order
+        self.assigner                = assigner or LongestPathAssigner()
         self.__layers: list[Layer]   = []
-        self.__node2layer: list[int] = []
-        
+        self.__node2layer            = array("i")
+
+        # Layer i owns slots[layer_offsets[i]:layer_offsets[i+1]]
+        self.__layer_offsets = array("i", [0])
+        self.__slots         = array("i")
+        self.__slot_x        = array("d")
+        self.__real_sizes    = array("i")
+
         # vtx_id -> child_vtx -> single layer dummy vertex edges
-        self.dummy_traversing_edges: dict[int, dict[list[int]]] = {}
+        self.dummy_traversing_edges: DummyChains = DummyChains(0, array("i"), array("i"), array("i", [0]), array("i"))
+        # Graph whose edges got dummy vertices
+        self.__proper_graph = graph
 
 
+    @classmethod
+    def from_node_layers(cls, graph: DirectedGraph, topological_order: list[int], node_layers: Iterable[int]) -> "Layering":
+        """ Restores layering computed earlier, e.g. one stored in a snapshot.
+        """
+        layering = cls(graph, topological_order)
+        layering.__node2layer = array("i", node_layers)
+        if layering.__node2layer:
+            layering.__build_layers()
+        return layering
+
     def compute_layers(self):
-        """ Computes min-height layers for vertices sorted in topological order.
+        """ Computes layers for vertices sorted in topological order.
         """
-        self.__node2layer = [1]*(len(self.graph))
+        self.__node2layer = self.assigner.assign(self.graph, self.topological_order)
+        self.__build_layers()
 
-        for node in self.topological_order:
+    def __build_layers(self):
+        # Counting sort of vertices by layer, vertices keep their id order within a layer.
+        highest_layer = max(self.__node2layer)
 
-            for node_out in self.graph.get_neighbors_out(node):
+        layer_sizes = array("i", bytes(4 * highest_layer))
+        for layer in self.__node2layer:
+            layer_sizes[layer-1] += 1
 
-                self.__node2layer[node_out] = max(
-                    self.__node2layer[node_out],
-                    self.__node2layer[node] + 1
-                ) 
-        
-        # Convert raw node 2 layer list to list of Layer instances.
-        highest_layer = max(self.__node2layer)
-        for layer in range(1, highest_layer+1):
-            self.__layers.append(
-                Layer(layer)
-            )
+        self.__real_sizes = layer_sizes
+        self.__set_slots(layer_sizes)
+
+    def __set_slots(self, layer_sizes: array):
+        """ Lays out real vertices of every layer at the start of its slots,
+        the remaining slots hold dummy vertices.
+        """
+        offsets = array("i", [0]) * (len(layer_sizes) + 1)
+        for layer, size in enumerate(layer_sizes):
+            offsets[layer+1] = offsets[layer] + size
 
+        slots    = array("i", [-1]) * offsets[-1]
+        next_pos = offsets[:-1]
         for node_id, layer in enumerate(self.__node2layer):
-            self.__layers[layer-1].nodes.append(node_id)
-
-    def proper_layering(self):
-        for current_layer in self.__layers:
-            for vtx in current_layer.nodes:
-                for child_vtx in self.graph.get_neighbors_out(vtx):
-                    target_level = self.__node2layer[child_vtx]
-                    if abs(target_level - current_layer.level) > 1:
-                        if not vtx in self.dummy_traversing_edges:
-                            self.dummy_traversing_edges[vtx] = {}
-
-                        if not child_vtx in self.dummy_traversing_edges[vtx]:
-                            self.dummy_traversing_edges[vtx][child_vtx] = []
-
-                        for layer in range(
-                            min(target_level, current_layer.level)+1,
-                            max(target_level, current_layer.level)
-                        ):
-
-                            self.dummy_traversing_edges[vtx][child_vtx].append(len(self.__layers[layer-1].nodes))
-                            self.__layers[layer-1].nodes.append(-1)
-                        
+            slots[next_pos[layer-1]] = node_id
+            next_pos[layer-1] += 1
+
+        self.__use_slots(offsets, slots)
+
+    def __use_slots(self, offsets: array, slots: array):
+        self.__layer_offsets = offsets
+        self.__slots         = slots
+
+        # Slots start on a grid, one slot apart. Every layer copies
+        # the start of a single grid as wide as the widest layer.
+        widths        = list(map(int.__sub__, offsets[1:], offsets[:-1]))
+        grid          = array("d", range(max(widths, default=0)))
+        self.__slot_x = array("d", bytes(8 * len(slots)))
+        for layer, width in enumerate(widths):
+            self.__slot_x[offsets[layer]:offsets[layer+1]] = grid[:width]
+
+        view, x_view  = memoryview(slots), memoryview(self.__slot_x)
+        self.__layers = [
+            Layer(layer+1, view[offsets[layer]:offsets[layer+1]], x_view[offsets[layer]:offsets[layer+1]])
+            for layer in range(len(offsets) - 1)
+        ]
+
+    def proper_layering(self, graph: Graph = None):
+        """ Adds dummy vertices on edges spanning more than one layer.
+        graph - graph whose edges are used, layered graph by default, e.g.
+        the initial graph when layers were computed on its acyclic view.
+        """
+        graph      = self.graph if graph is None else graph
+        node2layer = self.__node2layer
+
+        sources, targets = array("i"), array("i")
+        chain_offsets    = array("i", [0])
+        chain_slots      = array("i")
+
+        # Dummy vertices of earlier calls are dropped
+        next_slot = _SlotCursors(self.__real_sizes)
+
+        for node_id in self.__slots:
+            if node_id == -1:
+                continue
+
+            level = node2layer[node_id]
+            for child_vtx in graph.get_neighbors_out(node_id):
+                target_level = node2layer[child_vtx]
+                if -2 < target_level - level < 2:
+                    continue
+
+                # Layers strictly between the two levels, as 0-based indices
+                low, high = (level, target_level-1) if level < target_level else (target_level, level-1)
+                next_slot.take(low, high, chain_slots)
+
+                sources.append(node_id)
+                targets.append(child_vtx)
+                chain_offsets.append(len(chain_slots))
+
+        self.__set_slots(next_slot.to_array())
+        self.dummy_traversing_edges = DummyChains(len(node2layer), sources, targets, chain_offsets, chain_slots)
+        self.__proper_graph = graph
+
+    def minimize_crossings(self, max_sweeps: int = 20, time_budget: float = 1.0, median: bool = False) -> int:
+        """ Reorders slots of every layer to reduce edge crossings, call it after
+        proper_layering(). Sweeps go down and up the layers, each one sorts a
+        layer by the barycenter (or median) of neighbour positions in the layer
+        it came from. Only layer pairs a sweep changed are counted again. The
+        best counted order is kept, sweeping stops when it didn't improve twice
+        in a row, after max_sweeps or time_budget seconds. The budget covers
+        sweeps and counting, building the slot graph is linear and comes on top.
+        The initial order isn't counted, the first sweep is always taken.
+        If the budget runs out before a sweep is counted, its order is kept
+        when no earlier one was counted, otherwise the best counted one is.
+        Returns: number of crossings of the final order, -1 if it wasn't counted.
+        """
+        sweeper  = _SlotGraph(self.__layer_offsets, self.__slots, self.__segments())
+        deadline = time.perf_counter() + time_budget
+
+        # Crossings of every pair of neighbouring layers, -1 until counted
+        crossings      = array("q", [-1]) * sweeper.num_pairs
+        best_crossings = -1
+        best_order     = None
+        stale          = 0
+
+        for sweep in range(max_sweeps):
+            if best_crossings == 0 or stale == 2:
+                break
+
+            is_swept = sweeper.sweep(sweep % 2 == 0, median, deadline, crossings)
+
+            if not sweeper.count_pairs(crossings, deadline):
+                # Uncounted order is only better than none
+                if best_order is None:
+                    best_order = sweeper.order
+                break
+
+            if best_order is None or sum(crossings) < best_crossings:
+                best_crossings, best_order, stale = sum(crossings), sweeper.order_copy(), 0
+            else:
+                stale += 1
+
+            if not is_swept:
+                break
+
+        if best_order is not None:
+            self.__apply_order(best_order)
+        return best_crossings
+
+    def count_crossings(self) -> int:
+        """ Returns: number of edge crossings of the current
+        order, call it after proper_layering().
+        """
+        return _SlotGraph(self.__layer_offsets, self.__slots, self.__segments()).count_crossings()
+
+    def arrange(self, graph: Graph = None) -> None:
+        """ Proper layering, crossing reduction and coordinate assignment in one
+        go, everything a drawing needs after compute_layers(). It doesn't touch
+        pygame, so it can run off the main thread.
+        graph - see proper_layering().
+        """
+        self.proper_layering(graph)
+        self.minimize_crossings()
+        self.assign_coordinates()
+
+    def assign_coordinates(self) -> None:
+        """ Computes compact horizontal coordinates of all slots, kept in x of
+        every layer, with Brandes-Koepf alignment and compaction. Call it after
+        proper_layering() and minimize_crossings(), the order of slots is kept.
+        """
+        slot_graph = _SlotGraph(self.__layer_offsets, self.__slots, self.__segments())
+        memoryview(self.__slot_x)[:] = _brandes_koepf(slot_graph, self.__slots)
+
+    def __segments(self) -> Tuple[array, array]:
+        """ Edges of the proper layered graph, every one joins a slot with
+        a slot in the next layer. Slots are indices into the slot array.
+        Returns: upper slots, lower slots.
+        """
+        node2layer = self.__node2layer
+        offsets    = self.__layer_offsets
+        chains     = self.dummy_traversing_edges
+
+        slot_of = array("i", bytes(4 * len(node2layer)))
+        for slot, node_id in enumerate(self.__slots):
+            if node_id != -1:
+                slot_of[node_id] = slot
+
+        upper, lower = array("i"), array("i")
+
+        for node_id in range(len(node2layer)):
+            level = node2layer[node_id]
+            for child_vtx in self.__proper_graph.get_neighbors_out(node_id):
+                if node2layer[child_vtx] - level == 1:
+                    upper.append(slot_of[node_id])
+                    lower.append(slot_of[child_vtx])
+                elif node2layer[child_vtx] - level == -1:
+                    upper.append(slot_of[child_vtx])
+                    lower.append(slot_of[node_id])
+
+        # Chains run from the upper end down
+        for edge in range(len(chains.sources)):
+            u, v = chains.sources[edge], chains.targets[edge]
+            if node2layer[u] > node2layer[v]:
+                u, v = v, u
+
+            # Dummy of the i-th crossed layer takes slot offsets[layer+i] + its position
+            start, end = chains.offsets[edge], chains.offsets[edge+1]
+            layer = node2layer[u]
+            path  = array("i", [slot_of[u]])
+            path.extend(map(int.__add__, offsets[layer:layer + end - start], chains.slots[start:end]))
+            path.append(slot_of[v])
+
+            upper.extend(path[:-1])
+            lower.extend(path[1:])
+
+        return upper, lower
+
+    def __apply_order(self, order: list[array]):
+        """ Rewrites slots in the given order of every layer, dummy
+        chains follow their slots.
+        """
+        offsets   = self.__layer_offsets
+        slots     = array("i", self.__slots)
+        new_pos   = array("i", bytes(4 * len(slots)))
+
+        for layer, layer_order in enumerate(order):
+            slots[offsets[layer]:offsets[layer+1]] = array("i", map(self.__slots.__getitem__, layer_order))
+            # Scatter of positions, iterated by map()
+            any(map(new_pos.__setitem__, layer_order, range(len(layer_order))))
+
+        chains      = self.dummy_traversing_edges
+        node2layer  = self.__node2layer
+        chain_slots = array("i", chains.slots)
+        for edge in range(len(chains.sources)):
+            start, end = chains.offsets[edge], chains.offsets[edge+1]
+            layer = min(node2layer[chains.sources[edge]], node2layer[chains.targets[edge]])
+            old_slots = map(int.__add__, offsets[layer:layer + end - start], chain_slots[start:end])
+            chain_slots[start:end] = array("i", map(new_pos.__getitem__, old_slots))
+
+        self.__use_slots(offsets, slots)
+        self.dummy_traversing_edges = DummyChains(len(self.__node2layer), chains.sources, chains.targets, chains.offsets, chain_slots)
+
     def __str__(self):
         resp = ""
         for layer in self.__layers:
-            resp += str(layer.level) + " => " + str(layer.nodes) + "\n"
+            resp += str(layer.level) + " => " + str(layer.nodes.tolist()) + "\n"
         return resp
 
     def __repr__(self) -> str:
-        return self.__str__()
\ No newline at end of file
+        return self.__str__()
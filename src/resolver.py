@@ -1,13 +1,9 @@
 import os, time
 import src.utils.util as util 
+from src.utils import startup
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
 
-# GUI
-import tkinter
-from tkinter import messagebox
-from tkinter import filedialog as fd
-
 # Render engine
 import pygame
 
@@ -19,11 +15,13 @@ class Resolver():
     def __init__(self) -> None:
         pygame.init()
 
+        startup.report.mark("pygame.init")
+
         self.__FPS_LIMIT = 60
         self.__fps_clock = pygame.time.Clock()
         
-        # Don't show tkinter window
-        tkinter.Tk().withdraw()
+        # Hidden tkinter root, created with the first dialog
+        self.__tk_root = None
         
         self.__init_assets()
 
@@ -39,7 +37,7 @@ class Resolver():
         self.is_running  = True
         self.state_stack = []
         self.fps_list    = []
-        self.actions     = {"m_down" : False, "m_up" : False, "escape": False, "space": True}
+        self.actions     = {"m_down" : False, "m_up" : False, "escape": False, "space": True, "watch": False}
         
         self.dt     , self.prev_time = 0, 0
 
@@ -49,6 +47,8 @@ class Resolver():
         self.__update_interpolators()
         self.__init_states()
 
+        startup.report.mark("window")
+
     def main_loop(self) -> None:
         while self.is_running:
             self.__update_dt()
@@ -61,6 +61,11 @@ class Resolver():
                 break
 
             self.__render()
+
+            if startup.report.enabled:
+                startup.report.mark("first frame")
+                startup.report.finish()
+
             self.__fps_clock.tick(self.__FPS_LIMIT)
 
     def __update_interpolators(self):
@@ -111,6 +116,8 @@ class Resolver():
                     self.actions['escape'] = True
                 elif e.key == pygame.K_SPACE:
                     self.actions['space'] = True
+                elif e.key == pygame.K_w:
+                    self.actions['watch'] = True
             elif e.type == pygame.KEYUP:
                 if e.key == pygame.K_ESCAPE:
                     self.actions['escape'] = False
@@ -180,7 +187,20 @@ class Resolver():
         print("Window focused!")
         util.raise_window(pygame.display.get_caption()[0])
 
+    def __init_tk(self) -> None:
+        """ Imports tkinter and creates its hidden root window
+        the first time a dialog is needed.
+        """
+        if self.__tk_root is None:
+            import tkinter
+
+            # Don't show tkinter window
+            self.__tk_root = tkinter.Tk()
+            self.__tk_root.withdraw()
+
     def show_error(self, title, err_txt) -> None:
+        self.__init_tk()
+        from tkinter import messagebox
         messagebox.showerror(title, err_txt)
         self.focus()
 
@@ -188,6 +208,8 @@ class Resolver():
         """ Opens a file dialog browser.
         Returns: Path to selected directory.
         """
+        self.__init_tk()
+        from tkinter import filedialog as fd
         target_dir = fd.askdirectory()
         self.focus()
         return target_dir
\ No newline at end of file
@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import hashlib
+from typing import Optional
+
+class ScanCache:
+    """ On-disk cache of include lists. Entries are keyed by a normalized
+    file path and validated against the file's mtime, size and content hash.
+    Variant separates entries produced by differently configured scanners.
+    Includes are stored as resolved paths and an entry is dropped once one of
+    them no longer exists. A header created later that would shadow a stored
+    target on the include path is not detected, a scan without cache picks it up.
+    Connection is bound to the thread that opened the cache.
+    """
+
+    DB_NAME        = "scan_cache.sqlite"
+    SCHEMA_VERSION = 2
+
+    def __init__(self, cache_dir: str, variant: str = "") -> None:
+        self.db_path = os.path.join(cache_dir, self.DB_NAME)
+        self.variant = variant
+        self.__conn: sqlite3.Connection = None
+
+    def __enter__(self) -> "ScanCache":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def open(self) -> None:
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        self.__conn = sqlite3.connect(self.db_path)
+
+        version = self.__conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != self.SCHEMA_VERSION:
+            # Cached data is cheap to rebuild, so incompatible
+            # caches are simply dropped.
+            self.__conn.execute("DROP TABLE IF EXISTS includes")
+            self.__conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+        self.__conn.execute(
+            "CREATE TABLE IF NOT EXISTS includes ("
+            "path TEXT, variant TEXT, mtime_ns INTEGER, size INTEGER, digest TEXT, includes TEXT, "
+            "PRIMARY KEY (path, variant))"
+        )
+
+    def close(self) -> None:
+        if self.__conn is None:
+            return
+        self.__conn.commit()
+        self.__conn.close()
+        self.__conn = None
+
+    @staticmethod
+    def content_hash(path: str) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def lookup(self, path: str) -> Optional[list[str]]:
+        """ Returns cached includes of the file or None if the file isn't
+        cached, has changed since or one of its includes was removed.
+        """
+        row = self.__conn.execute(
+            "SELECT mtime_ns, size, digest, includes FROM includes WHERE path = ? AND variant = ?",
+            (path, self.variant)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        mtime_ns, size, digest, includes = row
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        if stat.st_size != size:
+            return None
+
+        if stat.st_mtime_ns != mtime_ns:
+            # File was touched, only its content can tell if it changed
+            if self.content_hash(path) != digest:
+                return None
+
+            self.__conn.execute(
+                "UPDATE includes SET mtime_ns = ? WHERE path = ? AND variant = ?",
+                (stat.st_mtime_ns, path, self.variant)
+            )
+
+        includes = includes.split("\n") if includes else []
+        if not all(map(os.path.exists, includes)):
+            return None
+
+        return includes
+
+    def store(self, path: str, includes: list[str]) -> None:
+        try:
+            stat = os.stat(path)
+            digest = self.content_hash(path)
+        except OSError:
+            return
+
+        self.__conn.execute(
+            "INSERT OR REPLACE INTO includes VALUES (?, ?, ?, ?, ?, ?)",
+            (path, self.variant, stat.st_mtime_ns, stat.st_size, digest, "\n".join(includes))
+        )
@@ -1,84 +1,384 @@
 import os
 from typing import Tuple
 import typing
-from clang.cindex import TranslationUnit, Index
-from global_logger import Log
+from enum import Enum
+from concurrent.futures import ProcessPoolExecutor
+from src.utils import util
+from src.scan_cache import ScanCache
+from src.include_lexer import scan_includes
+from src.compile_db import load_compile_commands
+from src.discovery import ProjectFileFinder
+
+if typing.TYPE_CHECKING:
+    from clang.cindex import Index
+
+def _clang():
+    # libclang bindings are loaded on first parse, lexical
+    # scans and the GUI startup may never need them.
+    import clang.cindex
+    return clang.cindex
+
+class ScanBackend(Enum):
+
+    # Full libclang parse of every file
+    LIBCLANG = "libclang"
+    # Reads #include directives directly, libclang is used only
+    # for files with conditional or macro-computed includes
+    LEXICAL  = "lexical"
+
+# Scanner owned by a single scan worker process
+_worker_scanner: "DependencyScanner" = None
+
+def _init_scan_worker(backend: ScanBackend, include_paths: list[str]) -> None:
+    global _worker_scanner
+    _worker_scanner = DependencyScanner(backend=backend, include_paths=include_paths)
+
+def _scan_worker(path: str) -> list[str]:
+    return _worker_scanner.read_includes(path)
+
+def _scan_unit_worker(unit: Tuple[str, tuple[str, ...], str]) -> list[Tuple[str, str]]:
+    return _worker_scanner.read_unit_includes(*unit)
 
 class DependencyScanner:
 
     SUPPORTED_FILES = [".cpp", ".c", ".hpp", ".h"]
 
-    glob_log: Log = Log.get_logger(name="DepdendencyScanner", logs_dir=os.path.abspath("./log"))
+    glob_log = util.LazyLogger("DepdendencyScanner")
 
-    def __init__(self, progress_cb: typing.Callable[[int, int, str], None] = None) -> None:
-        self.cindex = Index.create()
+    def __init__(self,
+                progress_cb: typing.Callable[[int, int, str], None] = None,
+                workers: int = 1,
+                chunk_size: int = 0,
+                cache_dir: str = None,
+                backend: ScanBackend = ScanBackend.LIBCLANG,
+                include_paths: list[str] = None,
+                excludes: list[str] = None,
+                use_gitignore: bool = True) -> None:
+        """ workers - number of processes used for parsing, each of them
+        owns its own libclang index. Values below 2 keep the scan in the
+        calling thread.
+        chunk_size - number of files handed to a worker at once. If it's
+        not set, it's picked depending on the number of files and workers.
+        cache_dir - directory of the persistent scan cache. Only files that
+        changed since the last scan are parsed when it's set.
+        backend - how includes are extracted from files, see ScanBackend.
+        include_paths - directories searched for included files, in order.
+        excludes - gitignore style patterns of paths that aren't scanned.
+        use_gitignore - skip paths ignored by .gitignore files of the project.
+        """
+        self.__cindex      = None
         self.__progress_cb = progress_cb
+        self.workers    = max(1, workers)
+        self.chunk_size = chunk_size
+        self.cache_dir  = cache_dir
+        self.backend    = backend
+
+        self.include_paths = [os.path.abspath(path) for path in include_paths or []]
+        self.__clang_args  = [f"-I{path}" for path in self.include_paths]
+
+        self.file_finder = ProjectFileFinder(self.SUPPORTED_FILES, excludes, use_gitignore)
+
+        # (including dir, include name, is angled) -> resolved path
+        self.__resolved: dict[Tuple[str, str, bool], str] = {}
+
+    @property
+    def cindex(self) -> "Index":
+        # Lexical scans may never need libclang
+        if self.__cindex is None:
+            self.__cindex = _clang().Index.create()
+        return self.__cindex
+
+    @property
+    def cache_variant(self) -> str:
+        """ Identifies scanner settings which affect the
+        extracted includes.
+        """
+        return ";".join([self.backend.value] + self.include_paths)
 
     @staticmethod
     def normalize_path(path:str) -> str:
         return path.replace("\\", "/")
-    
+
+    @staticmethod
+    def parse_includes(cindex: "Index", path:str, args: list[str] = None) -> list[str]:
+        """ Parses a single file with the given index.
+        Returns: List of files directly included by the file.
+        """
+        TranslationUnit  = _clang().TranslationUnit
+        translation_unit = cindex.parse(
+            path,
+            args = args,
+            options = TranslationUnit.PARSE_SKIP_FUNCTION_BODIES | TranslationUnit.PARSE_INCOMPLETE
+        )
+
+        return [
+            DependencyScanner.normalize_path(str(incl.include)) for incl in translation_unit.get_includes()
+            if incl.depth == 1
+        ]
+
     def is_valid_project_file(self, filename:str) -> int:
         """ Returns index that represents a file extension
         from SUPPORTED_FILES.
         """
-        for i, ext in enumerate(self.SUPPORTED_FILES):
-            if filename.endswith(ext):
-                return i
+        return self.file_finder.file_type(filename)
+
+    def get_project_files(self, start_dir:str, root_dir:str = None) -> list[Tuple[str, int]]:
+        """ root_dir - project directory whose ignore rules
+        apply to start_dir, start_dir by default.
+        """
+        return self.file_finder.find(start_dir, root_dir)
+
+    def for_rescans(self) -> "DependencyScanner":
+        """ Returns: Scanner with the same settings which parses in the
+        calling thread, reports no progress and doesn't use the cache.
+        """
+        scanner = DependencyScanner(backend=self.backend, include_paths=self.include_paths)
+        scanner.file_finder = self.file_finder
+        return scanner
+
+    def resolve_include(self, including_file: str, name: str, is_angled: bool) -> typing.Optional[str]:
+        """ Finds the file referred to by an include directive. Quoted includes
+        are looked up next to the including file first, then in include paths.
+        Returns: Normalized path or None if the file wasn't found.
+        """
+        including_dir = os.path.dirname(including_file)
+        key = (including_dir, name, is_angled)
 
-        return -1
+        if key in self.__resolved:
+            return self.__resolved[key]
 
-    def get_project_files(self, start_dir:str) -> list[Tuple[str, int]]:
-        project_files = []
+        search_dirs = self.include_paths if is_angled else [including_dir] + self.include_paths
+        resolved    = None
 
-        for root, dirs, files in os.walk(start_dir):
-            for path in files:
-                file_type = self.is_valid_project_file(path)
-                if file_type!=-1:                    
-                    project_files.append((os.path.join(root,path), file_type))
+        for search_dir in search_dirs:
+            candidate = os.path.join(search_dir, name)
+            if os.path.isfile(candidate):
+                resolved = DependencyScanner.normalize_path(os.path.normpath(candidate))
+                break
+
+        self.__resolved[key] = resolved
+        return resolved
+
+    def forget_resolved_includes(self) -> None:
+        """ Drops resolved includes, call it when headers may have
+        been created or removed since the last scan.
+        """
+        self.__resolved.clear()
 
-        return project_files
+    def lex_includes(self, path:str) -> list[str]:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            includes, needs_cpp = scan_includes(f.read())
+
+        if needs_cpp:
+            return DependencyScanner.parse_includes(self.cindex, path, self.__clang_args)
+
+        resolved = [self.resolve_include(path, name, is_angled) for name, is_angled in includes]
+        return [incl for incl in resolved if incl is not None]
+
+    def read_includes(self, path:str) -> list[str]:
+        """ Returns files directly included by the file
+        using the selected backend.
+        """
+        if self.backend == ScanBackend.LEXICAL:
+            return self.lex_includes(path)
+        return DependencyScanner.parse_includes(self.cindex, path, self.__clang_args)
 
     def get_includes(self, path:str) -> list[str]:
 
         self.glob_log.info(f"Parsing {path}")
 
+        return self.read_includes(path)
+
+    def read_unit_includes(self, path:str, args: tuple[str, ...], root_dir: str) -> list[Tuple[str, str]]:
+        """ Parses a translation unit with its compiler arguments and walks its
+        whole include tree. Includes made by files outside of root_dir are skipped.
+        Returns: List of (including file, included file) pairs.
+        """
+        TranslationUnit  = _clang().TranslationUnit
         translation_unit = self.cindex.parse(
-            path, 
+            path,
+            args = list(args) + self.__clang_args,
             options = TranslationUnit.PARSE_SKIP_FUNCTION_BODIES | TranslationUnit.PARSE_INCOMPLETE
         )
 
-        return [
-            DependencyScanner.normalize_path(str(incl.include)) for incl in translation_unit.get_includes()
-            if incl.depth == 1
+        # Trailing separator keeps sibling directories like /proj2 out of /proj
+        root_prefix = root_dir.rstrip("/") + "/"
+
+        edges = []
+        for incl in translation_unit.get_includes():
+            source = DependencyScanner.normalize_path(str(incl.source))
+            if source.startswith(root_prefix):
+                edges.append((source, DependencyScanner.normalize_path(str(incl.include))))
+
+        return edges
+
+    def get_unit_includes(self, unit: Tuple[str, tuple[str, ...], str]) -> list[Tuple[str, str]]:
+
+        self.glob_log.info(f"Parsing translation unit {unit[0]}")
+
+        return self.read_unit_includes(*unit)
+
+    def __get_chunk_size(self, total_files: int) -> int:
+        if self.chunk_size > 0:
+            return self.chunk_size
+        # Few chunks per worker keep the pool balanced without
+        # paying for a round trip on every single file.
+        return max(1, min(64, total_files // (self.workers * 4)))
+
+    def __map(self, items: list, local_fn: typing.Callable, worker_fn: typing.Callable) -> typing.Iterator[tuple]:
+        """ Yields (item, result) pairs in the same order as items. Items are
+        processed by local_fn in this thread or by worker_fn in the worker pool.
+        """
+        if self.workers < 2 or len(items) < 2:
+            for item in items:
+                yield item, local_fn(item)
+            return
+
+        self.glob_log.info(f"Parsing {len(items)} files with {self.workers} workers")
+
+        with ProcessPoolExecutor(
+            max_workers = self.workers,
+            initializer = _init_scan_worker,
+            initargs    = (self.backend, self.include_paths)
+        ) as pool:
+            results = pool.map(worker_fn, items, chunksize=self.__get_chunk_size(len(items)))
+            for item, result in zip(items, results):
+                yield item, result
+
+    def __parse_files(self, files: list[str]) -> typing.Iterator[Tuple[str, list[str]]]:
+        """ Yields (file, includes) pairs in the same order as files.
+        """
+        return self.__map(files, self.get_includes, _scan_worker)
+
+    def __report_progress(self, i: int, total_files: int, file: str, path_dir: str) -> None:
+        if self.__progress_cb:
+            self.__progress_cb(i, total_files, file.replace(path_dir, ""))
+
+    def __iter_files_cached(self, cache: ScanCache, files: list[str], path_dir: str) -> typing.Iterator[Tuple[str, list[str]]]:
+        """ Reuses cached includes of unchanged files and
+        parses only the stale ones.
+        """
+        # Cache hits are yielded during the lookup pass,
+        # only the names of stale files are kept for parsing
+        done  = 0
+        stale: list[str] = []
+        for file in files:
+            includes = cache.lookup(file)
+            if includes is None:
+                stale.append(file)
+                continue
+
+            self.__report_progress(done, len(files), file, path_dir)
+            done += 1
+            yield file, includes
+
+        self.glob_log.info(f"{len(stale)} of {len(files)} files need parsing")
+
+        for file, includes in self.__parse_files(stale):
+            self.__report_progress(done, len(files), file, path_dir)
+            done += 1
+            cache.store(file, includes)
+            yield file, includes
+
+    def iter_scan(self, path_dir:str) -> typing.Iterator[Tuple[str, list[str]]]:
+        """ Scans all supported files starting from path_dir
+        including subdirectories.
+        Yields: (project file, list of its dependencies) pairs as soon as
+        each file is scanned.
+        """
+
+        path_dir = DependencyScanner.normalize_path(path_dir)
+
+        self.glob_log.info(f"Scan started {path_dir}")
+
+        self.forget_resolved_includes()
+
+        project_files = [
+            DependencyScanner.normalize_path(file) for file, _ in self.get_project_files(path_dir)
         ]
 
+        if self.cache_dir:
+            with ScanCache(self.cache_dir, self.cache_variant) as cache:
+                yield from self.__iter_files_cached(cache, project_files, path_dir)
+        else:
+            for i, (file, includes) in enumerate(self.__parse_files(project_files)):
+                self.__report_progress(i, len(project_files), file, path_dir)
+                yield file, includes
+
+        self.glob_log.info(f"Scan complete!")
+
     def scan_dir(self, path_dir:str) -> dict[str, list[str]]:
         """ Scans all supported files starting from path_dir
         including subdirectories.
         Returns: Dictionary with key being project file and value is
         a list of its dependencies.
         """
+        return dict(self.iter_scan(path_dir))
 
-        path_dir = DependencyScanner.normalize_path(path_dir) 
+    def iter_compile_commands(self, db_path:str, root_dir:str = None,
+                              units: typing.Collection[str] = None) -> typing.Iterator[Tuple[str, list[str]]]:
+        """ Parses only the translation units listed in a compile_commands.json
+        using their own compiler arguments. Headers are never parsed on their
+        own, their includes are taken from the include trees of translation units.
+        Only includes made by files inside root_dir (database directory by
+        default) are recorded.
+        units - normalized paths of the units to parse, all listed units by default.
+        Yields: (project file, list of its dependencies) pairs after each
+        translation unit. Headers shared by several units can be yielded again,
+        but only with includes that weren't yielded before.
+        """
 
-        self.glob_log.info(f"Scan started {path_dir}")
+        root_dir = DependencyScanner.normalize_path(root_dir or os.path.dirname(os.path.abspath(db_path)))
+
+        self.glob_log.info(f"Compilation database scan started {db_path}")
+
+        self.forget_resolved_includes()
+
+        # Units with identical flags are parsed back to back so that
+        # headers they share stay hot in the OS and libclang file caches.
+        groups: dict[tuple[str, ...], list[str]] = {}
+        for command in load_compile_commands(db_path):
+            if units is None or DependencyScanner.normalize_path(command.file) in units:
+                groups.setdefault(command.args, []).append(command.file)
+
+        units = [
+            (file, args, root_dir) for args, files in groups.items() for file in files
+        ]
+
+        self.glob_log.info(f"{len(units)} translation units in {len(groups)} flag groups")
+
+        seen_files = set()
+        seen_edges = set()
+
+        for i, (unit, edges) in enumerate(self.__map(units, self.get_unit_includes, _scan_unit_worker)):
+
+            file = DependencyScanner.normalize_path(unit[0])
+            self.__report_progress(i, len(units), file, root_dir)
+
+            new_includes: dict[str, list[str]] = {}
 
-        dep_map = {}
-        project_files = self.get_project_files(path_dir)
+            if file not in seen_files:
+                new_includes[file] = []
 
-        for i, (file, file_type) in enumerate(project_files):
+            for source, include in edges:
+                if (source, include) not in seen_edges:
+                    seen_edges.add((source, include))
+                    new_includes.setdefault(source, []).append(include)
 
-            file = DependencyScanner.normalize_path(file)
-            
-            # Report progress to the caller
-            if self.__progress_cb:
-                self.__progress_cb(i, len(project_files), file.replace(path_dir, ""))
+            for source, includes in new_includes.items():
+                seen_files.add(source)
+                yield source, includes
 
-            includes = self.get_includes(file)
-            dep_map[file] = includes
-        
         self.glob_log.info(f"Scan complete!")
 
+    def scan_compile_commands(self, db_path:str, root_dir:str = None) -> dict[str, list[str]]:
+        """ Same as iter_compile_commands() but collects all includes.
+        Returns: Dictionary with key being project file and value is
+        a list of its dependencies.
+        """
+        dep_map: dict[str, list[str]] = {}
+
+        for file, includes in self.iter_compile_commands(db_path, root_dir):
+            dep_map.setdefault(file, []).extend(includes)
+
         return dep_map
-    
\ No newline at end of file
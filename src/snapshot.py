@@ -0,0 +1,308 @@
+import os
+import sys
+import mmap
+import struct
+import hashlib
+from array import array
+from typing import Tuple
+from src.ds.graph import DirectedGraph
+from src.ds.csr_graph import CSRDirectedGraph
+from src.ds.path_table import PathTable
+
+class SnapshotError(Exception):
+    pass
+
+class Snapshot:
+    """ Binary snapshot of an analysed project: vertex names, CSR adjacency of
+    the graph in its initial state, reversed edges, topological order and
+    layer of every vertex.
+
+    Layout, all integers little-endian:
+        header        - magic, format version, number of sections
+        section table - (tag, offset, size) of every section
+        sections      - 8 byte aligned, int32 arrays or utf-8 text
+
+    SCAN_STARTED is optional, an int64 time in nanoseconds when the scan
+    started. Sections are read as memoryviews straight from the mapped file. Readers
+    skip sections they don't know, VERSION only changes when an existing
+    section changes its meaning.
+    """
+
+    MAGIC     = b"DRTSNAP\0"
+    VERSION   = 1
+    EXTENSION = ".drts"
+
+    HEADER  = struct.Struct("<8sII")
+    SECTION = struct.Struct("<4sQQ")
+    TIME    = struct.Struct("<q")
+
+    # Sections
+    PROJECT_DIR       = b"PROJ"
+    NAMES             = b"NAME"
+    OUT_OFFSETS       = b"OUTO"
+    OUT_TARGETS       = b"OUTT"
+    IN_OFFSETS        = b"INOF"
+    IN_TARGETS        = b"INTG"
+    REVERSED_EDGES    = b"REVE"
+    TOPOLOGICAL_ORDER = b"TOPO"
+    NODE_LAYERS       = b"LAYR"
+    SCAN_STARTED      = b"SCAN"
+
+    INT_SECTIONS = (OUT_OFFSETS, OUT_TARGETS, IN_OFFSETS, IN_TARGETS, REVERSED_EDGES, TOPOLOGICAL_ORDER, NODE_LAYERS)
+
+    def __init__(self, path: str) -> None:
+        """ Maps the snapshot file, nothing is copied until it's used.
+        """
+        self.path = path
+
+        with open(path, "rb") as f:
+            # mmap refuses empty files
+            if os.fstat(f.fileno()).st_size == 0:
+                raise SnapshotError(f"{path} is empty")
+            self.__mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.__views: list[memoryview] = []
+        self.__names: list[str] = None
+
+        try:
+            self.__read()
+        except Exception:
+            self.close()
+            raise
+
+    def __read(self) -> None:
+        self.__sections = self.__read_sections()
+
+        self.project_dir = self.__text(self.PROJECT_DIR)
+
+        self.out_offsets       = self.__ints(self.OUT_OFFSETS)
+        self.out_targets       = self.__ints(self.OUT_TARGETS)
+        self.in_offsets        = self.__ints(self.IN_OFFSETS)
+        self.in_targets        = self.__ints(self.IN_TARGETS)
+        self.topological_order = self.__ints(self.TOPOLOGICAL_ORDER)
+        self.node_layers       = self.__ints(self.NODE_LAYERS)
+        # Flat (u,v) pairs
+        self.__reversed        = self.__ints(self.REVERSED_EDGES)
+
+        num_vertices = len(self.out_offsets) - 1
+        if (num_vertices < 0 or len(self.in_offsets) != num_vertices + 1 or len(self.node_layers) not in (0, num_vertices)
+                or self.out_offsets[-1] != len(self.out_targets) or self.in_offsets[-1] != len(self.in_targets)):
+            raise SnapshotError(f"{self.path} has inconsistent adjacency sections")
+
+        # Snapshots written without it are judged by their own mtime
+        self.scan_started: int = None
+        if self.SCAN_STARTED in self.__sections:
+            offset, size = self.__sections[self.SCAN_STARTED]
+            if size != self.TIME.size:
+                raise SnapshotError(f"{self.path} has a malformed section {self.SCAN_STARTED}")
+            self.scan_started = self.TIME.unpack_from(self.__mmap, offset)[0]
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """ Unmaps the file. Graphs made by to_csr_graph()
+        have to be dropped before that.
+        """
+        for view in self.__views:
+            view.release()
+        self.__views.clear()
+        self.__mmap.close()
+
+    def __read_sections(self) -> dict[bytes, Tuple[int, int]]:
+        if len(self.__mmap) < self.HEADER.size:
+            raise SnapshotError(f"{self.path} is not a graph snapshot")
+
+        magic, version, count = self.HEADER.unpack_from(self.__mmap, 0)
+
+        if magic != self.MAGIC:
+            raise SnapshotError(f"{self.path} is not a graph snapshot")
+        if version != self.VERSION:
+            raise SnapshotError(f"{self.path} has snapshot version {version}, expected {self.VERSION}")
+
+        sections = {}
+        for i in range(count):
+            tag, offset, size = self.SECTION.unpack_from(self.__mmap, self.HEADER.size + i * self.SECTION.size)
+            if offset + size > len(self.__mmap):
+                raise SnapshotError(f"{self.path} is truncated")
+            sections[tag] = (offset, size)
+
+        missing = {self.PROJECT_DIR, self.NAMES, *self.INT_SECTIONS} - sections.keys()
+        if missing:
+            raise SnapshotError(f"{self.path} lacks sections {sorted(missing)}")
+
+        return sections
+
+    def __text(self, tag: bytes) -> str:
+        offset, size = self.__sections[tag]
+        try:
+            return self.__mmap[offset:offset + size].decode("utf-8")
+        except UnicodeDecodeError as ex:
+            raise SnapshotError(f"{self.path} has a malformed section {tag}") from ex
+
+    def __ints(self, tag: bytes):
+        offset, size = self.__sections[tag]
+        if size % 4:
+            raise SnapshotError(f"{self.path} has a malformed section {tag}")
+
+        if sys.byteorder == "little":
+            view = memoryview(self.__mmap)[offset:offset + size].cast("i")
+            self.__views.append(view)
+            return view
+
+        # Snapshots are little-endian, big-endian machines get a swapped copy
+        ints = array("i", self.__mmap[offset:offset + size])
+        ints.byteswap()
+        return ints
+
+    @property
+    def names(self) -> list[str]:
+        """ Vertex names, decoded on first use.
+        """
+        if self.__names is None:
+            text = self.__text(self.NAMES)
+            self.__names = text.split("\0") if text else []
+        return self.__names
+
+    @property
+    def reversed_edges(self) -> list[Tuple[int, int]]:
+        return list(zip(self.__reversed[0::2], self.__reversed[1::2]))
+
+    def rebased_names(self, project_dir: str) -> list[str]:
+        """ Returns: names with the stored project directory replaced, for
+        snapshots made on another machine or in another checkout.
+        """
+        if not project_dir or project_dir == self.project_dir:
+            return self.names
+
+        old_prefix = self.project_dir.rstrip("/") + "/"
+        new_prefix = project_dir.rstrip("/") + "/"
+
+        return [
+            new_prefix + name[len(old_prefix):] if name.startswith(old_prefix) else name
+            for name in self.names
+        ]
+
+    def to_csr_graph(self, project_dir: str = None) -> CSRDirectedGraph:
+        """ Frozen graph in its initial state, adjacency arrays
+        are views into the mapped file.
+        """
+        return CSRDirectedGraph(
+            self.rebased_names(project_dir),
+            self.out_offsets, self.out_targets,
+            self.in_offsets, self.in_targets,
+        )
+
+    def to_directed_graph(self, project_dir: str = None) -> DirectedGraph:
+        """ Mutable graph in its initial state.
+        """
+        graph = DirectedGraph()
+        names = self.rebased_names(project_dir)
+
+        graph._names = PathTable(names)
+
+        out_offsets, in_offsets = self.out_offsets.tolist(), self.in_offsets.tolist()
+        out_targets, in_targets = self.out_targets.tolist(), self.in_targets.tolist()
+
+        graph._adj_nodes = [out_targets[out_offsets[vtx]:out_offsets[vtx + 1]] for vtx in range(len(names))]
+        graph._in_nodes  = [in_targets[in_offsets[vtx]:in_offsets[vtx + 1]] for vtx in range(len(names))]
+
+        return graph
+
+    @classmethod
+    def write(cls,
+              path: str,
+              project_dir: str,
+              graph,
+              topological_order: list[int],
+              node_layers: list[int],
+              reversed_edges: list[Tuple[int, int]] = None,
+              scan_started: int = None) -> None:
+        """ Saves the graph together with its order and layers. Graph either has its
+        cycles removed, or is in its initial state and reversed_edges are given.
+        scan_started - time.time_ns() taken before the project was scanned, files
+        changed after it make the snapshot stale.
+        File is replaced atomically.
+        """
+        csr = CSRDirectedGraph.from_graph(graph)
+        # Stored adjacency is the initial one, reversed edges are kept aside
+        if reversed_edges is None:
+            reversed_edges = list(csr.reversed_edges)
+            csr.undo_reversed_edges()
+
+        sections = [
+            (cls.PROJECT_DIR      , project_dir.encode("utf-8")),
+            (cls.NAMES            , "\0".join(csr.get_vertex_name(vtx) for vtx in range(len(csr))).encode("utf-8")),
+            (cls.OUT_OFFSETS      , csr._out_offsets),
+            (cls.OUT_TARGETS      , csr._out_targets),
+            (cls.IN_OFFSETS       , csr._in_offsets),
+            (cls.IN_TARGETS       , csr._in_targets),
+            (cls.REVERSED_EDGES   , array("i", [vtx for edge in reversed_edges for vtx in edge])),
+            (cls.TOPOLOGICAL_ORDER, array("i", topological_order)),
+            (cls.NODE_LAYERS      , array("i", node_layers)),
+        ]
+        if scan_started is not None:
+            sections.append((cls.SCAN_STARTED, cls.TIME.pack(scan_started)))
+
+        payloads = []
+        for tag, data in sections:
+            if isinstance(data, array):
+                data = array("i", data)
+                if sys.byteorder != "little":
+                    data.byteswap()
+                data = data.tobytes()
+            payloads.append((tag, data))
+
+        offset = cls.HEADER.size + len(payloads) * cls.SECTION.size
+        table  = []
+        for tag, data in payloads:
+            offset = (offset + 7) & ~7
+            table.append((tag, offset, len(data)))
+            offset += len(data)
+
+        tmp_path = path + ".tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        with open(tmp_path, "wb") as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(table)))
+            for entry in table:
+                f.write(cls.SECTION.pack(*entry))
+
+            for (_, data), (_, offset, _) in zip(payloads, table):
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(data)
+
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def path_for(cls, cache_dir: str, project_dir: str) -> str:
+        """ Returns: snapshot path of the project inside the cache directory.
+        """
+        key = hashlib.blake2b(project_dir.encode("utf-8"), digest_size=8).hexdigest()
+        return os.path.join(cache_dir, "snapshots", key + cls.EXTENSION)
+
+    def is_fresh(self, project_files: list[str], extra_files: list[str] = ()) -> bool:
+        """ Checks that the snapshot has all the given project files and that none
+        of its stored project files, nor extra files, changed after the scan
+        started. Stored files include headers that were reached but not scanned
+        on their own, e.g. ignored ones. A file edited while the scan was running
+        makes the snapshot stale.
+        """
+        fresh_since    = self.scan_started if self.scan_started is not None else os.stat(self.path).st_mtime_ns
+        prefix         = self.project_dir.rstrip("/") + "/"
+        stored         = {name for name in self.names if name.startswith(prefix)}
+
+        if not stored.issuperset(project_files):
+            return False
+
+        for file in [*stored, *extra_files]:
+            try:
+                if os.stat(file).st_mtime_ns > fresh_since:
+                    return False
+            except OSError:
+                return False
+
+        return True
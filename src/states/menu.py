@@ -1,6 +1,5 @@
 from __future__ import annotations
 from src.states.state import *
-from src.states.scan import Scan
 from src.ui.button import *
 from src.utils import util
 import src.ui.colors as colors 
@@ -53,6 +52,9 @@ class Menu(State):
             target_project_dir = self.resolver.find_directory()
 
             if target_project_dir:
+                # Scanner and graph modules are loaded on first scan to keep startup fast
+                from src.states.scan import Scan
+
                 new_state = Scan(self.resolver, target_project_dir)
                 new_state.enter_state()
             else:
@@ -3,13 +3,17 @@ from src.states.state import *
 from src.utils import util
 import src.ui.colors as colors
 from src.scanner import DependencyScanner
+from src.compile_db import find_compile_commands, load_compile_commands
+from src.snapshot import Snapshot, SnapshotError
 from src.ds.graph import DirectedGraph
+from src.ds.overlay import FlippedEdgesView
 from src.node_layering import *
-from src.states.world import World
 
 import os
-from global_logger import Log
+import time
 import threading
+import typing
+from typing import Tuple
 
 from enum import Enum
 
@@ -21,7 +25,7 @@ class ScanStage(Enum):
 
 class Scan(State):
 
-    glob_log = Log.get_logger(name="ScanState", logs_dir=os.path.abspath("./log"))
+    glob_log = util.LazyLogger("ScanState")
 
     progress_lock = threading.Lock()
 
@@ -33,10 +37,13 @@ class Scan(State):
 
         self.stage: ScanStage = ScanStage.DIRECTORY_SCAN
 
-        self.dependencies: dict[str, list[str]] = {}
         self.digraph = DirectedGraph()
 
-        self.scanner            = DependencyScanner(self.scan_progress_callback)
+        self.scanner            = DependencyScanner(
+            self.scan_progress_callback,
+            workers   = os.cpu_count() or 1,
+            cache_dir = os.path.abspath("./cache")
+        )
         self.target_project_dir = DependencyScanner.normalize_path(project_directory)
 
         self.top_text    = ""
@@ -45,7 +52,17 @@ class Scan(State):
 
         self.scan_progress_callback(0,0,"")
 
-        self.th_scanner = util.ThreadWithRetVal(target=self.scanner.scan_dir, args=(self.target_project_dir,), daemon=True)
+        # Real translation units with their own flags are preferred when the project has them
+        self.compile_commands = find_compile_commands(self.target_project_dir)
+
+        if self.compile_commands:
+            dependency_stream = self.scanner.iter_compile_commands(self.compile_commands, self.target_project_dir)
+        else:
+            dependency_stream = self.scanner.iter_scan(self.target_project_dir)
+
+        self.snapshot_path = Snapshot.path_for(os.path.abspath("./cache"), self.target_project_dir)
+
+        self.th_scanner = util.ThreadWithRetVal(target=self.__load_or_build_dag, args=(dependency_stream,), daemon=True)
         self.th_scanner.start()
         
     def update_status(self, top_text:str, bottom_text:str, color:pygame.Color = colors.WHITE) -> None:
@@ -57,31 +74,96 @@ class Scan(State):
     def scan_progress_callback(self, curr_index: int, total_files: int, curr_file: str) -> None:
         self.update_status(f"File: {curr_index} / {total_files}", curr_file)
 
-    def __prepare_and_sort_dag(self) -> None:
+    def __load_or_build_dag(self, dependency_stream: typing.Iterator[Tuple[str, list[str]]]) -> Layering:
+        """ Reopens the last analysis of the project if none of its files changed
+        since, otherwise scans it and saves the result for the next time.
+        Layout is computed here as well, World only draws it.
+        """
+        layering = self.__load_snapshot()
+        if not layering:
+            layering = self.__scan_and_save(dependency_stream)
+
+        self.update_status("LAYOUT", "Ordering layers and placing files...", colors.MAGENTA)
+        layering.arrange(self.digraph)
+
+        return layering
+
+    def __scan_and_save(self, dependency_stream: typing.Iterator[Tuple[str, list[str]]]) -> Layering:
+        # Files edited while the scan runs have to make the snapshot stale
+        scan_started = time.time_ns()
+        layering     = self.__build_and_sort_dag(dependency_stream)
 
-        self.update_status("GRAPH", "Converting dependencies into a graph structure...", colors.YELLOW)
+        try:
+            Snapshot.write(self.snapshot_path, self.target_project_dir, self.digraph,
+                           layering.topological_order, layering.raw_node_layers, layering.graph.reversed_edges,
+                           scan_started)
+        except OSError:
+            self.glob_log.exception("Failed to save snapshot")
+
+        return layering
+
+    def __scanned_files(self) -> list[str]:
+        """ Returns: files a new scan would parse on their own. With a compilation
+        database those are its units inside the project, other files of the
+        directory only matter when a unit includes them.
+        """
+        if not self.compile_commands:
+            return [DependencyScanner.normalize_path(file) for file, _ in self.scanner.get_project_files(self.target_project_dir)]
+
+        prefix = self.target_project_dir.rstrip("/") + "/"
+        units  = (DependencyScanner.normalize_path(command.file) for command in load_compile_commands(self.compile_commands))
+        return [unit for unit in units if unit.startswith(prefix)]
+
+    def __load_snapshot(self) -> Layering:
+        """ Returns: layering of the stored graph or None if
+        there's no snapshot or it's outdated.
+        """
+        if not os.path.isfile(self.snapshot_path):
+            return None
+
+        self.update_status("SNAPSHOT", "Checking the last analysis...", colors.YELLOW)
+
+        try:
+            with Snapshot(self.snapshot_path) as snapshot:
+                project_files = self.__scanned_files()
+                extra_files   = [self.compile_commands] if self.compile_commands else []
+
+                if not snapshot.is_fresh(project_files, extra_files):
+                    return None
+
+                digraph  = snapshot.to_directed_graph()
+                dag      = FlippedEdgesView(digraph, snapshot.reversed_edges)
+                layering = Layering.from_node_layers(dag, snapshot.topological_order.tolist(), snapshot.node_layers.tolist())
+        except (OSError, SnapshotError, ValueError, IndexError):
+            # Damaged contents can still slip through the checks of Snapshot
+            self.glob_log.exception("Failed to load snapshot")
+            return None
+
+        self.digraph = digraph
+        self.stage   = ScanStage.CONSTRUCT_GRAPH
+
+        return layering
+
+    def __build_and_sort_dag(self, dependency_stream: typing.Iterator[Tuple[str, list[str]]]) -> Layering:
 
         # Vertex represents an included file
         # Edge (u,v) means u was included by v.
         # u needs to be compiled first
 
-        for source_file in self.dependencies:
-            self.digraph.safe_add_vertex(source_file)
-            for included_file in self.dependencies[source_file]:
-                self.digraph.safe_add_vertex(included_file)
+        # Graph grows while the scanner is still parsing the remaining files
+        self.digraph = DirectedGraph.from_dependency_map(dependency_stream)
 
-                # prevent files with improper includes or "self includes"
-                if not included_file == source_file:
-                    self.digraph.add_edge(included_file, source_file)
+        self.stage = ScanStage.CONSTRUCT_GRAPH
 
         self.update_status("GRAPH", "Removing cycles and applying toposort...", colors.YELLOW)
 
-        # Get topological order for graph and prepare it for layering
-        top_order =  self.digraph.remove_cycle_and_sort()
+        # Get topological order for graph and its acyclic view for layering,
+        # the graph itself isn't changed
+        top_order, dag = self.digraph.acyclic_view()
 
         self.update_status("GRAPH", "Finding longest path layering...", colors.MAGENTA)
 
-        layering = Layering(self.digraph, top_order)
+        layering = Layering(dag, top_order)
         layering.compute_layers()
         return layering
 
@@ -91,28 +173,20 @@ class Scan(State):
         # so that we can proceed onto the final state
         if self.th_scanner and not self.th_scanner.is_alive():
 
-            if self.stage == ScanStage.DIRECTORY_SCAN:
-
-                self.dependencies = self.th_scanner.join()
+            layering = self.th_scanner.join()
 
-                # Start thread for converting the dependencies to a graph structure and applying layering algorithm
-                self.th_scanner = util.ThreadWithRetVal(target=self.__prepare_and_sort_dag, args=(), daemon=True)
-                self.th_scanner.start()
+            self.th_scanner = None
 
-                self.stage = ScanStage.CONSTRUCT_GRAPH
+            # World pulls in the rendering of the graph, load it only once it's needed
+            from src.states.world import World
 
-            elif self.stage == ScanStage.CONSTRUCT_GRAPH:
-                
-                layering = self.th_scanner.join()
+            world_state = World(self.target_project_dir, self.resolver, self.digraph, layering, self.scanner,
+                                self.compile_commands)
+            self.exit_state()
+            world_state.enter_state()
 
-                self.th_scanner = None
-                
-                world_state = World(self.target_project_dir, self.resolver, self.digraph, layering)
-                self.exit_state()
-                world_state.enter_state()
+            self.stage = ScanStage.ALL_COMPLETED
 
-                self.stage = ScanStage.ALL_COMPLETED
-                
         self.resolver.reset_keys()
 
     def render(self, display):
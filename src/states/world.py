@@ -1,8 +1,14 @@
 from src.node_layering import *
 from src.ds.graph import DirectedGraph
+from src.ds.dynamic_topo import DynamicTopologicalOrder
+from src.ds.overlay import FlippedEdgesView
+from src.ds.scc import Condensation
+from src.scanner import DependencyScanner
+from src.watcher import WatchSession
 from src.states.state import *
 from src.ui import colors
-import math, os
+from src.utils import util
+import math, os, queue
 import pygame
 from pygame import gfxdraw
 from pygame.math import Vector2
@@ -20,6 +26,8 @@ class LineColors:
 
 class World(State):
 
+    glob_log = util.LazyLogger("World")
+
     def world_to_screen(self, world_x, world_y) -> pygame.Vector2:
         return pygame.Vector2(
             int((world_x - self.camera.world_offset.x) * self.camera.zoom_factor),
@@ -36,7 +44,9 @@ class World(State):
                 project_dir, 
                 resolver, 
                 digraph: DirectedGraph, 
-                layering: Layering):
+                layering: Layering,
+                scanner: DependencyScanner = None,
+                compile_commands: str = None):
 
         super().__init__(resolver)
 
@@ -47,11 +57,24 @@ class World(State):
 
         self.camera = Camera(self.resolver.VIEW_W, self.resolver.VIEW_H, 0.1)
 
-        self.reversed_edges = self.digraph.reversed_edges.copy()
+        self.reversed_edges = []
+        self.cyclic_components: list[list[int]] = []
+
+        # Rescans touched files while watch mode is on
+        self.scanner       = scanner or DependencyScanner()
+        # Watch rescans go through the compilation database the graph came from
+        self.compile_commands = compile_commands
+        self.watch_session: WatchSession = None
+        # Follows include changes of the watch session without full resorting
+        self.dynamic_order: DynamicTopologicalOrder = None
+        # Lays out the graph after watch changes, the graph isn't changed while it runs
+        self.layout_thread: util.ThreadWithRetVal = None
         
         # vertex_id - point
         self.node_positons: dict[int, Vector2] = {}
         self.nodes: dict[int, Button] = {}
+        # (source, target) - points where a long edge bends, from source to target
+        self.edge_bends: dict[Tuple[int, int], list[Tuple[float, float]]] = {}
 
         self.rel_mouse_x, self.rel_mouse_y = 0, 0
         self.start_pan_x, self.start_pan_y = 0, 0
@@ -68,15 +91,105 @@ class World(State):
         self.bends_enabled = True
         self.line_colors = LineColors()
 
+        self.__apply_layering(layering)
+
+    def __apply_layering(self, layering: Layering, move_camera: bool = True) -> None:
+        """ Places nodes according to the layering of the acyclic view of the
+        graph, the graph itself stays in its initial state. Layering has to be
+        arranged already, see Layering.arrange().
+        """
+        self.layering       = layering
+        self.reversed_edges = layering.graph.reversed_edges.copy()
+
+        # Files of every circular include
+        condensation = Condensation(self.digraph)
+        self.cyclic_components = [condensation.components[comp] for comp in condensation.cyclic_components()]
+
         self.__init_warning()
-        self.__init_nodes()
+        self.__init_nodes(move_camera)
+
+    def __refresh_layering(self) -> None:
+        """ Starts recomputing the layering after the graph has changed, the
+        order comes from the dynamic order. Layout runs in a worker thread,
+        existing nodes and camera are kept until it's done.
+        """
+        top_order = self.dynamic_order.topological_order()
+        dag       = FlippedEdgesView(self.digraph, self.dynamic_order.reversed_edges)
 
-        # Return graph back to its initial state (with cycle if it had one)
-        self.digraph.undo_reversed_edges()
-        # Perform a proper layering on initial graph state
-        layering.proper_layering()
+        self.layout_thread = util.ThreadWithRetVal(
+            target=self.__lay_out, args=(dag, top_order, self.layering.assigner), daemon=True
+        )
+        self.layout_thread.start()
+
+    def __lay_out(self, dag: FlippedEdgesView, top_order: list[int], assigner) -> Layering:
+        """ Runs in the layout thread.
+        Returns: arranged layering, None if it failed.
+        """
+        try:
+            layering = Layering(dag, top_order, assigner)
+            layering.compute_layers()
+            layering.arrange(self.digraph)
+            return layering
+        except Exception:
+            self.glob_log.exception("Failed to lay out the changed graph")
+            return None
+
+    def toggle_watch(self) -> None:
+        if self.watch_session:
+            self.watch_session.stop()
+            self.watch_session = None
+        elif not isinstance(self.digraph, DirectedGraph):
+            # Frozen graphs can't follow include changes
+            self.glob_log.info(f"Watch mode needs a mutable graph, {type(self.digraph).__name__} is frozen")
+        else:
+            self.watch_session = WatchSession(self.project_dir, self.scanner, compile_commands=self.compile_commands)
+            self.watch_session.start()
+
+    def __apply_watch_changes(self) -> None:
+        """ Applies include changes found by the watch session
+        to the displayed graph.
+        """
+        if self.layout_thread:
+            # Changes wait in the queue while the layout reads the graph
+            if self.layout_thread.is_alive():
+                return
 
-    def __init_nodes(self):
+            layering = self.layout_thread.join()
+            self.layout_thread = None
+            if layering:
+                self.__apply_layering(layering, move_camera=False)
+
+        if not self.watch_session:
+            return
+
+        is_changed = False
+
+        if not self.dynamic_order:
+            # Starts from the displayed state
+            self.dynamic_order = self.digraph.dynamic_order(self.layering.topological_order, self.reversed_edges)
+
+        while True:
+            try:
+                changed, removed = self.watch_session.changes.get_nowait()
+            except queue.Empty:
+                break
+
+            for file, includes in changed.items():
+                is_changed |= self.dynamic_order.update_dependencies(file, includes)
+
+            for file in removed:
+                if self.digraph.get_vertex_id(file) != -1:
+                    is_changed |= self.dynamic_order.update_dependencies(file, [])
+
+        if is_changed:
+            self.__refresh_layering()
+
+    def exit_state(self):
+        if self.watch_session:
+            self.toggle_watch()
+        super().exit_state()
+
+    def __init_nodes(self, move_camera: bool = True):
 
         common_props = ButtonProperties(
                 colors.DARK_CYAN,
@@ -90,16 +203,14 @@ class World(State):
         self.node_width      = 150
         self.node_height     = 50
         
-        print(f"Total vertices = {len(self.digraph)}")
-        print(f"order len = {len(self.layering.topological_order)}")
-        
-        print(f"{self.reversed_edges=}")
-        print(f"layers:\n{self.layering=}")
-        print(f"{self.layering.topological_order=}")
-        print(f"{self.layering.dummy_traversing_edges=}")
+        # Arguments are only formatted when debug logging is on
+        self.glob_log.debug("Total vertices = %d", len(self.digraph))
+        self.glob_log.debug("order len = %d", len(self.layering.topological_order))
 
-        if self.is_full_cycle:
-            return
+        self.glob_log.debug("self.reversed_edges=%r", self.reversed_edges)
+        self.glob_log.debug("layers:\nself.layering=%r", self.layering)
+        self.glob_log.debug("self.layering.topological_order=%r", self.layering.topological_order)
+        self.glob_log.debug("self.layering.dummy_traversing_edges=%r", self.layering.dummy_traversing_edges)
 
         for layer in self.layering.layers:
             layer: Layer
@@ -110,33 +221,70 @@ class World(State):
                 if vtx_id == -1:
                     continue
 
-                node_text = self.digraph.get_vertex_name(vtx_id)
+                node_dir  = self.digraph.get_vertex_dir(vtx_id)
+                node_text = self.digraph.get_vertex_basename(vtx_id)
 
-                if self.project_dir in node_text:
-                    node_text = node_text.replace(self.project_dir, "")
+                # Project files keep their path relative to the project
+                if node_dir.startswith(self.project_dir):
+                    node_text = node_dir[len(self.project_dir):] + node_text
+
+                node_x = layer.x[i]*self.horizontal_step + self.node_width/2
+                node_y = layer.level*self.vertical_step + self.node_height/2
+
+                if vtx_id in self.nodes:
+                    self.nodes[vtx_id].set_pos(node_x, node_y)
                 else:
-                    node_text = os.path.basename(node_text)
+                    self.nodes[vtx_id] = Button(
+                        node_x, node_y, self.node_width, self.node_height, common_props, node_text
+                    )
 
-                self.nodes[vtx_id] = Button(
-                    i*self.horizontal_step + self.node_width/2, layer.level*self.vertical_step + self.node_height/2,
-                    self.node_width, self.node_height, common_props, node_text
-                )
+        self.__init_edge_bends()
 
-                print(f"{i}. {node_text} {layer.level=} => {self.nodes[vtx_id].x} & {self.nodes[vtx_id].y} | size: {self.nodes[vtx_id].size}")
-        
-        self.camera.move_to(
-            *self.nodes[self.layering.topological_order[-1]].center
-        )
+        if move_camera:
+            self.camera.move_to(
+                *self.nodes[self.layering.topological_order[-1]].center
+            )
+
+    def __init_edge_bends(self) -> None:
+        """ Places bends of long edges at the coordinates of their dummy vertices,
+        once per layering instead of on every frame.
+        """
+        self.edge_bends.clear()
+
+        layers     = self.layering.layers
+        node2layer = self.layering.raw_node_layers
+        chains     = self.layering.dummy_traversing_edges
+
+        for edge in range(len(chains.sources)):
+            source, target = chains.sources[edge], chains.targets[edge]
+
+            # Dummy vertices are kept from the lowest level up
+            low   = min(node2layer[source], node2layer[target])
+            bends = [
+                (layers[low + j].x[pos]*self.horizontal_step + self.node_width,
+                 (low + j + 1)*self.vertical_step + self.node_height)
+                for j, pos in enumerate(chains.slots_of(edge))
+            ]
+
+            if node2layer[source] > node2layer[target]:
+                bends.reverse()
+
+            self.edge_bends[(source, target)] = bends
 
     def __init_warning(self) -> None:
-        if len(self.digraph) != 0 and len(self.layering.topological_order) == 0:
-            # Graph is a fully cycle, turn on the warning.
+        self.show_warning  = False
+        self.is_full_cycle = False
+
+        if len(self.cyclic_components) == 1 and len(self.cyclic_components[0]) == len(self.digraph):
+            # A single strongly connected component covers the whole graph. It's
+            # still laid out, cycle breaking always yields a complete order.
             self.warning_message = "All vertices are in the cycle"
             self.show_warning  = True
             self.is_full_cycle = True 
         elif len(self.reversed_edges) != 0:
             # Some edges were reversed in order to remove a cycle from the graph
-            self.warning_message = "Cyclic dependency detected"
+            cyclic_files = sum(len(component) for component in self.cyclic_components)
+            self.warning_message = f"Cyclic dependency detected ({len(self.cyclic_components)} cycle(s), {cyclic_files} files)"
             self.show_warning  = True
             self.is_full_cycle = False
             
@@ -171,6 +319,12 @@ class World(State):
             self.bends_enabled = not self.bends_enabled
             actions['space'] = False
 
+        if actions.get('watch'):
+            self.toggle_watch()
+            actions['watch'] = False
+
+        self.__apply_watch_changes()
+
         if not math.isclose(self.resolver.zoom_delta, 0.0):
             bf_zoom_x, bf_zoom_y = self.rel_mouse_x, self.rel_mouse_y
             self.camera.zoom(self.resolver.zoom_delta)
@@ -218,23 +372,11 @@ class World(State):
             line_color = self.line_colors.highlight
 
         if self.bends_enabled:
-            neg_factor = -1 if is_cyclic else 1
-            
-            if (node_start_id in self.layering.dummy_traversing_edges and 
-                node_end_id in self.layering.dummy_traversing_edges.get(node_start_id)):
-
-                # Draw lines in between dummy vertexes and finally, draw the arrow to the destination vertex.   
-                new_pos = (int(pos_start[0]), int(pos_start[1] - neg_factor * start_node.height/2))
-                
-                for dummy_vertex_out in self.layering.dummy_traversing_edges[node_start_id][node_end_id]:
-                    new_pos = (
-                        dummy_vertex_out * self.horizontal_step + start_node.width, 
-                        new_pos[1] + self.vertical_step * neg_factor
-                    )
-
-                    pygame.draw.line( display, line_color, self.world_to_screen(*pos_start), self.world_to_screen(*new_pos), 2)
+            # Draw lines in between dummy vertexes and finally, draw the arrow to the destination vertex.
+            for new_pos in self.edge_bends.get((node_start_id, node_end_id), ()):
+                pygame.draw.line( display, line_color, self.world_to_screen(*pos_start), self.world_to_screen(*new_pos), 2)
 
-                    pos_start = new_pos
+                pos_start = new_pos
                 
         self.draw_arrow(display, line_color, arrow_color, pos_start, pos_end, 10, 2, 0, not is_cyclic)
 
@@ -250,6 +392,10 @@ class World(State):
             # Draw outward lines
             for vtx_out in self.digraph.get_neighbors_out(node_id):
 
+                # New files get a node once their layout is done
+                if vtx_out not in self.nodes:
+                    continue
+
                 if (node_id, vtx_out) in self.reversed_edges:
                     if not node_id in self.digraph.get_neighbors_out(vtx_out):
                         continue
@@ -288,6 +434,9 @@ class World(State):
 
         self.resolver.draw_text(display, "SPACE - enable/disable line bends", colors.WHITE, self.camera.VIEW_WIDTH - 170, self.camera.VIEW_HEIGHT - 32, True)
 
+        watch_text = "W - watch mode: " + ("on" if self.watch_session else "off")
+        self.resolver.draw_text(display, watch_text, colors.WHITE, self.camera.VIEW_WIDTH - 170, self.camera.VIEW_HEIGHT - 60, True)
+
     def draw_circle(self, display, x, y, radius, color):
         """ Draws antialiased circle.
         """
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import builtins
+from typing import TextIO
+
+# Time origin of the report, this module is imported first by the entry point
+_START_TIME = time.perf_counter()
+
+class StartupReport:
+    """ Measures time to the first frame. When enabled, it records startup phases
+    and how long each newly imported module took, in the same
+    "self | cumulative | module" layout as python -X importtime.
+    """
+
+    # Imports faster than this are left out of the report
+    MIN_IMPORT_US = 1000
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.phases : list[tuple[str, float]]           = []
+        self.imports: list[tuple[int, int, int, str]]   = []
+
+        self.__depth           = 0
+        self.__children_us     = [0]
+        self.__original_import = builtins.__import__
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        self.enabled = True
+        builtins.__import__ = self.__timed_import
+
+    def disable(self) -> None:
+        if not self.enabled:
+            return
+        self.enabled = False
+        builtins.__import__ = self.__original_import
+
+    def __timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only first imports do any real work
+        if level or name in sys.modules:
+            return self.__original_import(name, globals, locals, fromlist, level)
+
+        self.__depth += 1
+        self.__children_us.append(0)
+        start = time.perf_counter()
+
+        try:
+            return self.__original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative_us = int((time.perf_counter() - start) * 1e6)
+            self_us       = cumulative_us - self.__children_us.pop()
+
+            self.__depth -= 1
+            self.__children_us[-1] += cumulative_us
+            self.imports.append((self_us, cumulative_us, self.__depth, name))
+
+    def mark(self, phase: str) -> None:
+        """ Records time since startup at the end of a phase.
+        """
+        if self.enabled:
+            self.phases.append((phase, time.perf_counter() - _START_TIME))
+
+    def format(self) -> str:
+        lines = ["Startup phases (ms since launch):"]
+        lines += [f"{elapsed * 1000:10.1f}  {phase}" for phase, elapsed in self.phases]
+        lines.append("import time: self [us] | cumulative | imported package")
+        lines += [
+            f"import time: {self_us:>9} | {cumulative_us:>10} | {'  ' * depth}{name}"
+            for self_us, cumulative_us, depth, name in self.imports
+            if cumulative_us >= self.MIN_IMPORT_US
+        ]
+        return "\n".join(lines)
+
+    def finish(self, out: TextIO = sys.stderr) -> None:
+        """ Prints the report and stops measuring imports.
+        """
+        if not self.enabled:
+            return
+        self.disable()
+        print(self.format(), file=out)
+
+report = StartupReport()
+
+def is_requested(argv: list[str]) -> bool:
+    return "--startup-report" in argv or bool(os.environ.get("DRT_STARTUP_REPORT"))
@@ -1,4 +1,5 @@
-from threading import Thread
+import os
+from threading import Thread, Lock
 
 class ThreadWithRetVal(Thread):
     def __init__(self, group=None, target=None, name=None,
@@ -16,6 +17,27 @@ class ThreadWithRetVal(Thread):
         return self._return
 
 
+class LazyLogger:
+    """ Stands in for a global_logger logger. The logger and
+    its log file are created on first use.
+    """
+
+    __creation_lock = Lock()
+
+    def __init__(self, name: str, logs_dir: str = "./log") -> None:
+        self.__name     = name
+        self.__logs_dir = os.path.abspath(logs_dir)
+        self.__logger   = None
+
+    def __getattr__(self, attr):
+        if self.__logger is None:
+            with LazyLogger.__creation_lock:
+                if self.__logger is None:
+                    from global_logger import Log
+                    self.__logger = Log.get_logger(name=self.__name, logs_dir=self.__logs_dir)
+        return getattr(self.__logger, attr)
+
+
 def make_interpolator(min_range: list, max_range: list): 
     left_span = min_range[-1] - min_range[0]  
     right_span = max_range[-1] - max_range[0]
@@ -0,0 +1,225 @@
+import os
+import sys
+import time
+import queue
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from typing import Tuple
+from src.scanner import DependencyScanner
+from src.compile_db import load_compile_commands
+from src.utils import util
+
+class PollingWatcher:
+    """ Detects changed project files by comparing
+    stat snapshots of the project tree.
+    """
+
+    def __init__(self, project_dir: str, scanner: DependencyScanner) -> None:
+        self.project_dir = project_dir
+        self.scanner     = scanner
+        self.__snapshot  = self.__take_snapshot()
+
+    def __take_snapshot(self) -> dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for file, _ in self.scanner.get_project_files(self.project_dir):
+            try:
+                stat = os.stat(file)
+            except OSError:
+                continue
+            snapshot[DependencyScanner.normalize_path(file)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout: float) -> set[str]:
+        """ Waits for timeout seconds.
+        Returns: Files that were changed, created or removed since the last poll.
+        """
+        time.sleep(timeout)
+
+        snapshot = self.__take_snapshot()
+        changed  = {
+            file for file in snapshot.keys() | self.__snapshot.keys()
+            if snapshot.get(file) != self.__snapshot.get(file)
+        }
+        self.__snapshot = snapshot
+
+        return changed
+
+    def close(self) -> None:
+        pass
+
+class InotifyWatcher:
+    """ Detects changed project files through Linux inotify.
+    """
+
+    IN_MODIFY      = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM  = 0x00000040
+    IN_MOVED_TO    = 0x00000080
+    IN_CREATE      = 0x00000100
+    IN_DELETE      = 0x00000200
+    IN_ISDIR       = 0x40000000
+
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, project_dir: str, scanner: DependencyScanner) -> None:
+        self.project_dir = project_dir
+        self.scanner     = scanner
+
+        self.__libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.__fd   = self.__libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+
+        if self.__fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # watch descriptor -> watched directory
+        self.__watches: dict[int, str] = {}
+        self.__add_tree(project_dir)
+
+    def __add_tree(self, start_dir: str) -> None:
+        # Ignored directories such as .git and build trees aren't watched
+        for root in self.scanner.file_finder.find_dirs(start_dir, self.project_dir):
+            wd = self.__libc.inotify_add_watch(self.__fd, os.fsencode(root), self.WATCH_MASK)
+            if wd >= 0:
+                self.__watches[wd] = root
+
+    def poll(self, timeout: float) -> set[str]:
+        """ Waits up to timeout seconds for events.
+        Returns: Files that were changed, created or removed.
+        """
+        changed = set()
+
+        readable, _, _ = select.select([self.__fd], [], [], timeout)
+        if not readable:
+            return changed
+
+        data   = os.read(self.__fd, 1 << 16)
+        offset = 0
+
+        while offset + self.EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+
+            name    = os.fsdecode(data[offset:offset + name_len].rstrip(b"\0"))
+            offset += name_len
+
+            directory = self.__watches.get(wd)
+            if directory is None or not name:
+                continue
+
+            path = os.path.join(directory, name)
+
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self.__add_tree(path)
+                    changed.update(file for file, _ in self.scanner.get_project_files(path, self.project_dir))
+            elif self.scanner.is_valid_project_file(name) != -1:
+                changed.add(path)
+
+        return {DependencyScanner.normalize_path(file) for file in changed}
+
+    def close(self) -> None:
+        os.close(self.__fd)
+
+def create_watcher(project_dir: str, scanner: DependencyScanner):
+    """ Returns inotify based watcher where it's available,
+    polling watcher otherwise.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(project_dir, scanner)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(project_dir, scanner)
+
+class WatchSession(threading.Thread):
+    """ Watches a project directory and rescans touched files. Results are put
+    into the changes queue as (changed files -> includes, removed files) pairs.
+    When the project was scanned from a compilation database, rescans go through
+    it as well: touched units are parsed with their own arguments, and a touched
+    header, whose includes depend on the units using it, reparses all units.
+    Rescans use their own copy of the scanner, see DependencyScanner.for_rescans().
+    """
+
+    glob_log = util.LazyLogger("WatchSession")
+
+    # Events that follow each other within this window are handled together
+    DEBOUNCE_SECONDS = 0.2
+
+    def __init__(self, project_dir: str, scanner: DependencyScanner,
+                 poll_interval: float = 0.5, compile_commands: str = None) -> None:
+        super().__init__(daemon=True)
+
+        self.project_dir      = project_dir
+        self.scanner          = scanner.for_rescans()
+        self.poll_interval    = poll_interval
+        self.compile_commands = compile_commands
+        self.changes: queue.Queue[Tuple[dict[str, list[str]], list[str]]] = queue.Queue()
+
+        self.__stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self.__stop_event.set()
+
+    def run(self) -> None:
+        watcher = create_watcher(self.project_dir, self.scanner)
+
+        self.glob_log.info(f"Watching {self.project_dir} with {type(watcher).__name__}")
+
+        try:
+            while not self.__stop_event.is_set():
+                touched = watcher.poll(self.poll_interval)
+                if not touched:
+                    continue
+
+                touched |= watcher.poll(self.DEBOUNCE_SECONDS)
+                self.changes.put(self.__rescan(touched))
+        finally:
+            watcher.close()
+
+    def __rescan(self, touched: set[str]) -> Tuple[dict[str, list[str]], list[str]]:
+        changed = {}
+        removed = []
+
+        # Touched headers may have been created or removed
+        self.scanner.forget_resolved_includes()
+
+        for file in sorted(touched):
+            if not os.path.isfile(file):
+                removed.append(file)
+                continue
+            if self.compile_commands:
+                # Units are parsed below, with their arguments
+                continue
+            try:
+                changed[file] = self.scanner.get_includes(file)
+            except Exception:
+                self.glob_log.exception(f"Failed to rescan {file}")
+
+        if self.compile_commands:
+            changed = self.__rescan_units(touched.difference(removed))
+
+        return changed, removed
+
+    def __rescan_units(self, touched: set[str]) -> dict[str, list[str]]:
+        """ Reparses translation units of the compilation database
+        affected by the touched files.
+        """
+        if not touched:
+            return {}
+
+        changed: dict[str, list[str]] = {}
+        try:
+            listed = {DependencyScanner.normalize_path(command.file) for command in load_compile_commands(self.compile_commands)}
+            units  = None if touched - listed else touched
+
+            for file, includes in self.scanner.iter_compile_commands(self.compile_commands, self.project_dir, units):
+                changed.setdefault(file, []).extend(includes)
+        except Exception:
+            self.glob_log.exception(f"Failed to rescan units of {self.compile_commands}")
+
+        return changed
@@ -0,0 +1,33 @@
+from collections import Counter
+from src.ds.graph import DirectedGraph
+from src.ds.csr_graph import CSRDirectedGraph
+
+def edges_of(graph) -> Counter:
+    return Counter((u, v) for u in range(len(graph)) for v in graph.get_neighbors_out(u))
+
+def test_undo_reversed_edges_restores_two_cycle():
+    # a.h and b.h include each other, c.h closes a longer cycle
+    graph = DirectedGraph.from_dependency_map({
+        "a.h": ["b.h", "c.h"],
+        "b.h": ["a.h"],
+        "c.h": ["b.h"],
+    })
+    initial = edges_of(graph)
+
+    graph.remove_cycle_and_sort()
+    assert graph.reversed_edges
+
+    csr = CSRDirectedGraph.from_graph(graph)
+    csr.undo_reversed_edges()
+
+    assert edges_of(csr) == initial
+    assert csr.reversed_edges == []
+
+def test_undo_reversed_edges_without_cycles_keeps_graph():
+    graph = DirectedGraph.from_dependency_map({"a.c": ["a.h"], "a.h": []})
+    graph.remove_cycle_and_sort()
+
+    csr = CSRDirectedGraph.from_graph(graph)
+    csr.undo_reversed_edges()
+
+    assert edges_of(csr) == edges_of(graph)
@@ -0,0 +1,110 @@
+import random
+import itertools
+from collections import Counter
+from src.ds.graph import DirectedGraph
+from src.ds.cycle_breaking import (
+    ComponentBreaker, EadesLinSmythBreaker, MinimumFASBreaker, QueueHeuristicBreaker, backward_edges
+)
+
+def make_graph(num_vertices: int, edges: list) -> DirectedGraph:
+    graph = DirectedGraph()
+    for vtx in range(num_vertices):
+        graph.add_vertex(f"{vtx}.h")
+    for u, v in edges:
+        graph.add_edge(u, v)
+    return graph
+
+def random_graph(num_vertices: int, num_edges: int, seed: int) -> DirectedGraph:
+    rng = random.Random(seed)
+    return make_graph(num_vertices, [
+        (rng.randrange(num_vertices), rng.randrange(num_vertices)) for _ in range(num_edges)
+    ])
+
+def assert_breaks_cycles(graph, order, reversed_edges):
+    assert sorted(order) == list(range(len(graph)))
+
+    # Reversing exactly the backward edges, self loops aside, makes the order topological
+    assert Counter(reversed_edges) == Counter(backward_edges(graph, order))
+
+def test_greedy_fas_on_two_cycles():
+    # 0 <-> 1 and 2 -> 3 -> 4 -> 2
+    graph = make_graph(5, [(0, 1), (1, 0), (2, 3), (3, 4), (4, 2), (1, 2)])
+    order, reversed_edges = EadesLinSmythBreaker().break_cycles(graph)
+
+    assert_breaks_cycles(graph, order, reversed_edges)
+    assert len(reversed_edges) == 2
+
+def test_greedy_fas_keeps_acyclic_order():
+    graph = make_graph(4, [(0, 1), (0, 2), (1, 3), (2, 3)])
+    order, reversed_edges = EadesLinSmythBreaker().break_cycles(graph)
+
+    assert reversed_edges == []
+    assert_breaks_cycles(graph, order, reversed_edges)
+
+def test_greedy_fas_leaves_self_loops():
+    graph = make_graph(2, [(0, 0), (0, 1)])
+    order, reversed_edges = EadesLinSmythBreaker().break_cycles(graph)
+
+    assert order == [0, 1]
+    assert reversed_edges == []
+
+def test_greedy_fas_bound_on_random_graphs():
+    for seed in range(20):
+        graph = random_graph(40, 120, seed)
+        order, reversed_edges = EadesLinSmythBreaker().break_cycles(graph)
+
+        assert_breaks_cycles(graph, order, reversed_edges)
+        assert len(reversed_edges) <= 120 / 2 - 40 / 6
+
+def test_component_breaker_reverses_only_inside_components():
+    # Edges between components never close a cycle
+    graph = make_graph(6, [(0, 1), (1, 0), (1, 2), (2, 3), (3, 4), (4, 5), (5, 3), (0, 5)])
+    order, reversed_edges = ComponentBreaker(EadesLinSmythBreaker()).break_cycles(graph)
+
+    assert_breaks_cycles(graph, order, reversed_edges)
+    assert len(reversed_edges) == 2
+    assert all({u, v} <= {0, 1} or {u, v} <= {3, 4, 5} for u, v in reversed_edges)
+
+def test_component_breaker_on_random_graphs():
+    for seed in range(20):
+        graph = random_graph(30, 60, seed)
+        order, reversed_edges = ComponentBreaker(EadesLinSmythBreaker()).break_cycles(graph)
+        assert_breaks_cycles(graph, order, reversed_edges)
+
+def test_queue_breaker_reports_ring_with_empty_order():
+    graph = make_graph(3, [(0, 1), (1, 2), (2, 0)])
+    assert QueueHeuristicBreaker().break_cycles(graph) == ([], [])
+
+def test_queue_breaker_with_source():
+    graph = make_graph(4, [(0, 1), (1, 2), (2, 3), (3, 1)])
+    order, reversed_edges = QueueHeuristicBreaker().break_cycles(graph)
+
+    assert_breaks_cycles(graph, order, reversed_edges)
+    assert order[0] == 0
+
+def minimum_backward_edges(graph) -> int:
+    return min(len(backward_edges(graph, order)) for order in itertools.permutations(range(len(graph))))
+
+def test_minimum_fas_is_optimal_on_small_graphs():
+    for seed in range(30):
+        graph = random_graph(6, 12, seed)
+        order, reversed_edges = MinimumFASBreaker(workers=1).break_cycles(graph)
+
+        assert_breaks_cycles(graph, order, reversed_edges)
+        assert len(reversed_edges) == minimum_backward_edges(graph)
+
+def test_minimum_fas_counts_parallel_edges():
+    # Three includes of 1 from 0 outweigh the two edges back to 0
+    graph = make_graph(3, [(0, 1), (0, 1), (0, 1), (1, 0), (1, 2), (2, 0)])
+    order, reversed_edges = MinimumFASBreaker(workers=1).break_cycles(graph)
+
+    assert_breaks_cycles(graph, order, reversed_edges)
+    assert Counter(reversed_edges) == Counter({(1, 0): 1, (2, 0): 1})
+
+def test_minimum_fas_improves_large_components():
+    graph = random_graph(40, 160, 7)
+    _, greedy_reversed = ComponentBreaker(EadesLinSmythBreaker()).break_cycles(graph)
+    order, reversed_edges = MinimumFASBreaker(exact_limit=0, time_budget=0.5, workers=1).break_cycles(graph)
+
+    assert_breaks_cycles(graph, order, reversed_edges)
+    assert len(reversed_edges) <= len(greedy_reversed)
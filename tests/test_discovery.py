@@ -0,0 +1,85 @@
+import os
+from src.discovery import ProjectFileFinder, is_ignored, parse_ignore_rules
+
+EXTENSIONS = [".cpp", ".c", ".hpp", ".h"]
+
+def make_tree(root, files: dict) -> None:
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+def found(root, finder: ProjectFileFinder, start_dir=None) -> list[str]:
+    start_dir = str(start_dir or root)
+    return [
+        os.path.relpath(file, root).replace(os.sep, "/")
+        for file, _ in finder.find(start_dir, str(root))
+    ]
+
+def test_rule_translation():
+    rules = parse_ignore_rules(["*.o", "/build/", "docs/**/gen", "!keep.o", "# comment", ""])
+
+    assert is_ignored(rules, "a.o", False)
+    assert is_ignored(rules, "src/a.o", False)
+    assert not is_ignored(rules, "keep.o", False)
+    assert is_ignored(rules, "build", True)
+    # Directory only rule and anchored to the ignore file
+    assert not is_ignored(rules, "build", False)
+    assert not is_ignored(rules, "src/build", True)
+    assert is_ignored(rules, "docs/gen", False)
+    assert is_ignored(rules, "docs/a/b/gen", True)
+
+def test_rules_of_nested_ignore_file_are_relative_to_it():
+    rules = parse_ignore_rules(["/gen.h"], "sub/")
+
+    assert is_ignored(rules, "sub/gen.h", False)
+    assert not is_ignored(rules, "gen.h", False)
+    assert not is_ignored(rules, "sub/deeper/gen.h", False)
+
+def test_gitignore_prunes_files_and_directories(tmp_path):
+    make_tree(tmp_path, {
+        ".gitignore"        : "build/\n*.gen.h\n",
+        "a.c"               : "",
+        "a.gen.h"           : "",
+        "notes.txt"         : "",
+        "build/b.c"         : "",
+        ".git/c.h"          : "",
+        "sub/.gitignore"    : "/local.h\n!keep.gen.h\n",
+        "sub/local.h"       : "",
+        "sub/keep.gen.h"    : "",
+        "sub/d.hpp"         : "",
+        "sub/deeper/local.h": "",
+    })
+
+    finder = ProjectFileFinder(EXTENSIONS)
+    assert found(tmp_path, finder) == ["a.c", "sub/d.hpp", "sub/deeper/local.h", "sub/keep.gen.h"]
+
+    file_types = dict(finder.find(str(tmp_path)))
+    assert file_types[os.path.join(str(tmp_path), "a.c")] == EXTENSIONS.index(".c")
+
+def test_excludes_and_disabled_gitignore(tmp_path):
+    make_tree(tmp_path, {
+        ".gitignore"  : "*.h\n",
+        "a.h"         : "",
+        "third/b.h"   : "",
+        "src/c.cpp"   : "",
+    })
+
+    finder = ProjectFileFinder(EXTENSIONS, excludes=["third/"], use_gitignore=False)
+    assert found(tmp_path, finder) == ["a.h", "src/c.cpp"]
+
+def test_walk_below_root_uses_rules_above(tmp_path):
+    make_tree(tmp_path, {
+        ".gitignore"     : "build/\ngen/\n",
+        "src/a.h"        : "",
+        "src/gen/b.h"    : "",
+        "src/new/c.h"    : "",
+        "build/out/d.h"  : "",
+    })
+
+    finder = ProjectFileFinder(EXTENSIONS)
+    assert found(tmp_path, finder, tmp_path / "src") == ["src/a.h", "src/new/c.h"]
+    assert found(tmp_path, finder, tmp_path / "build" / "out") == []
+
+    directories = finder.find_dirs(str(tmp_path), str(tmp_path))
+    assert sorted(os.path.relpath(d, tmp_path).replace(os.sep, "/") for d in directories) == [".", "src", "src/new"]
@@ -0,0 +1,84 @@
+import random
+from src.ds.graph import DirectedGraph
+
+def make_graph(num_vertices: int, edges: list) -> DirectedGraph:
+    graph = DirectedGraph()
+    for vtx in range(num_vertices):
+        graph.add_vertex(f"{vtx}.h")
+    for u, v in edges:
+        graph.add_edge(u, v)
+    return graph
+
+def assert_topological(graph, dynamic):
+    order = dynamic.topological_order()
+    assert sorted(order) == list(range(len(graph)))
+    assert [dynamic.position(vtx) for vtx in order] == list(range(len(order)))
+
+    reversed_edges = set(dynamic.reversed_edges)
+    for u in range(len(graph)):
+        for v in graph.get_neighbors_out(u):
+            if (u, v) in reversed_edges:
+                assert dynamic.position(v) < dynamic.position(u)
+            else:
+                assert dynamic.position(u) < dynamic.position(v)
+
+def test_edge_against_order_moves_vertices():
+    graph   = make_graph(4, [(0, 1), (2, 3)])
+    dynamic = graph.dynamic_order([0, 1, 2, 3], [])
+
+    dynamic.add_edge(3, 0)
+
+    assert dynamic.reversed_edges == []
+    assert_topological(graph, dynamic)
+
+def test_edge_closing_cycle_is_reversed_until_cycle_breaks():
+    graph   = make_graph(3, [(0, 1), (1, 2)])
+    dynamic = graph.dynamic_order([0, 1, 2], [])
+
+    dynamic.add_edge(2, 0)
+    assert dynamic.reversed_edges == [(2, 0)]
+    assert_topological(graph, dynamic)
+
+    # Without (0,1) the reversed edge fits the order again
+    dynamic.remove_edge(0, 1)
+    assert dynamic.reversed_edges == []
+    assert_topological(graph, dynamic)
+
+def test_removing_reversed_edge_forgets_it():
+    graph   = make_graph(2, [(0, 1)])
+    dynamic = graph.dynamic_order([0, 1], [])
+
+    dynamic.add_edge(1, 0)
+    dynamic.remove_edge(1, 0)
+
+    assert dynamic.reversed_edges == []
+    assert graph.get_neighbors_out(1) == []
+
+def test_update_dependencies_places_new_files():
+    graph   = DirectedGraph.from_dependency_map({"a.c": ["a.h"], "a.h": []})
+    dynamic = graph.dynamic_order()
+
+    assert dynamic.update_dependencies("b.c", ["a.h", "b.h"])
+    assert not dynamic.update_dependencies("b.c", ["b.h", "a.h"])
+
+    assert len(dynamic.topological_order()) == len(graph) == 4
+    assert_topological(graph, dynamic)
+
+def test_random_edge_changes_keep_order():
+    rng     = random.Random(4)
+    graph   = make_graph(30, [])
+    dynamic = graph.dynamic_order()
+    edges   = set()
+
+    for _ in range(600):
+        u, v = rng.randrange(30), rng.randrange(30)
+        if u == v:
+            continue
+        if (u, v) in edges:
+            dynamic.remove_edge(u, v)
+            edges.remove((u, v))
+        else:
+            dynamic.add_edge(u, v)
+            edges.add((u, v))
+
+        assert_topological(graph, dynamic)
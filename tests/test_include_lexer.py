@@ -0,0 +1,72 @@
+from src.include_lexer import scan_includes
+
+def test_guarded_includes_are_unconditional():
+    includes, needs_cpp = scan_includes(
+        "#ifndef A_H\n"
+        "#define A_H\n"
+        "#include <vector>\n"
+        "#endif\n"
+    )
+    assert includes == [("vector", True)]
+    assert not needs_cpp
+
+def test_conditional_include_after_guard_closes():
+    includes, needs_cpp = scan_includes(
+        "#ifndef A_H\n"
+        "#define A_H\n"
+        "#include \"b.h\"\n"
+        "#endif\n"
+        "#ifdef WITH_C\n"
+        "#include \"c.h\"\n"
+        "#endif\n"
+    )
+    assert includes == [("b.h", False), ("c.h", False)]
+    assert needs_cpp
+
+def test_guard_after_pragma_once():
+    includes, needs_cpp = scan_includes(
+        "#pragma once\n"
+        "#ifndef A_H\n"
+        "#define A_H\n"
+        "#include \"b.h\"\n"
+        "#endif\n"
+    )
+    assert includes == [("b.h", False)]
+    assert not needs_cpp
+
+def test_guard_after_license_block():
+    includes, needs_cpp = scan_includes(
+        "#if 0\n"
+        "Licensed under the MIT license, #include <nothing> here\n"
+        "#endif\n"
+        "#if defined(_MSC_VER)\n"
+        "#pragma once\n"
+        "#endif\n"
+        "#if !defined(A_H)\n"
+        "#define A_H\n"
+        "#include <vector>\n"
+        "#endif\n"
+    )
+    assert includes == [("vector", True)]
+    assert not needs_cpp
+
+def test_guard_needs_define_right_after_conditional():
+    includes, needs_cpp = scan_includes(
+        "#ifndef A_H\n"
+        "#include \"b.h\"\n"
+        "#define A_H\n"
+        "#endif\n"
+    )
+    assert includes == [("b.h", False)]
+    assert needs_cpp
+
+def test_no_guard_after_top_level_include():
+    includes, needs_cpp = scan_includes(
+        "#include \"config.h\"\n"
+        "#ifndef USE_B\n"
+        "#define USE_B\n"
+        "#include \"b.h\"\n"
+        "#endif\n"
+    )
+    assert includes == [("config.h", False), ("b.h", False)]
+    assert needs_cpp
@@ -0,0 +1,79 @@
+import random
+from src.ds.graph import DirectedGraph
+from src.layer_assignment import (
+    CoffmanGrahamAssigner, LongestPathAssigner, NetworkSimplexAssigner, count_dummy_vertices
+)
+
+def make_dag(num_vertices: int, edges: list) -> DirectedGraph:
+    graph = DirectedGraph()
+    for vtx in range(num_vertices):
+        graph.add_vertex(f"{vtx}.h")
+    for u, v in edges:
+        graph.add_edge(u, v)
+    return graph
+
+def random_dag(num_vertices: int, num_edges: int, seed: int) -> DirectedGraph:
+    """ Edges go from lower to higher ids, so range(num_vertices) is a topological order.
+    """
+    rng = random.Random(seed)
+    return make_dag(num_vertices, [tuple(sorted(rng.sample(range(num_vertices), 2))) for _ in range(num_edges)])
+
+def assert_valid_layering(graph, node2layer):
+    assert len(node2layer) == len(graph)
+    assert min(node2layer, default=1) == 1
+    for u in range(len(graph)):
+        for v in graph.get_neighbors_out(u):
+            assert node2layer[u] < node2layer[v]
+
+def test_longest_path_layers_chain():
+    graph = make_dag(4, [(0, 1), (1, 2), (2, 3), (0, 3)])
+    assert list(LongestPathAssigner().assign(graph, [0, 1, 2, 3])) == [1, 2, 3, 4]
+
+def test_all_assigners_give_valid_layerings():
+    assigners = [
+        LongestPathAssigner(),
+        CoffmanGrahamAssigner(),
+        CoffmanGrahamAssigner(width=2),
+        NetworkSimplexAssigner(),
+        NetworkSimplexAssigner(balance=False),
+    ]
+    for seed in range(10):
+        graph = random_dag(40, 80, seed)
+        for assigner in assigners:
+            assert_valid_layering(graph, assigner.assign(graph, list(range(len(graph)))))
+
+def test_coffman_graham_keeps_width():
+    # Ten independent vertices above a single sink
+    graph = make_dag(11, [(vtx, 10) for vtx in range(10)])
+    node2layer = CoffmanGrahamAssigner(width=3).assign(graph, list(range(11)))
+
+    assert_valid_layering(graph, node2layer)
+    assert max(list(node2layer).count(layer) for layer in set(node2layer)) <= 3
+    assert max(node2layer) == 5
+
+def test_network_simplex_shortens_edges():
+    # Source 4 joins the chain only at its end
+    graph = make_dag(5, [(0, 1), (1, 2), (2, 3), (4, 3)])
+    order = [0, 4, 1, 2, 3]
+
+    longest = LongestPathAssigner().assign(graph, order)
+    simplex = NetworkSimplexAssigner(balance=False).assign(graph, order)
+
+    assert count_dummy_vertices(graph, longest) == 2
+    assert count_dummy_vertices(graph, simplex) == 0
+    assert simplex[4] == simplex[2]
+
+def test_network_simplex_never_adds_dummies():
+    for seed in range(10):
+        graph = random_dag(40, 80, seed)
+        order = list(range(len(graph)))
+
+        longest = LongestPathAssigner().assign(graph, order)
+        simplex = NetworkSimplexAssigner().assign(graph, order)
+
+        assert count_dummy_vertices(graph, simplex) <= count_dummy_vertices(graph, longest)
+
+def test_empty_graph():
+    graph = DirectedGraph()
+    for assigner in (LongestPathAssigner(), CoffmanGrahamAssigner(), NetworkSimplexAssigner()):
+        assert len(assigner.assign(graph, [])) == 0
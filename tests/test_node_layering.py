@@ -0,0 +1,205 @@
+import random
+from src.ds.graph import DirectedGraph
+from src.layer_assignment import count_dummy_vertices
+from src.node_layering import Layering
+
+def random_graph(num_vertices: int, num_edges: int, seed: int) -> DirectedGraph:
+    rng   = random.Random(seed)
+    graph = DirectedGraph()
+    for vtx in range(num_vertices):
+        graph.add_vertex(f"{vtx}.h")
+    for _ in range(num_edges):
+        u, v = rng.sample(range(num_vertices), 2)
+        graph.add_edge(u, v)
+    return graph
+
+def layered(graph: DirectedGraph) -> Layering:
+    """ Layering of the acyclic view with dummy vertices on edges of the graph itself.
+    """
+    top_order, dag = graph.acyclic_view()
+    layering = Layering(dag, top_order)
+    layering.compute_layers()
+    layering.proper_layering(graph)
+    return layering
+
+def test_proper_layering_chains_every_long_edge():
+    for seed in range(5):
+        graph    = random_graph(30, 70, seed)
+        layering = layered(graph)
+
+        node2layer = layering.raw_node_layers
+        layers     = layering.layers
+        chains     = layering.dummy_traversing_edges
+
+        for layer in layers:
+            assert [vtx for vtx in layer.nodes if vtx != -1] == sorted(vtx for vtx in range(len(graph)) if node2layer[vtx] == layer.level)
+
+        # Every dummy slot belongs to exactly one chain
+        dummy_slots = {(layer.level, pos) for layer in layers for pos, vtx in enumerate(layer.nodes) if vtx == -1}
+        chained     = []
+        # Parallel edges have a chain each, so chains are read by edge
+        for edge in range(len(chains.sources)):
+            slots     = chains.slots_of(edge)
+            low, high = sorted((node2layer[chains.sources[edge]], node2layer[chains.targets[edge]]))
+            assert len(slots) == high - low - 1
+            chained.extend((low + 1 + i, pos) for i, pos in enumerate(slots))
+
+        assert sorted(chained) == sorted(dummy_slots)
+        assert len(chained) == count_dummy_vertices(graph, node2layer)
+
+def test_proper_layering_can_be_repeated():
+    graph    = random_graph(30, 70, 1)
+    layering = layered(graph)
+
+    layers = [layer.nodes.tolist() for layer in layering.layers]
+    chains = repr(layering.dummy_traversing_edges)
+
+    layering.proper_layering(graph)
+
+    assert [layer.nodes.tolist() for layer in layering.layers] == layers
+    assert repr(layering.dummy_traversing_edges) == chains
+
+def test_proper_layering_across_many_layers():
+    # More layers than fit into a single block of slot cursors
+    num_vertices = 300
+    graph = DirectedGraph()
+    for vtx in range(num_vertices):
+        graph.add_vertex(f"{vtx}.h")
+    for vtx in range(num_vertices - 1):
+        graph.add_edge(vtx, vtx + 1)
+    long_edges = [(0, 299), (10, 200), (5, 140), (60, 70)]
+    for u, v in long_edges:
+        graph.add_edge(u, v)
+
+    layering = layered(graph)
+    chains   = layering.dummy_traversing_edges
+
+    # Chains take the dummy slots of a layer in the order of their
+    # sources, behind the single real vertex of every layer
+    taken = {}
+    for u, v in sorted(long_edges):
+        expected = []
+        for level in range(u + 2, v + 1):
+            taken[level] = taken.get(level, 0) + 1
+            expected.append(taken[level])
+        assert list(chains[u][v]) == expected
+
+    assert sum(len(layer.nodes) for layer in layering.layers) == num_vertices + sum(v - u - 1 for u, v in long_edges)
+
+def segments(layering: Layering, graph) -> dict:
+    """ Edges of the proper layered graph as positions in their
+    two layers, keyed by the level of the upper layer.
+    """
+    node2layer = layering.raw_node_layers
+    position   = {}
+    for layer in layering.layers:
+        for pos, vtx in enumerate(layer.nodes):
+            if vtx != -1:
+                position[vtx] = pos
+
+    pairs = {}
+    for u in range(len(graph)):
+        for v in graph.get_neighbors_out(u):
+            if abs(node2layer[u] - node2layer[v]) == 1:
+                upper, lower = sorted((u, v), key=node2layer.__getitem__)
+                pairs.setdefault(node2layer[upper], []).append((position[upper], position[lower]))
+
+    chains = layering.dummy_traversing_edges
+    for edge in range(len(chains.sources)):
+        upper, lower = sorted((chains.sources[edge], chains.targets[edge]), key=node2layer.__getitem__)
+        path = [position[upper], *chains.slots_of(edge), position[lower]]
+        for i in range(len(path) - 1):
+            pairs.setdefault(node2layer[upper] + i, []).append((path[i], path[i+1]))
+
+    return pairs
+
+def brute_force_crossings(layering: Layering, graph) -> int:
+    return sum(
+        1
+        for pair in segments(layering, graph).values()
+        for i, (a, b) in enumerate(pair)
+        for c, d in pair[i+1:]
+        if (a - c) * (b - d) < 0
+    )
+
+def test_count_crossings_matches_brute_force():
+    for seed in range(5):
+        graph    = random_graph(25, 60, seed)
+        layering = layered(graph)
+        assert layering.count_crossings() == brute_force_crossings(layering, graph)
+
+def test_minimize_crossings_reduces_count():
+    for seed in range(5):
+        graph    = random_graph(25, 60, seed)
+        layering = layered(graph)
+        initial  = layering.count_crossings()
+
+        crossings = layering.minimize_crossings(time_budget=5.0)
+
+        assert crossings == layering.count_crossings() == brute_force_crossings(layering, graph)
+        assert crossings <= initial
+
+def test_minimize_crossings_untangles_swapped_pair():
+    # 0 and 1 include each other's targets in swapped order
+    graph = DirectedGraph()
+    for vtx in range(4):
+        graph.add_vertex(f"{vtx}.h")
+    graph.add_edge(0, 3)
+    graph.add_edge(1, 2)
+
+    layering = layered(graph)
+    assert layering.count_crossings() == 1
+
+    assert layering.minimize_crossings() == 0
+    assert layering.count_crossings() == 0
+
+def test_minimize_crossings_keeps_real_vertices_in_their_layers():
+    graph    = random_graph(25, 60, 2)
+    layering = layered(graph)
+    before   = [sorted(layer.nodes.tolist()) for layer in layering.layers]
+
+    layering.minimize_crossings(median=True)
+
+    assert [sorted(layer.nodes.tolist()) for layer in layering.layers] == before
+
+def test_coordinates_keep_order_and_separation():
+    for seed in range(5):
+        graph    = random_graph(40, 90, seed)
+        layering = layered(graph)
+        layering.minimize_crossings()
+        order    = [layer.nodes.tolist() for layer in layering.layers]
+
+        layering.assign_coordinates()
+
+        assert [layer.nodes.tolist() for layer in layering.layers] == order
+        for layer in layering.layers:
+            x = layer.x.tolist()
+            assert all(right - left >= 1 - 1e-9 for left, right in zip(x, x[1:]))
+
+def test_coordinates_straighten_a_path():
+    graph = DirectedGraph()
+    for vtx in range(5):
+        graph.add_vertex(f"{vtx}.h")
+    for vtx in range(4):
+        graph.add_edge(vtx, vtx + 1)
+
+    layering = layered(graph)
+    layering.assign_coordinates()
+
+    assert len({layer.x[0] for layer in layering.layers}) == 1
+
+def test_coordinates_keep_long_edge_straight():
+    # 0 includes 3 past the path 0 -> 1 -> 2 -> 3, the dummy chain of the
+    # long edge is an inner segment and stays vertical
+    graph = DirectedGraph()
+    for vtx in range(5):
+        graph.add_vertex(f"{vtx}.h")
+    for u, v in [(0, 1), (1, 2), (2, 3), (0, 3), (4, 3)]:
+        graph.add_edge(u, v)
+
+    layering = layered(graph)
+    layering.arrange()
+
+    chain  = list(layering.dummy_traversing_edges[0][3])
+    layers = layering.layers
+    assert len({layers[1 + i].x[pos] for i, pos in enumerate(chain)}) == 1
@@ -0,0 +1,66 @@
+import random
+from src.ds.graph import DirectedGraph
+from src.ds.reachability import ReachabilityIndex
+
+def random_graph(num_vertices: int, num_edges: int, seed: int) -> DirectedGraph:
+    rng   = random.Random(seed)
+    graph = DirectedGraph()
+    for vtx in range(num_vertices):
+        graph.add_vertex(f"{vtx}.h")
+    for _ in range(num_edges):
+        u, v = rng.sample(range(num_vertices), 2)
+        graph.add_edge(u, v)
+    return graph
+
+def reachable(graph, vertex: int) -> set[int]:
+    """ Vertices reachable through at least one edge.
+    """
+    seen, stack = set(), [vertex]
+    while stack:
+        for vx_out in graph.get_neighbors_out(stack.pop()):
+            if vx_out not in seen:
+                seen.add(vx_out)
+                stack.append(vx_out)
+    return seen
+
+def check_against_search(index: ReachabilityIndex, graph):
+    expected = [reachable(graph, vtx) for vtx in range(len(graph))]
+
+    for u in range(len(graph)):
+        assert index.dependents(u) == sorted(expected[u])
+        for v in range(len(graph)):
+            assert index.reaches(u, v) == (v in expected[u])
+
+    batch = [0, 3, 5]
+    assert index.dependents_of(batch) == sorted(set().union(*(expected[vtx] for vtx in batch)))
+
+def test_closure_matches_search():
+    for seed in range(5):
+        graph = random_graph(25, 40, seed)
+        index = graph.reachability_index()
+
+        assert index.is_indexed
+        check_against_search(index, graph)
+
+def test_search_without_closure_matches_search():
+    for seed in range(5):
+        graph = random_graph(25, 40, seed)
+        index = graph.reachability_index(memory_limit=0)
+
+        assert not index.is_indexed
+        check_against_search(index, graph)
+
+def test_vertex_reaches_itself_only_on_cycle():
+    # a.h is included by b.h and c.h, b.h and c.h include each other
+    graph = DirectedGraph.from_dependency_map({"b.h": ["a.h", "c.h"], "c.h": ["b.h"], "a.h": []})
+    a, b, c = (graph.get_vertex_id(name) for name in ("a.h", "b.h", "c.h"))
+    index = graph.reachability_index()
+
+    assert index.dependents(a) == sorted([b, c])
+    assert index.reaches(b, b)
+    assert not index.reaches(a, a)
+    assert not index.reaches(b, a)
+
+def test_empty_graph():
+    index = ReachabilityIndex(DirectedGraph(), memory_limit=0)
+    assert index.dependents_of([]) == []
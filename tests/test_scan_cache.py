@@ -0,0 +1,70 @@
+import os
+from src.scan_cache import ScanCache
+
+def test_lookup_returns_stored_includes(tmp_path):
+    source = tmp_path / "a.c"
+    header = tmp_path / "a.h"
+    source.write_text('#include "a.h"\n')
+    header.write_text("")
+
+    with ScanCache(str(tmp_path / "cache")) as cache:
+        assert cache.lookup(str(source)) is None
+
+        cache.store(str(source), [str(header)])
+        cache.store(str(header), [])
+
+        assert cache.lookup(str(source)) == [str(header)]
+        assert cache.lookup(str(header)) == []
+
+    # Entries outlive the connection
+    with ScanCache(str(tmp_path / "cache")) as cache:
+        assert cache.lookup(str(source)) == [str(header)]
+
+def test_changed_content_invalidates_entry(tmp_path):
+    source = tmp_path / "a.c"
+    source.write_text("int a;\n")
+
+    with ScanCache(str(tmp_path / "cache")) as cache:
+        cache.store(str(source), [])
+
+        # Same size, only the content hash can tell
+        stat = os.stat(source)
+        source.write_text("int b;\n")
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert cache.lookup(str(source)) is None
+
+def test_touched_file_with_same_content_stays_cached(tmp_path):
+    source = tmp_path / "a.c"
+    source.write_text("int a;\n")
+
+    with ScanCache(str(tmp_path / "cache")) as cache:
+        cache.store(str(source), [])
+
+        stat = os.stat(source)
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert cache.lookup(str(source)) == []
+
+def test_removed_include_invalidates_entry(tmp_path):
+    source = tmp_path / "a.c"
+    header = tmp_path / "a.h"
+    source.write_text('#include "a.h"\n')
+    header.write_text("")
+
+    with ScanCache(str(tmp_path / "cache")) as cache:
+        cache.store(str(source), [str(header)])
+        os.remove(header)
+        assert cache.lookup(str(source)) is None
+
+def test_variants_and_removed_files(tmp_path):
+    source = tmp_path / "a.c"
+    source.write_text("")
+
+    with ScanCache(str(tmp_path / "cache"), "lexical") as cache:
+        cache.store(str(source), [])
+
+    with ScanCache(str(tmp_path / "cache"), "libclang") as cache:
+        assert cache.lookup(str(source)) is None
+
+    os.remove(source)
+    with ScanCache(str(tmp_path / "cache"), "lexical") as cache:
+        assert cache.lookup(str(source)) is None
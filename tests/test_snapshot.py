@@ -0,0 +1,103 @@
+import os
+import time
+import pytest
+from collections import Counter
+from src.ds.graph import DirectedGraph
+from src.snapshot import Snapshot, SnapshotError
+
+def edges_of(graph) -> Counter:
+    return Counter((u, v) for u in range(len(graph)) for v in graph.get_neighbors_out(u))
+
+def make_project(root, files: dict) -> dict:
+    """ Writes files of a project and returns its dependency map with absolute paths.
+    """
+    for name in files:
+        (root / name).write_text("")
+    project = str(root).replace("\\", "/")
+    return {f"{project}/{name}": [f"{project}/{incl}" for incl in includes] for name, includes in files.items()}
+
+def write_snapshot(path, project_dir: str, dependencies: dict, scan_started: int = None) -> DirectedGraph:
+    graph = DirectedGraph.from_dependency_map(dependencies)
+    top_order, dag = graph.acyclic_view()
+    layers = [1 + top_order.index(vtx) for vtx in range(len(graph))]
+    Snapshot.write(str(path), project_dir, graph, top_order, layers, dag.reversed_edges, scan_started)
+    return graph
+
+def test_round_trip(tmp_path):
+    dependencies = make_project(tmp_path, {"a.c": ["a.h", "b.h"], "a.h": ["b.h"], "b.h": ["a.h"]})
+    project_dir  = str(tmp_path).replace("\\", "/")
+    path         = tmp_path / "graph.drts"
+    graph        = write_snapshot(path, project_dir, dependencies, scan_started=123)
+    top_order, dag = graph.acyclic_view()
+
+    with Snapshot(str(path)) as snapshot:
+        assert snapshot.project_dir == project_dir
+        assert snapshot.scan_started == 123
+        assert snapshot.names == [graph.get_vertex_name(vtx) for vtx in range(len(graph))]
+        assert list(snapshot.topological_order) == top_order
+        assert snapshot.reversed_edges == dag.reversed_edges
+        assert edges_of(snapshot.to_csr_graph()) == edges_of(graph)
+
+        loaded = snapshot.to_directed_graph("/elsewhere")
+
+    assert edges_of(loaded) == edges_of(graph)
+    assert loaded.get_vertex_name(0).startswith("/elsewhere/")
+
+def test_graph_without_cycles_is_stored_in_initial_state(tmp_path):
+    graph = DirectedGraph.from_dependency_map({"/p/a.h": ["/p/b.h"], "/p/b.h": ["/p/a.h"]})
+    initial = edges_of(graph)
+    top_order = graph.remove_cycle_and_sort()
+    reversed_edges = list(graph.reversed_edges)
+
+    path = str(tmp_path / "graph.drts")
+    Snapshot.write(path, "/p", graph, top_order, [1, 2])
+
+    with Snapshot(path) as snapshot:
+        assert snapshot.reversed_edges == reversed_edges
+        assert snapshot.scan_started is None
+        assert edges_of(snapshot.to_directed_graph()) == initial
+
+def test_freshness(tmp_path):
+    started      = time.time_ns()
+    dependencies = make_project(tmp_path, {"a.c": ["a.h"], "a.h": []})
+    project_dir  = str(tmp_path).replace("\\", "/")
+    path         = tmp_path / "graph.drts"
+    files        = sorted(dependencies)
+
+    # Files written before the scan started
+    for file in files:
+        os.utime(file, ns=(started - 10**9, started - 10**9))
+    write_snapshot(path, project_dir, dependencies, scan_started=started)
+
+    with Snapshot(str(path)) as snapshot:
+        assert snapshot.is_fresh(files)
+        # A project file missing in the snapshot
+        assert not snapshot.is_fresh(files + [f"{project_dir}/b.c"])
+
+        # An extra file, e.g. the compilation database, changed later
+        database = tmp_path / "compile_commands.json"
+        database.write_text("[]")
+        os.utime(database, ns=(started + 10**9, started + 10**9))
+        assert not snapshot.is_fresh(files, [str(database)])
+
+        # Stored header edited after the scan started
+        os.utime(files[1], ns=(started + 10**9, started + 10**9))
+        assert not snapshot.is_fresh(files[:1])
+
+        os.remove(files[1])
+        assert not snapshot.is_fresh(files[:1])
+
+def test_damaged_files_raise_snapshot_error(tmp_path):
+    path = tmp_path / "graph.drts"
+    write_snapshot(path, "/p", {"/p/a.c": ["/p/a.h"], "/p/a.h": []})
+    data = path.read_bytes()
+
+    damaged = [
+        b"",
+        data[:len(data) // 2],
+        b"NOTSNAP\0" + data[8:],
+    ]
+    for content in damaged:
+        path.write_bytes(content)
+        with pytest.raises(SnapshotError):
+            Snapshot(str(path))